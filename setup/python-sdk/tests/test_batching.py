@@ -0,0 +1,87 @@
+"""Events bound for one topic share an envelope that fits one HCS message"""
+
+import asyncio
+
+import pytest
+
+from trustmesh_batching import EnvelopeBatcher, unpack_envelope
+from trustmesh_codec import decode_message, encode_message, msgpack
+
+def event(number):
+    return {
+        "type": "BADGE_CREATED",
+        "timestamp": "2026-01-01T00:00:00+00:00",
+        "data": {"hashinal_id": f"badge-{number:04d}", "recipient": "0.0.1002", "note": "x" * 40},
+        "hcs_standard": "HCS-5"
+    }
+
+def run_batcher(events_by_topic, **options):
+    sent = []
+
+    async def send(topic_id, envelope):
+        sent.append((topic_id, envelope))
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(f"receipt-{len(sent)}")
+        return future
+
+    async def main():
+        batcher = EnvelopeBatcher(send, linger_ms=1000, **options)
+        futures = [
+            await batcher.add(topic_id, message)
+            for topic_id, messages in events_by_topic.items()
+            for message in messages
+        ]
+        await batcher.flush()
+        return await asyncio.gather(*futures)
+
+    return sent, asyncio.run(main())
+
+def test_events_are_batched_per_topic_in_order():
+    sent, receipts = run_batcher({"0.0.5001": [event(1), event(2)], "0.0.5002": [event(3)]})
+
+    assert [topic_id for topic_id, _ in sent] == ["0.0.5001", "0.0.5002"]
+    assert unpack_envelope(sent[0][1]) == [event(1), event(2)]
+    assert unpack_envelope(sent[1][1]) == [event(3)]
+    assert receipts == ["receipt-1", "receipt-1", "receipt-2"]
+
+def test_default_batches_fit_one_message():
+    events = [event(number) for number in range(40)]
+    sent, _ = run_batcher({"0.0.5001": events})
+
+    assert len(sent) > 1
+    unpacked = []
+    for _, envelope in sent:
+        payloads = encode_message(envelope)
+        assert len(payloads) == 1
+        unpacked += unpack_envelope(decode_message(payloads[0]))
+    assert unpacked == events
+
+@pytest.mark.skipif(msgpack is None, reason="the binary wire format needs msgpack")
+def test_msgpack_batches_are_sized_in_msgpack():
+    events = [event(number) for number in range(60)]
+    sent, _ = run_batcher({"0.0.5001": events}, wire_format="msgpack")
+
+    unpacked = []
+    for _, envelope in sent:
+        payloads = encode_message(envelope, wire_format="msgpack")
+        assert len(payloads) == 1
+        unpacked += unpack_envelope(decode_message(payloads[0]))
+    assert unpacked == events
+    # MessagePack is more compact, so fewer batches than JSON needs
+    assert len(sent) < len(run_batcher({"0.0.5001": events})[0])
+
+def test_cancelled_send_cancels_the_batch_futures():
+    async def send(topic_id, envelope):
+        return asyncio.get_running_loop().create_future()
+
+    async def main():
+        batcher = EnvelopeBatcher(send, linger_ms=1000)
+        futures = [await batcher.add("0.0.5001", event(number)) for number in range(3)]
+        batcher._flush_topic("0.0.5001")
+        await asyncio.sleep(0)
+        for task in batcher._sending:
+            task.cancel()
+        await asyncio.wait_for(asyncio.gather(*futures, return_exceptions=True), 1)
+        return futures
+
+    assert all(future.cancelled() for future in asyncio.run(main()))
@@ -0,0 +1,55 @@
+"""Reads are cached until invalidated and served stale while refreshing"""
+
+import asyncio
+import time
+
+from trustmesh_cache import ReadCache
+
+class Loader:
+    def __init__(self):
+        self.value = 0
+        self.loads = 0
+
+    def __call__(self):
+        self.loads += 1
+        return self.value
+
+def test_invalidation_drops_the_cached_value():
+    cache, load = ReadCache(), Loader()
+    assert cache.get("0.0.1001", load) == 0
+    load.value = 1
+    assert cache.get("0.0.1001", load) == 0
+
+    cache.invalidate_many(["0.0.1001"])
+    assert cache.get("0.0.1001", load) == 1
+    assert load.loads == 2
+
+def test_least_recently_used_entry_is_evicted():
+    cache, load = ReadCache(max_entries=2), Loader()
+    for key in ("a", "b", "a", "c"):
+        cache.get(key, load)
+    assert load.loads == 3
+    cache.get("a", load)
+    assert load.loads == 3
+    cache.get("b", load)
+    assert load.loads == 4
+    assert cache.stats()["evictions"] == 2
+
+def test_stale_entry_is_served_while_refreshed_in_the_background():
+    async def main():
+        cache, load = ReadCache(ttl_seconds=0.01, stale_seconds=10.0), Loader()
+        cache.get("0.0.1001", load)
+        time.sleep(0.02)
+        load.value = 1
+        assert cache.get("0.0.1001", load) == 0
+        await asyncio.sleep(0)
+        assert cache.get("0.0.1001", load) == 1
+        assert cache.stats()["stale_hits"] == 1
+        assert cache.stats()["refreshes"] == 1
+    asyncio.run(main())
+
+def test_expired_entry_past_the_stale_window_is_reloaded():
+    cache, load = ReadCache(ttl_seconds=0.0, stale_seconds=0.0), Loader()
+    cache.get("0.0.1001", load)
+    load.value = 1
+    assert cache.get("0.0.1001", load) == 1
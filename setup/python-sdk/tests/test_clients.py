@@ -0,0 +1,114 @@
+"""Submissions spread across operator clients and skip unhealthy ones"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import trustmesh_transport
+from trustmesh_clients import ClientPool, PooledClient
+from trustmesh_ratelimit import AdaptiveRateLimiter
+from trustmesh_transport import HederaTransport
+
+def pool(strategy, count=3, **options):
+    return ClientPool(
+        [PooledClient(client=None, account_id=f"0.0.{1001 + i}") for i in range(count)],
+        strategy=strategy, **options
+    )
+
+def test_round_robin_takes_turns():
+    clients = pool("round_robin")
+    picked = []
+    for _ in range(6):
+        entry = clients.acquire()
+        picked.append(entry.account_id)
+        clients.release(entry)
+    assert picked == ["0.0.1001", "0.0.1002", "0.0.1003"] * 2
+
+def test_least_loaded_picks_the_client_with_fewest_in_flight():
+    clients = pool("least_loaded")
+    held = [clients.acquire() for _ in range(3)]
+    assert {entry.account_id for entry in held} == {"0.0.1001", "0.0.1002", "0.0.1003"}
+
+    clients.release(held[1])
+    assert clients.acquire() is held[1]
+
+def test_failing_client_is_taken_out_of_rotation():
+    clients = pool("round_robin", count=2, failure_threshold=2, cooldown_seconds=60.0)
+    failing = clients.clients[0]
+    for _ in range(4):
+        entry = clients.acquire()
+        clients.release(entry, RuntimeError("INVALID_SIGNATURE") if entry is failing else None)
+
+    assert [stats["healthy"] for stats in clients.stats()] == [False, True]
+    assert {clients.acquire().account_id for _ in range(4)} == {"0.0.1002"}
+
+def test_pool_needs_clients_and_a_known_strategy():
+    with pytest.raises(ValueError):
+        ClientPool([])
+    with pytest.raises(ValueError):
+        pool("random")
+
+class FakeTransaction:
+    def __init__(self, outcomes):
+        self.outcomes = outcomes
+
+    async def executeAsync(self, client):
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+class FakeResponse:
+    async def getReceiptAsync(self, client):
+        return "SUCCESS"
+
+class WatchedLimiter(AdaptiveRateLimiter):
+    """Records each client's in-flight count while submissions wait"""
+
+    def __init__(self, clients):
+        super().__init__(initial_rate=1000.0, base_backoff_seconds=0.0)
+        self.clients = clients
+        self.in_flight_while_waiting = []
+
+    async def acquire(self, *keys):
+        self.in_flight_while_waiting.append([entry.in_flight for entry in self.clients.clients])
+        await super().acquire(*keys)
+
+def transport(monkeypatch, outcomes, **options):
+    """HederaTransport with fake transactions in place of the Hedera SDK"""
+    monkeypatch.setattr(trustmesh_transport, "TopicId", SimpleNamespace(fromString=str), raising=False)
+    hedera = HederaTransport.__new__(HederaTransport)
+    hedera.client_pool = pool("least_loaded", count=1, failure_threshold=2)
+    hedera.rate_limiter = WatchedLimiter(hedera.client_pool)
+    hedera.max_throttle_retries = 5
+    hedera._topic_ids = {}
+    transaction = FakeTransaction(outcomes)
+    hedera._build_submit_transaction = lambda topic, payload, entry: transaction
+    return hedera
+
+def test_throttles_do_not_count_against_client_health(monkeypatch):
+    busy = [RuntimeError("BUSY") for _ in range(3)]
+
+    async def main():
+        hedera = transport(monkeypatch, busy + [FakeResponse()])
+        receipt = await hedera.submit("0.0.5001", b"payload")
+        assert await receipt == "SUCCESS"
+        return hedera
+
+    hedera = asyncio.run(main())
+    entry = hedera.client_pool.clients[0]
+    assert entry.healthy(time.monotonic())
+    assert (entry.failures, entry.submitted, entry.in_flight) == (0, 1, 0)
+    assert hedera.rate_limiter.in_flight_while_waiting == [[0]] * 4
+
+def test_cancelled_submission_returns_its_client(monkeypatch):
+    async def main():
+        hedera = transport(monkeypatch, [asyncio.CancelledError()])
+        with pytest.raises(asyncio.CancelledError):
+            await hedera.submit("0.0.5001", b"payload")
+        return hedera
+
+    entry = asyncio.run(main()).client_pool.clients[0]
+    assert (entry.in_flight, entry.failures) == (0, 0)
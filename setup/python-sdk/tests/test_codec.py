@@ -0,0 +1,122 @@
+"""Payloads round-trip through compression, chunking and either wire format"""
+
+import random
+from dataclasses import asdict
+
+import pytest
+
+from trustmesh_batching import pack_envelopes
+from trustmesh_codec import _CHUNK_INFO, ChunkAssembler, _Frame, decode_message, encode_message, msgpack
+from trustmesh_models import TrustToken, TrustType
+
+needs_msgpack = pytest.mark.skipif(msgpack is None, reason="the binary wire format needs msgpack")
+
+def profile(bio):
+    return {
+        "type": "PROFILE_CREATE",
+        "timestamp": "2026-01-01T00:00:00+00:00",
+        "data": {"profile_id": "0.0.1001", "display_name": "Alex Chen", "bio": bio},
+        "hcs_standard": "HCS-11"
+    }
+
+def test_small_envelope_stays_plain_json():
+    message = profile("Builder")
+    payloads = encode_message(message, compress=True)
+    assert len(payloads) == 1 and payloads[0].startswith(b"{")
+    assert decode_message(payloads[0]) == message
+
+def test_compression_is_opt_in():
+    message = profile("trust " * 100)
+    assert encode_message(message)[0].startswith(b"{")
+
+    payloads = encode_message(message, compress=True)
+    assert len(payloads) == 1 and not payloads[0].startswith(b"{")
+    assert decode_message(payloads[0]) == message
+
+def test_oversized_envelope_is_chunked_and_reassembled_in_any_order():
+    rng = random.Random(7)
+    message = profile("".join(rng.choice("abcdefghij") for _ in range(5000)))
+    payloads = encode_message(message, max_message_bytes=1024)
+    assert len(payloads) > 1 and all(len(payload) <= 1024 for payload in payloads)
+    with pytest.raises(ValueError):
+        decode_message(payloads[0])
+
+    assembler = ChunkAssembler()
+    shuffled = payloads[1:] + payloads[:1]
+    assert [assembler.feed(payload) for payload in shuffled[:-1]] == [None] * (len(payloads) - 1)
+    assert assembler.feed(shuffled[-1]) == message
+
+def test_join_rebuilds_an_unchunked_payload():
+    message = profile("x" * 3000)
+    payloads = encode_message(message, max_message_bytes=512)
+    assembler = ChunkAssembler()
+    joined = [assembler.join(payload) for payload in payloads]
+    assert joined[:-1] == [None] * (len(payloads) - 1)
+    assert decode_message(joined[-1]) == message
+
+def rechunk(payload, index=None, total=None):
+    """Rewrite a chunk frame's index or chunk count"""
+    frame = _Frame(payload)
+    offset = frame.body_offset - _CHUNK_INFO.size
+    info = _CHUNK_INFO.pack(
+        frame.chunk_id,
+        frame.index if index is None else index,
+        frame.total if total is None else total
+    )
+    return payload[:offset] + info + payload[frame.body_offset:]
+
+def test_chunk_index_past_the_count_is_rejected():
+    payloads = encode_message(profile("x" * 3000), max_message_bytes=512)
+    assembler = ChunkAssembler()
+    with pytest.raises(ValueError):
+        assembler.feed(rechunk(payloads[0], index=len(payloads)))
+    with pytest.raises(ValueError):
+        assembler.join(rechunk(payloads[0], index=len(payloads)))
+    assert assembler.snapshot() == {}
+
+def test_chunk_count_must_match_the_chunk_set():
+    message = profile("x" * 3000)
+    payloads = encode_message(message, max_message_bytes=512)
+    assembler = ChunkAssembler()
+    assert assembler.feed(payloads[0]) is None
+    with pytest.raises(ValueError):
+        assembler.feed(rechunk(payloads[1], total=len(payloads) + 1))
+    with pytest.raises(ValueError):
+        assembler.feed(rechunk(payloads[1], index=0, total=1))
+
+    # The forged frames left the chunk set intact
+    assert [assembler.feed(payload) for payload in payloads[1:]][-1] == message
+
+def trust_token():
+    return {
+        "type": "TRUST_TOKEN_GIVEN",
+        "timestamp": "2026-01-01T00:00:00.250000+00:00",
+        "data": asdict(TrustToken(
+            transaction_id="tt_1", sender="0.0.1001", recipient="0.0.1002",
+            timestamp="2026-01-01T00:00:00+00:00", expires_at="2026-04-01T00:00:00+00:00",
+            trust_type=TrustType.PROFESSIONAL, relationship="colleague", trst_staked=20.0
+        )),
+        "hcs_standard": "HCS-20"
+    }
+
+@needs_msgpack
+def test_msgpack_decodes_to_the_json_envelope_and_is_smaller():
+    message = trust_token()
+    payload, = encode_message(message, wire_format="msgpack")
+    assert decode_message(payload) == message
+    assert len(payload) < len(encode_message(message)[0])
+
+@needs_msgpack
+def test_msgpack_keeps_batches_and_unknown_shapes():
+    odd = {"type": "TRUST_TOKEN_GIVEN", "timestamp": "2026-01-01T05:00:00+05:00", "data": {"extra": 1}}
+    batch = pack_envelopes([trust_token(), profile("Builder"), odd])
+    payloads = encode_message(batch, wire_format="msgpack", max_message_bytes=200)
+    assembler = ChunkAssembler()
+    decoded = [assembler.feed(payload) for payload in payloads]
+    assert decoded[-1] == batch
+
+@needs_msgpack
+def test_newer_schema_version_is_refused():
+    payload, = encode_message(profile("Builder"), wire_format="msgpack")
+    with pytest.raises(ValueError):
+        decode_message(payload[:3] + bytes((payload[3] + 1,)) + payload[4:])
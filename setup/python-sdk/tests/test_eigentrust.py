@@ -0,0 +1,78 @@
+"""Propagated trust starts from seeds only"""
+
+import pytest
+
+from trustmesh_eigentrust import EigenTrust
+from trustmesh_graph import TrustGraph, np
+
+def network():
+    graph = TrustGraph()
+    honest = [f"0.0.{100 + i}" for i in range(10)]
+    for i, account_id in enumerate(honest):
+        graph.add_edge(account_id, honest[(i + 1) % len(honest)])
+    sybils = [f"0.0.{900 + i}" for i in range(5)]
+    for account_id in sybils:
+        for other in sybils:
+            if other != account_id:
+                graph.add_edge(account_id, other, "professional", 100.0)
+    return graph, honest, sybils
+
+def test_sybil_ring_earns_nothing():
+    graph, honest, sybils = network()
+    eigentrust = EigenTrust(graph, seeds=[honest[0]])
+    eigentrust.run()
+    scores = eigentrust.scores()
+
+    assert all(scores[account_id] > 0 for account_id in honest)
+    assert all(scores[account_id] == 0 for account_id in sybils)
+
+def test_seeds_are_required():
+    graph, _, _ = network()
+    with pytest.raises(ValueError):
+        EigenTrust(graph, seeds=[])
+
+    eigentrust = EigenTrust(graph, seeds=["0.0.5"])
+    eigentrust.run()
+    assert eigentrust.scores() == {}
+
+def test_run_reads_only_the_arrays_it_is_given():
+    graph, honest, _ = network()
+    graph.compact()
+    arrays = graph.csr()
+    graph.add_edge("0.0.900", "0.0.950")
+    graph.compact()
+
+    eigentrust = EigenTrust(graph, seeds=[honest[0]])
+    eigentrust.run(False, arrays)
+    assert "0.0.950" not in eigentrust.scores()
+
+def test_run_after_a_trustless_run_starts_from_the_seeds():
+    graph, honest, _ = network()
+    # Known (e.g. from its profile) but without trust edges
+    seed = "0.0.5"
+    graph.intern(seed)
+    eigentrust = EigenTrust(graph, seeds=[seed])
+    eigentrust.run()
+    assert not eigentrust.trust.any()
+
+    graph.add_edge(seed, honest[0])
+    trust = eigentrust.run()
+    assert np.isfinite(trust).all()
+    assert abs(trust.sum() - 1.0) < 1e-9
+    assert eigentrust.scores()[honest[0]] > 0
+
+def test_run_after_a_restore_does_not_start_from_the_old_keys():
+    graph, honest, _ = network()
+    # One iteration, so the result shows where the run started from
+    eigentrust = EigenTrust(graph, seeds=[honest[0]], max_iterations=1)
+    for _ in range(20):
+        eigentrust.run()
+
+    smaller = TrustGraph()
+    for i, account_id in enumerate(reversed(honest[:3])):
+        smaller.add_edge(account_id, honest[(i + 1) % 3])
+    graph.interner.restore(smaller.interner.snapshot())
+    graph.restore(smaller.snapshot())
+
+    fresh = EigenTrust(smaller, seeds=[honest[0]], max_iterations=1)
+    assert eigentrust.run().tolist() == fresh.run().tolist()
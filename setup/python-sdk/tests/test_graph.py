@@ -0,0 +1,121 @@
+"""The CSR trust graph answers the same before and after compaction"""
+
+import pytest
+
+from trustmesh_graph import TrustGraph, np
+from trustmesh_state import TrustMeshState
+
+pytestmark = pytest.mark.skipif(np is None, reason="the trust graph needs numpy")
+
+SECOND = 1_000_000_000
+# 2026-01-01T00:00:00+00:00
+GIVEN = 1_767_225_600 * SECOND
+
+EDGES = [
+    ("0.0.1001", "0.0.1002", "professional", 20.0),
+    ("0.0.1003", "0.0.1002", "community", 30.0),
+    ("0.0.1001", "0.0.1003", "personal", 0.0),
+    ("0.0.1001", "0.0.1002", "personal", 10.0),
+]
+
+def view(graph):
+    return {
+        account_id: (
+            graph.out_degree(account_id), graph.in_degree(account_id),
+            graph.neighbors(account_id, "out"), sorted(graph.neighbors(account_id, "in")),
+            sorted(graph.in_edges(account_id)["trst_staked"].tolist())
+        )
+        for account_id in ("0.0.1001", "0.0.1002", "0.0.1003", "0.0.4040")
+    }
+
+def test_buffered_and_compacted_edges_read_the_same():
+    graph = TrustGraph()
+    for edge in EDGES:
+        graph.add_edge(*edge)
+    buffered = view(graph)
+    graph.compact()
+
+    assert view(graph) == buffered
+    assert buffered["0.0.1001"][:3] == (3, 0, ["0.0.1002", "0.0.1003"])
+    assert buffered["0.0.1002"][4] == [10.0, 20.0, 30.0]
+    assert buffered["0.0.4040"] == (0, 0, [], [], [])
+
+def test_edges_added_after_compaction_join_the_compacted_ones():
+    graph = TrustGraph(compact_threshold=2)
+    for edge in EDGES[:3]:
+        graph.add_edge(*edge)
+    assert graph.stats()["buffered_edges"] == 1
+    graph.add_edges([graph.intern("0.0.1001")], [graph.intern("0.0.1002")], [0], [10.0], [0])
+
+    reference = TrustGraph()
+    for edge in EDGES:
+        reference.add_edge(*edge)
+    assert view(graph) == view(reference)
+
+def test_snapshot_round_trip():
+    graph = TrustGraph()
+    for edge in EDGES:
+        graph.add_edge(*edge)
+    restored = TrustGraph(interner=graph.interner)
+    restored.restore(graph.snapshot())
+    assert view(restored) == view(graph)
+    assert [array.tolist() for array in restored.csr()] == [array.tolist() for array in graph.csr()]
+
+def test_removed_edges_leave_reads_at_once_and_the_arrays_on_compaction():
+    graph = TrustGraph()
+    for edge in EDGES[:3]:
+        graph.add_edge(*edge)
+    graph.compact()
+    graph.add_edge(*EDGES[3])
+    assert graph.remove_edge(*EDGES[1])
+    assert graph.remove_edge(*EDGES[3])
+    assert not graph.remove_edge(*EDGES[3])
+
+    reference = TrustGraph(interner=graph.interner)
+    for edge in (EDGES[0], EDGES[2]):
+        reference.add_edge(*edge)
+    assert view(graph) == view(reference)
+    assert graph.edge_count == 2
+
+    graph.compact()
+    reference.compact()
+    assert view(graph) == view(reference)
+    assert [array.tolist() for array in graph.csr()] == [array.tolist() for array in reference.csr()]
+
+def test_graph_holds_only_the_gifts_that_count():
+    state = TrustMeshState(circle_size=2)
+    for number, (sender, recipient, expires_at) in enumerate([
+        ("0.0.1001", "0.0.1002", None),
+        ("0.0.1001", "0.0.1003", "2026-01-01T00:00:05+00:00"),
+        ("0.0.1001", "0.0.1004", None),
+        ("0.0.1005", "0.0.1002", None)
+    ]):
+        state.apply({
+            "type": "TRUST_TOKEN_GIVEN",
+            "timestamp": "2026-01-01T00:00:00+00:00",
+            "data": {
+                "transaction_id": f"tx-{number}", "sender": sender, "recipient": recipient,
+                "amount": 1, "trust_type": "personal", "transaction_hash": f"hash-{number}",
+                "expires_at": expires_at
+            }
+        }, GIVEN + number)
+    # Past 0.0.1001's circle of trust
+    assert state.graph.neighbors("0.0.1001") == ["0.0.1002", "0.0.1003"]
+
+    state.apply({
+        "type": "TRUST_TOKEN_REVOKED",
+        "timestamp": "2026-01-01T00:00:10+00:00",
+        "data": {"transaction_id": "tx-3", "sender": "0.0.1005"}
+    }, GIVEN + 10 * SECOND)
+    state.expire_gifts(GIVEN + 10 * SECOND)
+    assert state.graph.neighbors("0.0.1001") == ["0.0.1002"]
+    assert state.graph.in_degree("0.0.1002") == 1
+
+    restored = TrustMeshState(circle_size=2)
+    restored.restore(state.snapshot())
+    restored.apply({
+        "type": "TRUST_TOKEN_REVOKED",
+        "timestamp": "2026-01-01T00:00:20+00:00",
+        "data": {"transaction_id": "tx-0", "sender": "0.0.1001"}
+    }, GIVEN + 20 * SECOND)
+    assert restored.graph.edge_count == 0
@@ -0,0 +1,95 @@
+"""Idempotency keys run a request once, across processes sharing Redis"""
+
+import asyncio
+
+import pytest
+
+from trustmesh_idempotency import (
+    IdempotencyCache, IdempotencyConflict, IdempotencyInProgress, RedisIdempotencyBackend,
+    request_fingerprint
+)
+
+class FakeRedis:
+    """The few commands the backend uses, without expiry"""
+
+    def __init__(self):
+        self.values = {}
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def eval(self, script, numkeys, key, value):
+        if self.values.get(key) == value:
+            del self.values[key]
+            return 1
+        return 0
+
+def process_caches(count, **options):
+    """Caches of separate processes sharing one Redis"""
+    redis = FakeRedis()
+    caches = []
+    for _ in range(count):
+        backend = RedisIdempotencyBackend(client=redis)
+        caches.append(IdempotencyCache(backend=backend, poll_seconds=0.001, **options))
+    return caches
+
+def test_key_reused_for_another_request_is_refused():
+    async def main():
+        cache = IdempotencyCache()
+        await cache.run("key", lambda: asyncio.sleep(0, "tt_1"), request_fingerprint("0.0.2", 1))
+        with pytest.raises(IdempotencyConflict):
+            await cache.run("key", lambda: asyncio.sleep(0, "tt_2"), request_fingerprint("0.0.3", 1))
+    asyncio.run(main())
+
+def test_concurrent_processes_run_the_request_once():
+    runs = []
+
+    async def operation():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return "tt_1"
+
+    async def main():
+        first, second = process_caches(2)
+        fingerprint = request_fingerprint("0.0.2", 1)
+        results = await asyncio.gather(
+            first.run("key", operation, fingerprint), second.run("key", operation, fingerprint)
+        )
+        assert results == ["tt_1", "tt_1"]
+        with pytest.raises(IdempotencyConflict):
+            await second.run("key", operation, request_fingerprint("0.0.3", 1))
+    asyncio.run(main())
+    assert len(runs) == 1
+
+def test_failed_request_frees_the_key_and_slow_one_is_reported_running():
+    async def fail():
+        raise RuntimeError("submission failed")
+
+    async def main():
+        first, second = process_caches(2, wait_seconds=0.01)
+        with pytest.raises(RuntimeError):
+            await first.run("key", fail, "fingerprint")
+        assert await second.run("key", lambda: asyncio.sleep(0, "tt_2"), "fingerprint") == "tt_2"
+
+        slow = asyncio.ensure_future(first.run("slow", lambda: asyncio.sleep(0.1, "tt_3"), "fingerprint"))
+        await asyncio.sleep(0)
+        with pytest.raises(IdempotencyInProgress):
+            await second.run("slow", lambda: asyncio.sleep(0, "tt_4"), "fingerprint")
+        assert await slow == "tt_3"
+    asyncio.run(main())
+
+def test_timed_out_request_can_be_retried_with_its_key():
+    async def main():
+        for cache in (IdempotencyCache(), process_caches(1)[0]):
+            slow = cache.run("key", lambda: asyncio.sleep(1, "tt_1"), "fingerprint")
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(slow, 0.01)
+            retry = cache.run("key", lambda: asyncio.sleep(0, "tt_2"), "fingerprint")
+            assert await asyncio.wait_for(retry, 1) == "tt_2"
+    asyncio.run(main())
@@ -0,0 +1,82 @@
+"""Ingestion keeps going past bad events and drops repeated messages"""
+
+from trustmesh_codec import encode_message
+from trustmesh_ingest import IngestionEngine
+from trustmesh_transport import TopicMessage
+
+TOPIC_ID = "0.0.5005"
+
+def message(consensus_timestamp, event):
+    return TopicMessage(
+        topic_id=TOPIC_ID,
+        sequence_number=consensus_timestamp,
+        consensus_timestamp=consensus_timestamp,
+        contents=encode_message(event)[0]
+    )
+
+def profile(display_name, updated_at):
+    return {
+        "type": "PROFILE_CREATE",
+        "timestamp": updated_at,
+        "data": {"profile_id": "0.0.1001", "display_name": display_name, "updated_at": updated_at}
+    }
+
+def test_malformed_event_is_counted_and_not_half_applied():
+    engine = IngestionEngine(transport=None, topics={"trust_tokens": TOPIC_ID})
+    engine.ingest(message(10, {
+        "type": "TRUST_TOKEN_GIVEN",
+        "timestamp": "2026-01-01T00:00:00+00:00",
+        "data": {
+            "transaction_id": "tx-1", "sender": "0.0.1001", "recipient": "0.0.1002",
+            "amount": 1, "transaction_hash": "hash-1", "expires_at": "not a timestamp"
+        }
+    }))
+
+    assert engine.apply_errors == 1
+    assert engine.state.ledger.balance("0.0.1002") == 0
+    assert engine.state.circle.sender("tx-1") is None
+    assert engine.cursors() == {TOPIC_ID: 10}
+
+def test_profile_updates_are_applied_and_redeliveries_dropped():
+    engine = IngestionEngine(transport=None, topics={"profiles": TOPIC_ID})
+    first = profile("Alex", "2026-01-01T00:00:00+00:00")
+    second = profile("Alex Chen", "2026-01-02T00:00:00+00:00")
+    engine.ingest(message(11, first))
+    engine.ingest(message(12, second))
+    engine.ingest(message(12, second))
+    engine.ingest(message(13, first))
+
+    assert engine.state.user("0.0.1001").display_name == "Alex Chen"
+    assert engine.state.activity("0.0.1001") == 2
+    assert engine.redeliveries == 1
+    assert engine.recent_events.duplicates == 1
+
+def trust_token(transaction_id, transaction_hash):
+    return {
+        "type": "TRUST_TOKEN_GIVEN",
+        "timestamp": "2026-01-01T00:00:00+00:00",
+        "data": {
+            "transaction_id": transaction_id, "sender": "0.0.1001", "recipient": "0.0.1002",
+            "amount": 1, "trust_type": "community", "trst_staked": 20.0,
+            "transaction_hash": transaction_hash
+        }
+    }
+
+def test_duplicates_are_dropped_after_a_restart():
+    engine = IngestionEngine(transport=None, topics={"trust_tokens": TOPIC_ID})
+    engine.ingest(message(10, trust_token("tx-1", "hash-1")))
+    restarted = IngestionEngine(transport=None, topics={"trust_tokens": TOPIC_ID})
+    restarted.state.restore(engine.state.snapshot())
+    restarted.restore(engine.snapshot())
+
+    # A re-send reaches consensus again under a later timestamp
+    restarted.ingest(message(20, trust_token("tx-1", "hash-1")))
+    assert restarted.recent_events.duplicates == 1
+
+    # One the filter does not remember is still not counted twice
+    forgetful = IngestionEngine(transport=None, topics={"trust_tokens": TOPIC_ID})
+    forgetful.state.restore(engine.state.snapshot())
+    forgetful.ingest(message(20, trust_token("tx-1", "hash-1b")))
+    for restored in (restarted, forgetful):
+        assert restored.state.ledger.balance("0.0.1002") == engine.state.ledger.balance("0.0.1002")
+        assert restored.state.user("0.0.1002").trust_level_total == engine.state.user("0.0.1002").trust_level_total
@@ -0,0 +1,58 @@
+"""Trust balances count confirmed gifts plus this process's pending ones"""
+
+from trustmesh_accounts import AccountInterner
+from trustmesh_ledger import TrustLedger
+
+def gift(transaction_id, sender="0.0.1001", recipient="0.0.1002", trust_type="professional"):
+    return {
+        "transaction_id": transaction_id, "sender": sender, "recipient": recipient,
+        "amount": 1, "trust_type": trust_type, "trst_staked": 20.0
+    }
+
+def test_pending_gift_counts_until_confirmed_once():
+    ledger = TrustLedger()
+    ledger.add_pending("tx-1", "0.0.1001", "0.0.1002")
+    ledger.add_pending("tx-1", "0.0.1001", "0.0.1002")
+    assert ledger.balance("0.0.1002") == 1
+    assert ledger.balance("0.0.1002", include_pending=False) == 0
+
+    ledger.apply(gift("tx-1"))
+    assert ledger.balance("0.0.1002") == 1
+    assert ledger.given("0.0.1001") == 1
+    assert ledger.pending_count == 0
+
+def test_failed_gift_is_discarded():
+    ledger = TrustLedger()
+    ledger.add_pending("tx-1", "0.0.1001", "0.0.1002")
+    ledger.discard_pending("tx-1")
+    assert ledger.balance("0.0.1002") == 0
+    assert ledger.summary("0.0.1002")["pending_received"] == 0
+
+def test_totals_by_trust_type_and_stake():
+    ledger = TrustLedger()
+    ledger.apply(gift("tx-1"))
+    ledger.apply(gift("tx-2", sender="0.0.1003", trust_type="community"))
+    summary = ledger.summary("0.0.1002")
+    assert summary["balance"] == 2
+    assert summary["trst_staked_received"] == 40.0
+    assert summary["received_by_type"] == {"professional": 1, "community": 1}
+
+def test_merge_maps_keys_across_interners():
+    ledger = TrustLedger()
+    ledger.interner.intern("0.0.9999")
+    other = TrustLedger(AccountInterner())
+    other.apply(gift("tx-1"))
+    ledger.apply(gift("tx-2"))
+    ledger.merge(other)
+    assert ledger.balance("0.0.1002") == 2
+    assert ledger.given("0.0.1001") == 2
+
+def test_snapshot_round_trip_keeps_pending_gifts():
+    ledger = TrustLedger()
+    ledger.apply(gift("tx-1"))
+    ledger.add_pending("tx-2", "0.0.1001", "0.0.1003")
+
+    restored = TrustLedger(ledger.interner)
+    restored.restore(ledger.snapshot(), ledger.pending_gifts())
+    assert restored.summary("0.0.1002") == ledger.summary("0.0.1002")
+    assert restored.balance("0.0.1003") == 1
@@ -0,0 +1,115 @@
+"""Outbox writes stay off the event loop and resumed entries settle"""
+
+import asyncio
+import threading
+
+from trustmesh_outbox import SubmissionOutbox
+from trustmesh_sdk import TrustMeshSDK
+from trustmesh_transport import InMemoryTransport
+
+PROFILE = {
+    "type": "PROFILE_CREATE",
+    "timestamp": "2026-01-01T00:00:00+00:00",
+    "data": {
+        "profile_id": "0.0.1002", "display_name": "Alex Chen",
+        "updated_at": "2026-01-01T00:00:00+00:00"
+    }
+}
+
+class ThreadRecordingOutbox(SubmissionOutbox):
+    def _execute(self, sql, parameters):
+        self.threads.add(threading.current_thread().name)
+        super()._execute(sql, parameters)
+
+def test_database_writes_run_on_the_writer_thread(tmp_path):
+    async def send(topic_id, message):
+        future = asyncio.get_running_loop().create_future()
+        future.set_result("receipt")
+        return future
+
+    async def main():
+        outbox = ThreadRecordingOutbox(str(tmp_path / "outbox.db"), send)
+        outbox.threads = set()
+        receipt = await outbox.submit("0.0.5001", PROFILE)
+        assert await receipt == "receipt"
+        assert (await outbox.stats())["confirmed"] == 1
+        await outbox.close()
+        return outbox.threads
+
+    threads = asyncio.run(main())
+    assert threads and threading.current_thread().name not in threads
+    assert all(name.startswith("outbox") for name in threads)
+
+def test_entries_resumed_after_a_restart_are_settled(tmp_path):
+    path = str(tmp_path / "outbox.db")
+
+    async def interrupted_run():
+        # The process stops before the entry reaches consensus
+        never = asyncio.get_running_loop().create_future()
+
+        async def send(topic_id, message):
+            return never
+
+        outbox = SubmissionOutbox(path, send)
+        await outbox.submit("0.0.5001", PROFILE, operation_id="0.0.1002")
+        await asyncio.sleep(0.01)
+        await outbox.close()
+
+    async def next_run():
+        sdk = TrustMeshSDK("0.0.1001", transport=InMemoryTransport(), outbox_path=path)
+        await sdk.start()
+        errors = await sdk.flush()
+        await sdk.close()
+        return sdk, errors
+
+    asyncio.run(interrupted_run())
+    sdk, errors = asyncio.run(next_run())
+    assert errors == {}
+    assert sdk.state.user("0.0.1002").display_name == "Alex Chen"
+
+def test_workers_do_not_cap_submissions_in_flight(tmp_path):
+    async def main():
+        receipts = []
+
+        async def send(topic_id, message):
+            receipts.append(asyncio.get_running_loop().create_future())
+            return receipts[-1]
+
+        outbox = SubmissionOutbox(str(tmp_path / "outbox.db"), send, workers=1)
+        futures = [await outbox.submit("0.0.5001", PROFILE) for _ in range(5)]
+        for _ in range(100):
+            if len(receipts) == 5:
+                break
+            await asyncio.sleep(0.01)
+        assert len(receipts) == 5
+
+        for number, receipt in enumerate(receipts):
+            receipt.set_result(f"receipt-{number}")
+        await outbox.drain()
+        assert [await future for future in futures] == [f"receipt-{n}" for n in range(5)]
+        assert (await outbox.stats())["confirmed"] == 5
+        await outbox.close()
+
+    asyncio.run(main())
+
+def test_failed_receipt_is_resent(tmp_path):
+    async def main():
+        attempts = []
+
+        async def send(topic_id, message):
+            attempts.append(message)
+            future = asyncio.get_running_loop().create_future()
+            if len(attempts) == 1:
+                future.set_exception(RuntimeError("BUSY"))
+            else:
+                future.set_result("receipt")
+            return future
+
+        outbox = SubmissionOutbox(str(tmp_path / "outbox.db"), send, base_backoff_seconds=0.001)
+        future = await outbox.submit("0.0.5001", PROFILE)
+        await outbox.drain()
+        assert await future == "receipt"
+        assert len(attempts) == 2
+        await outbox.close()
+
+    asyncio.run(main())
@@ -0,0 +1,46 @@
+"""Submission rates back off on throttling and ramp up again on success"""
+
+import asyncio
+import time
+
+from trustmesh_ratelimit import AdaptiveRateLimiter, is_throttle_error
+
+def test_throttle_statuses_are_recognized():
+    assert is_throttle_error(RuntimeError("precheck failed: BUSY"))
+    assert is_throttle_error(RuntimeError("THROTTLED_AT_CONSENSUS"))
+    assert not is_throttle_error(RuntimeError("INVALID_SIGNATURE"))
+
+def test_burst_is_spent_then_submissions_wait_for_refill():
+    async def main():
+        limiter = AdaptiveRateLimiter(initial_rate=20.0, burst_seconds=0.25)
+        started = time.monotonic()
+        for _ in range(5):
+            await limiter.acquire("0.0.5001")
+        before_refill = time.monotonic() - started
+        await limiter.acquire("0.0.5001")
+        return before_refill, time.monotonic() - started
+
+    before_refill, elapsed = asyncio.run(main())
+    assert before_refill < 0.02
+    assert elapsed >= 0.04
+
+def test_throttle_halves_the_rate_and_pauses_only_that_key():
+    limiter = AdaptiveRateLimiter(initial_rate=40.0, base_backoff_seconds=0.2)
+    delay = limiter.on_throttle("0.0.5001", ("operator", "0.0.1001"))
+    stats = limiter.stats()
+
+    assert 0.1 <= delay <= 0.2
+    assert stats["0.0.5001"]["rate"] == 20.0
+    assert stats["operator:0.0.1001"]["rate"] == 20.0
+    assert stats["0.0.5001"]["paused_for"] > 0
+    assert "0.0.5002" not in stats
+
+def test_rate_ramps_back_up_within_bounds():
+    limiter = AdaptiveRateLimiter(initial_rate=10.0, min_rate=4.0, max_rate=12.0)
+    for _ in range(5):
+        limiter.on_throttle("0.0.5001")
+    assert limiter.stats()["0.0.5001"]["rate"] == 4.0
+
+    for _ in range(1000):
+        limiter.on_success("0.0.5001")
+    assert limiter.stats()["0.0.5001"]["rate"] == 12.0
@@ -0,0 +1,197 @@
+"""Replay rebuilds the same poll tallies as live ingestion"""
+
+import asyncio
+
+from trustmesh_codec import encode_message
+from trustmesh_ingest import IngestionEngine
+from trustmesh_replay import ParallelReplay
+from trustmesh_reputation import ReputationEngine
+from trustmesh_transport import InMemoryTransport, TopicMessage
+
+SECOND = 1_000_000_000
+# 2026-01-01T00:00:00+00:00
+OPENS = 1_767_225_600 * SECOND
+VOTE_TIME = OPENS + 30 * 60 * SECOND
+TOPICS = {"trust_tokens": "0.0.5001", "community_polls": "0.0.5002"}
+
+def gift(sender, recipient):
+    return {
+        "type": "TRUST_TOKEN_GIVEN",
+        "timestamp": "2026-01-01T00:00:00+00:00",
+        "data": {
+            "transaction_id": f"tx-{sender}-{recipient}", "sender": sender, "recipient": recipient,
+            "amount": 1, "trust_type": "professional", "transaction_hash": f"hash-{sender}-{recipient}"
+        }
+    }
+
+def ballot(voter, option_id):
+    return {
+        "type": "POLL_VOTE_CAST",
+        "timestamp": "2026-01-01T00:30:00+00:00",
+        "data": {
+            "poll_id": "poll-1", "vote_id": f"vote-{voter}", "voter": voter, "selected_option": option_id,
+            "vote_weight": 1.0, "voter_profile": {"trust_score": 99.0}
+        }
+    }
+
+POLL = {
+    "type": "COMMUNITY_POLL_CREATED",
+    "timestamp": "2026-01-01T00:00:00+00:00",
+    "data": {
+        "poll_id": "poll-1",
+        "options": [{"option_id": "a"}, {"option_id": "b"}],
+        "timeline": {
+            "voting_opens": "2026-01-01T00:00:00+00:00",
+            "voting_closes": "2026-01-01T01:00:00+00:00"
+        },
+        "eligibility": {"minimum_trust_score": 5.0}
+    }
+}
+
+def archive():
+    """Topic logs where 0.0.2001 is trusted before voting, 0.0.2002 only
+    afterwards and 0.0.2003 never, though every ballot claims a score of 99"""
+    tokens = [(VOTE_TIME - (i + 1) * SECOND, gift(f"0.0.{3000 + i}", "0.0.2001")) for i in range(5)]
+    tokens += [(VOTE_TIME + (i + 1) * SECOND, gift(f"0.0.{3000 + i}", "0.0.2002")) for i in range(5)]
+    polls = [
+        (OPENS, POLL),
+        (VOTE_TIME, ballot("0.0.2001", "a")),
+        (VOTE_TIME + 100, ballot("0.0.2002", "b")),
+        (VOTE_TIME + 200, ballot("0.0.2003", "b"))
+    ]
+    return {
+        topic_id: [
+            TopicMessage(topic_id, number, timestamp, encode_message(event)[0])
+            for number, (timestamp, event) in enumerate(sorted(log, key=lambda item: item[0]), 1)
+        ]
+        for topic_id, log in ((TOPICS["trust_tokens"], tokens), (TOPICS["community_polls"], polls))
+    }
+
+def graph_view(state, account_ids):
+    return {
+        account_id: (
+            state.graph.neighbors(account_id, "out"), sorted(state.graph.neighbors(account_id, "in")),
+            state.graph.out_degree(account_id), state.graph.in_degree(account_id)
+        )
+        for account_id in account_ids
+    }
+
+def test_replay_and_live_ingestion_reject_the_same_ballots():
+    logs = archive()
+
+    # A live reader that follows the poll topic ahead of the token topic
+    engine = IngestionEngine(transport=None, topics=TOPICS)
+    ReputationEngine(engine.state)
+    for topic_id in (TOPICS["community_polls"], TOPICS["trust_tokens"]):
+        for message in logs[topic_id]:
+            engine.ingest(message)
+    live = engine.state.poll_results("poll-1")
+
+    transport = InMemoryTransport()
+    transport.logs.update(logs)
+    replay = ParallelReplay(transport, TOPICS, processes=1, range_size=3)
+    replayed = asyncio.run(replay.run()).poll_results("poll-1")
+
+    assert live["counts"] == {"a": 1, "b": 0}
+    assert live["rejected"]["ineligible"] == 2
+    assert replayed == live
+
+def test_replay_withdraws_revoked_and_expired_tokens_like_live_ingestion():
+    topic_id = TOPICS["trust_tokens"]
+    events = []
+    for i in range(6):
+        event = gift(f"0.0.{3000 + i}", "0.0.2001")
+        if i % 2:
+            event["data"]["expires_at"] = "2026-01-01T00:00:30+00:00"
+        events.append((OPENS + i * SECOND, event))
+    for i in (0, 1, 4):
+        events.append((OPENS + (10 + i) * SECOND, {
+            "type": "TRUST_TOKEN_REVOKED",
+            "timestamp": "2026-01-01T00:00:10+00:00",
+            "data": {"transaction_id": f"tx-0.0.{3000 + i}-0.0.2001", "sender": f"0.0.{3000 + i}"}
+        }))
+    events.append((OPENS + 60 * SECOND, gift("0.0.3009", "0.0.2002")))
+    logs = {topic_id: [
+        TopicMessage(topic_id, number, timestamp, encode_message(event)[0])
+        for number, (timestamp, event) in enumerate(events, 1)
+    ]}
+
+    engine = IngestionEngine(transport=None, topics={"trust_tokens": topic_id})
+    for message in logs[topic_id]:
+        engine.ingest(message)
+    transport = InMemoryTransport()
+    transport.logs.update(logs)
+    replayed = asyncio.run(ParallelReplay(transport, TOPICS, processes=1, range_size=4).run())
+
+    live = engine.state
+    assert live.trust_data("0.0.2001")["tokens_received"] == 1
+    assert replayed.trust_data("0.0.2001") == live.trust_data("0.0.2001")
+    for seconds in (5, 12, 20, 40):
+        consensus_timestamp = OPENS + seconds * SECOND
+        assert (replayed.history.inputs_at(replayed.interner.key("0.0.2001"), consensus_timestamp)
+                == live.history.inputs_at(live.interner.key("0.0.2001"), consensus_timestamp))
+    # Only the one token still counting carries trust
+    assert live.graph.in_degree("0.0.2001") == 1
+    assert graph_view(replayed, live.interner.account_ids) == graph_view(live, live.interner.account_ids)
+
+def test_replay_applies_the_circle_of_trust_across_ranges_like_live_ingestion():
+    topic_id = TOPICS["trust_tokens"]
+    events = []
+    for i in range(14):
+        event = gift("0.0.3000", f"0.0.{2000 + i}")
+        if i == 1:
+            event["data"]["expires_at"] = "2026-01-01T00:00:12.500000+00:00"
+        events.append((OPENS + i * SECOND, event))
+        if i == 5:
+            events.append((OPENS + i * SECOND + 1, {
+                "type": "TRUST_TOKEN_REVOKED",
+                "timestamp": "2026-01-01T00:00:05+00:00",
+                "data": {"transaction_id": "tx-0.0.3000-0.0.2004", "sender": "0.0.3000"}
+            }))
+    logs = {topic_id: [
+        TopicMessage(topic_id, number, timestamp, encode_message(event)[0])
+        for number, (timestamp, event) in enumerate(events, 1)
+    ]}
+
+    engine = IngestionEngine(transport=None, topics={"trust_tokens": topic_id})
+    for message in logs[topic_id]:
+        engine.ingest(message)
+    transport = InMemoryTransport()
+    transport.logs.update(logs)
+    replayed = asyncio.run(ParallelReplay(transport, TOPICS, processes=1, range_size=3).run())
+
+    live = engine.state
+    counted = [live.trust_data(f"0.0.{2000 + i}")["tokens_received"] for i in range(14)]
+    # The circle is full from the 11th gift until the 2nd expires
+    assert counted == [1, 0, 1, 1, 0, 1, 1, 1, 1, 1, 0, 0, 0, 1]
+    for i in range(14):
+        recipient = f"0.0.{2000 + i}"
+        assert replayed.trust_data(recipient) == live.trust_data(recipient)
+        for seconds in (3, 9, 12, 14):
+            consensus_timestamp = OPENS + seconds * SECOND
+            assert (replayed.history.inputs_at(replayed.interner.key(recipient), consensus_timestamp)
+                    == live.history.inputs_at(live.interner.key(recipient), consensus_timestamp))
+    assert replayed.live_gifts(replayed.interner.key("0.0.3000")) == 9
+    assert live.graph.out_degree("0.0.3000") == 9
+    assert graph_view(replayed, live.interner.account_ids) == graph_view(live, live.interner.account_ids)
+
+def test_replay_on_a_process_pool_matches_live_ingestion():
+    logs = archive()
+    engine = IngestionEngine(transport=None, topics=TOPICS)
+    ReputationEngine(engine.state)
+    for topic_id in (TOPICS["trust_tokens"], TOPICS["community_polls"]):
+        for message in logs[topic_id]:
+            engine.ingest(message)
+    live = engine.state
+
+    transport = InMemoryTransport()
+    transport.logs.update(logs)
+    replay = ParallelReplay(transport, TOPICS, processes=2, range_size=2)
+    replayed = asyncio.run(replay.run())
+
+    assert replay.stats()["decode_errors"] == 0
+    assert replayed.poll_results("poll-1") == live.poll_results("poll-1")
+    for account_id in ("0.0.2001", "0.0.2002", "0.0.3000"):
+        assert replayed.trust_data(account_id) == live.trust_data(account_id)
+        assert replayed.activity(account_id) == live.activity(account_id)
+    assert graph_view(replayed, live.interner.account_ids) == graph_view(live, live.interner.account_ids)
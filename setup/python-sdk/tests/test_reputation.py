@@ -0,0 +1,60 @@
+"""Incremental reputation scores match a rescore from scratch"""
+
+from trustmesh_reputation import ReputationEngine
+from trustmesh_state import TrustMeshState
+
+def gift(number, sender, recipient, trust_type="professional"):
+    return {
+        "type": "TRUST_TOKEN_GIVEN",
+        "timestamp": "2026-01-01T00:00:00+00:00",
+        "data": {
+            "transaction_id": f"tx-{number}", "sender": sender, "recipient": recipient,
+            "amount": 1, "trust_type": trust_type, "trst_staked": 25.0
+        }
+    }
+
+def badge(number, recipient, rarity):
+    return {
+        "type": "BADGE_ISSUED",
+        "timestamp": "2026-01-01T00:00:00+00:00",
+        "data": {
+            "hashinal_id": f"badge-{number}", "name": "Mentor", "description": "",
+            "category": "leadership", "rarity": rarity, "recipient": recipient, "issued_by": "0.0.1001"
+        }
+    }
+
+def events():
+    yield gift(1, "0.0.1001", "0.0.1002")
+    yield gift(2, "0.0.1003", "0.0.1002", "community")
+    yield badge(3, "0.0.1002", "rare")
+    yield gift(4, "0.0.1002", "0.0.1004", "personal")
+    yield badge(5, "0.0.1004", "legendary")
+
+def test_incremental_scores_match_a_full_rescore():
+    state = TrustMeshState()
+    engine = ReputationEngine(state)
+    for event in events():
+        state.apply(event)
+
+    fresh = ReputationEngine(state)
+    for user_id in ("0.0.1001", "0.0.1002", "0.0.1003", "0.0.1004"):
+        assert engine.reputation(user_id)["overall_score"] == fresh.reputation(user_id)["overall_score"]
+        assert engine.score(user_id).overall_score > 0
+
+def test_only_touched_users_are_rescored():
+    state = TrustMeshState()
+    engine = ReputationEngine(state)
+    for event in events():
+        state.apply(event)
+
+    before = engine.rescored
+    other = engine.score("0.0.1003")
+    state.apply(badge(6, "0.0.1004", "common"))
+    assert engine.rescored - before == 2
+    assert engine.score("0.0.1003") is other
+
+def test_unknown_user_scores_zero():
+    engine = ReputationEngine(TrustMeshState())
+    record = engine.reputation("0.0.4040")
+    assert record["overall_score"] == 0.0
+    assert record["milestone"]["level"] == "NEW_MEMBER"
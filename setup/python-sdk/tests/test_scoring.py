@@ -0,0 +1,91 @@
+"""Bulk scoring must agree with the scalar reputation engine"""
+
+import random
+
+import pytest
+
+from trustmesh_accounts import AccountInterner
+from trustmesh_reputation import ReputationEngine
+from trustmesh_scoring import MILESTONE_LEVELS, ReputationFeatures, np, score_features
+from trustmesh_tally import TallyEngine
+
+pytestmark = pytest.mark.skipif(np is None, reason="bulk scoring needs numpy")
+
+class FeatureState:
+    """Just enough of TrustMeshState for the engine, with inputs set directly"""
+
+    def __init__(self):
+        self.interner = AccountInterner()
+        self.tallies = TallyEngine(interner=self.interner)
+        self.users = {}
+
+    def add_listener(self, listener):
+        pass
+
+    def set(self, user_id, trust_data, badge_data, activity):
+        self.users[self.interner.intern(user_id)] = (trust_data, badge_data, activity)
+
+    def trust_data_by_key(self, key):
+        return self.users[key][0]
+
+    def badge_data_by_key(self, key):
+        return self.users[key][1]
+
+    def activity_by_key(self, key):
+        return self.users[key][2]
+
+    def trust_data(self, user_id):
+        return self.trust_data_by_key(self.interner.key(user_id))
+
+    def badge_data(self, user_id):
+        return self.badge_data_by_key(self.interner.key(user_id))
+
+def random_inputs(rng):
+    trust_data = {
+        "tokens_received": rng.randint(0, 20),
+        "tokens_given": rng.randint(0, 20),
+        "average_trust_level": round(rng.uniform(0, 5), 2),
+        "trst_backing": round(rng.uniform(0, 150), rng.choice((0, 1, 2))),
+        "connections": rng.randint(0, 20)
+    }
+    badge_data = {
+        "total_badges": rng.randint(0, 4),
+        "rare_badges": rng.randint(0, 2),
+        "legendary_badges": rng.randint(0, 1),
+        "categories": []
+    }
+    return trust_data, badge_data, rng.randint(0, 25)
+
+def assert_same_scores(engine, features, user_ids):
+    bulk = score_features(features, engine.weights)
+    for row, user_id in enumerate(bulk["user_ids"]):
+        reputation = engine.reputation(user_id)
+        assert bulk["overall_score"][row] == reputation["overall_score"], user_id
+        assert MILESTONE_LEVELS[bulk["milestone"][row]] == reputation["milestone"]["level"], user_id
+    assert sorted(bulk["user_ids"]) == sorted(user_ids)
+
+def test_random_features_match_scalar_engine():
+    rng = random.Random(14)
+    state, features = FeatureState(), ReputationFeatures()
+    user_ids = [f"0.0.{1000 + i}" for i in range(5000)]
+    for user_id in user_ids:
+        state.set(user_id, *random_inputs(rng))
+    engine = ReputationEngine(state, features=features)
+
+    assert_same_scores(engine, features, user_ids)
+
+def test_half_boundaries_match_scalar_engine():
+    # With only the network component weighted, the overall score is the
+    # network score itself, so .x5 values land exactly on a rounding half
+    state, features = FeatureState(), ReputationFeatures()
+    boundaries = [29.05, 26.95, 0.05, 0.15, 0.25, 14.95, 15.05, 24.95, 29.95, 2.675, 10.25]
+    rng = random.Random(5)
+    boundaries += [round(rng.randint(0, 999) / 10 + 0.05, 2) for _ in range(2000)]
+    user_ids = [f"0.0.{2000 + i}" for i in range(len(boundaries))]
+    for user_id in user_ids:
+        state.set(user_id, *random_inputs(rng))
+    engine = ReputationEngine(state, features=features)
+    engine.set_weights({"trust": 0.0, "badges": 0.0, "activity": 0.0, "network": 1.0})
+    engine.set_network_scores(dict(zip(user_ids, boundaries)))
+
+    assert_same_scores(engine, features, user_ids)
@@ -0,0 +1,217 @@
+"""Every submission is tracked until it settles and for a while after"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from trustmesh_codec import msgpack
+from trustmesh_scoring import np
+from trustmesh_sdk import TrustMeshSDK
+from trustmesh_transport import InMemoryTransport
+
+class SlowTransport(InMemoryTransport):
+    """Receipts arrive a little after each submission"""
+
+    async def submit(self, topic_id, payload):
+        receipt = await (await super().submit(topic_id, payload))
+        future = asyncio.get_running_loop().create_future()
+        asyncio.get_running_loop().call_later(0.01, future.set_result, receipt)
+        return future
+
+def test_flush_waits_for_submissions_without_an_operation_id():
+    async def main():
+        sdk = TrustMeshSDK("0.0.1001", transport=SlowTransport(), pipelined=True)
+        await sdk.publish_reputation("0.0.1002")
+        assert sdk.pending_confirmations
+        assert await sdk.flush() == {}
+        assert not sdk.pending_confirmations
+    asyncio.run(main())
+
+def test_settled_confirmation_stays_available():
+    async def main():
+        sdk = TrustMeshSDK("0.0.1001", transport=SlowTransport(), pipelined=True)
+        profile_id = await sdk.create_profile("Alex Chen")
+        await sdk.flush()
+        confirmation = sdk.confirmation(profile_id)
+        assert confirmation is not None and confirmation.done()
+        assert sdk.confirmation("unknown") is None
+
+        sdk = TrustMeshSDK(
+            "0.0.1001", transport=SlowTransport(), pipelined=True, confirmation_retention_seconds=0.0
+        )
+        await sdk.create_profile("Alex Chen")
+        await sdk.flush()
+        assert sdk.confirmation(profile_id) is None
+    asyncio.run(main())
+
+def test_repeated_profile_updates_are_tracked_separately():
+    async def main():
+        sdk = TrustMeshSDK("0.0.1001", transport=SlowTransport(), pipelined=True)
+        await sdk.create_profile("Alex Chen")
+        first = sdk.confirmation("0.0.1001")
+        await sdk.create_profile("Alex")
+        second = sdk.confirmation("0.0.1001")
+
+        assert first is not second
+        assert len(sdk.pending_confirmations) == 2
+        assert await sdk.flush() == {}
+        assert first.done() and second.done()
+        assert sdk.state.user("0.0.1001").display_name == "Alex"
+    asyncio.run(main())
+
+class FlakyTopicTransport(InMemoryTransport):
+    """Topic creation takes a while and fails for chosen memos"""
+
+    def __init__(self, failing):
+        super().__init__()
+        self.failing = set(failing)
+        self.creating = self.most_creating = 0
+
+    async def create_topic(self, memo):
+        self.creating += 1
+        self.most_creating = max(self.most_creating, self.creating)
+        await asyncio.sleep(0.01)
+        self.creating -= 1
+        if memo in self.failing:
+            raise RuntimeError("BUSY")
+        return await super().create_topic(memo)
+
+def test_topics_are_created_concurrently_and_failures_resume():
+    async def main():
+        transport = FlakyTopicTransport({"TrustMesh Recognition Badges (HCS-5)"})
+        sdk = TrustMeshSDK("0.0.1001", transport=transport)
+        created = await sdk.create_topics()
+        assert transport.most_creating == 5
+        assert sorted(created) == ["polls", "profiles", "reputation", "trust_tokens"]
+        assert list(sdk.failed_topics) == ["badges"]
+        assert sdk.topics["badges"] == "0.0.BADGES_TOPIC"
+
+        transport.failing.clear()
+        assert list(await sdk.create_topics(names=list(sdk.failed_topics))) == ["badges"]
+        assert sdk.failed_topics == {}
+        assert sdk.topics["badges"] in transport.memos
+    asyncio.run(main())
+
+def badge(hashinal_id, rarity):
+    return {
+        "type": "BADGE_ISSUED",
+        "timestamp": "2026-01-01T00:00:00+00:00",
+        "data": {"hashinal_id": hashinal_id, "recipient": "0.0.1002", "rarity": rarity}
+    }
+
+class HeldExecutor(ThreadPoolExecutor):
+    """Worker threads that only start a job once released"""
+
+    def __init__(self):
+        super().__init__(max_workers=1)
+        self.started, self.released = threading.Event(), threading.Event()
+
+    def submit(self, fn, *args, **kwargs):
+        def held():
+            self.started.set()
+            self.released.wait(5)
+            return fn(*args, **kwargs)
+        return super().submit(held)
+
+@pytest.mark.skipif(msgpack is None, reason="state snapshots need msgpack")
+def test_snapshot_holds_the_state_as_of_the_save_while_events_keep_arriving(tmp_path):
+    async def main():
+        executor = HeldExecutor()
+        asyncio.get_running_loop().set_default_executor(executor)
+        sdk = TrustMeshSDK("0.0.1001", transport=InMemoryTransport(), snapshot_dir=str(tmp_path))
+        sdk.state.apply(badge("badge-1", "rare"), 1)
+
+        saving = asyncio.ensure_future(sdk.save_snapshot())
+        while not executor.started.is_set():
+            await asyncio.sleep(0.001)
+        for number in range(2, 50):
+            sdk.state.apply(badge(f"badge-{number}", "legendary"), number)
+        executor.released.set()
+        await saving
+
+        restored = TrustMeshSDK("0.0.1001", transport=InMemoryTransport(), snapshot_dir=str(tmp_path))
+        assert restored.load_snapshot()
+        user = restored.state.user("0.0.1002")
+        assert (user.badges, user.badges_by_rarity) == (["badge-1"], {"rare": 1})
+        assert restored.state.events_applied == 1
+    asyncio.run(main())
+
+@pytest.mark.skipif(np is None, reason="bulk scoring needs numpy")
+def test_partial_weight_override_keeps_the_other_weights():
+    sdk = TrustMeshSDK("0.0.1001", transport=InMemoryTransport())
+    sdk.state.apply(badge("badge-1", "legendary"), 1)
+
+    current = sdk.score_all_reputations()
+    retuned = sdk.score_all_reputations(weights={"trust": 0.0})
+    assert list(retuned["badge_score"]) == list(current["badge_score"])
+    assert list(retuned["overall_score"]) == list(current["overall_score"])
+    assert sdk.score_all_reputations(weights={"badges": 0.0})["overall_score"][0] < current["overall_score"][0]
+    with pytest.raises(ValueError):
+        sdk.score_all_reputations(weights={"bagdes": 1.0})
+
+def gift(number, sender, recipient):
+    return {
+        "type": "TRUST_TOKEN_GIVEN",
+        "timestamp": "2026-01-01T00:00:00+00:00",
+        "data": {
+            "transaction_id": f"tx-{number}", "sender": sender, "recipient": recipient,
+            "amount": 1, "trust_type": "professional", "trst_staked": 25.0
+        }
+    }
+
+def trust_rings(sdk):
+    """Two rings with the same gifts; only the first reaches the seed"""
+    for number, ring in enumerate((["0.0.1001", "0.0.1002", "0.0.1003"], ["0.0.2001", "0.0.2002", "0.0.2003"])):
+        for i, sender in enumerate(ring):
+            sdk.state.apply(gift(10 * number + i, sender, ring[(i + 1) % len(ring)]))
+
+@pytest.mark.skipif(np is None, reason="trust propagation needs numpy")
+def test_closed_gift_ring_scores_below_seeded_accounts():
+    async def main(**options):
+        sdk = TrustMeshSDK("0.0.1001", transport=InMemoryTransport(), **options)
+        trust_rings(sdk)
+        await sdk.propagate_trust()
+        honest = await sdk.calculate_reputation("0.0.1002")
+        sybil = await sdk.calculate_reputation("0.0.2002")
+        return honest["overall_score"], sybil["overall_score"]
+
+    honest, sybil = asyncio.run(main())
+    assert sybil < honest
+    honest, sybil = asyncio.run(main(network_weight=0.0))
+    assert sybil == honest
+
+def test_poll_with_default_eligibility_counts_a_reputable_voter():
+    async def main():
+        sdk = TrustMeshSDK("0.0.1002", transport=InMemoryTransport())
+        for number in range(5):
+            sdk.state.apply(gift(number, f"0.0.{3000 + number}", "0.0.1002"))
+            sdk.state.apply(badge(f"badge-{number}", "legendary"))
+        assert (await sdk.calculate_reputation("0.0.1002"))["milestone"]["level"] == "ACTIVE_MEMBER"
+
+        options = [{"option_id": "a", "nominee": "0.0.1003"}, {"option_id": "b", "nominee": "0.0.1004"}]
+        poll_id = await sdk.create_community_poll("Best Dressed", "Vote!", options)
+        await sdk.vote_in_poll(poll_id, "a")
+        return sdk.poll_results(poll_id)
+
+    results = asyncio.run(main())
+    assert results["counts"] == {"a": 1, "b": 0}
+    assert not any(results["rejected"].values())
+
+def test_reassigned_topics_are_routed_to_and_the_given_map_is_left_alone():
+    async def main():
+        transport = InMemoryTransport()
+        given = {"polls": "0.0.POLLS_TOPIC"}
+        sdk = TrustMeshSDK("0.0.1001", transport=transport, topics=given, ingest=True)
+        sdk.topics = {"polls.0": "0.0.6000", "polls.1": "0.0.6001", "polls": "0.0.6000"}
+        await sdk.create_community_poll("Best Dressed", "Vote!", [{"option_id": "a"}])
+
+        assert given == {"polls": "0.0.POLLS_TOPIC"}
+        assert sdk.shards.shard_count("polls") == 2
+        assert sdk.ingestion.topic_ids() == ["0.0.6000", "0.0.6001"]
+        assert set(transport.logs) <= {"0.0.6000", "0.0.6001"} and transport.logs
+
+        sdk.shards.apply({"stream": "polls", "topics": ["0.0.6000", "0.0.6001", "0.0.6002"]})
+        assert sdk.topics["polls.2"] == "0.0.6002" and "polls.2" not in given
+    asyncio.run(main())
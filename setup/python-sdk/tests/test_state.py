@@ -0,0 +1,146 @@
+"""Revoked and expired trust tokens stop counting towards reputation"""
+
+import time
+
+import pytest
+
+from trustmesh_models import epoch_seconds
+from trustmesh_sharding import ShardRegistry
+from trustmesh_state import TrustMeshState
+
+SECOND = 1_000_000_000
+# 2026-01-01T00:00:00+00:00
+GIVEN = 1_767_225_600 * SECOND
+
+def give(state, transaction_id, expires_at=None, consensus_timestamp=GIVEN):
+    state.apply({
+        "type": "TRUST_TOKEN_GIVEN",
+        "timestamp": "2026-01-01T00:00:00+00:00",
+        "data": {
+            "transaction_id": transaction_id, "sender": "0.0.1001", "recipient": "0.0.1002",
+            "amount": 1, "trust_type": "community", "trst_staked": 20.0,
+            "transaction_hash": f"hash-{transaction_id}", "expires_at": expires_at
+        }
+    }, consensus_timestamp)
+
+def revoke(state, transaction_id, sender, consensus_timestamp):
+    state.apply({
+        "type": "TRUST_TOKEN_REVOKED",
+        "timestamp": "2026-01-01T00:10:00+00:00",
+        "data": {"transaction_id": transaction_id, "sender": sender, "recipient": "0.0.1002"}
+    }, consensus_timestamp)
+
+def tokens_received(state, consensus_timestamp):
+    trust_data, _, _ = state.history.inputs_at(state.interner.key("0.0.1002"), consensus_timestamp)
+    return trust_data["tokens_received"]
+
+def test_only_the_sender_can_revoke():
+    state = TrustMeshState()
+    give(state, "tx-1")
+
+    with pytest.raises(ValueError):
+        revoke(state, "tx-1", "0.0.1003", GIVEN + SECOND)
+
+    assert state.circle.sender("tx-1") == "0.0.1001"
+    assert state.trust_data("0.0.1002")["tokens_received"] == 1
+
+def test_revoked_token_stops_counting_from_its_revocation():
+    state = TrustMeshState()
+    give(state, "tx-1")
+    revoke(state, "tx-1", "0.0.1001", GIVEN + 10 * SECOND)
+
+    assert state.trust_data("0.0.1002")["tokens_received"] == 0
+    assert state.trust_data("0.0.1002")["trst_backing"] == 0.0
+    assert state.ledger.balance("0.0.1002") == 1
+    assert tokens_received(state, GIVEN + 5 * SECOND) == 1
+    assert tokens_received(state, GIVEN + 20 * SECOND) == 0
+
+def test_expired_token_stops_counting_by_consensus_time():
+    state = TrustMeshState()
+    give(state, "tx-1", expires_at="2026-01-01T00:01:00+00:00")
+    assert state.trust_data("0.0.1002")["tokens_received"] == 1
+
+    # Any later event moves consensus time past the expiry
+    state.apply({
+        "type": "PROFILE_CREATE",
+        "timestamp": "2026-01-01T00:02:00+00:00",
+        "data": {"profile_id": "0.0.1003", "updated_at": "2026-01-01T00:02:00+00:00"}
+    }, GIVEN + 120 * SECOND)
+
+    assert state.trust_data("0.0.1002")["tokens_received"] == 0
+    assert tokens_received(state, GIVEN + 30 * SECOND) == 1
+    assert tokens_received(state, GIVEN + 90 * SECOND) == 0
+
+    # Revoking it afterwards changes nothing
+    revoke(state, "tx-1", "0.0.1001", GIVEN + 180 * SECOND)
+    assert tokens_received(state, GIVEN + 30 * SECOND) == 1
+    assert state.trust_data("0.0.1002")["tokens_received"] == 0
+
+def test_gift_past_the_circle_of_trust_never_counts():
+    state = TrustMeshState(circle_size=3)
+    for number in range(4):
+        give(state, f"tx-{number}")
+
+    assert state.ledger.balance("0.0.1002") == 4
+    assert state.trust_data("0.0.1002")["tokens_received"] == 3
+    assert state.trust_data("0.0.1002")["trst_backing"] == 60.0
+    assert tokens_received(state, GIVEN + SECOND) == 3
+    assert state.circle.live("0.0.1001") == 3 and state.circle.sender("tx-3") is None
+
+    # A revocation frees a slot for the next gift
+    revoke(state, "tx-0", "0.0.1001", GIVEN + 10 * SECOND)
+    revoke(state, "tx-3", "0.0.1001", GIVEN + 11 * SECOND)
+    give(state, "tx-4", consensus_timestamp=GIVEN + 12 * SECOND)
+    assert state.trust_data("0.0.1002")["tokens_received"] == 3
+    assert tokens_received(state, GIVEN + 11 * SECOND) == 2
+    assert tokens_received(state, GIVEN + 13 * SECOND) == 3
+
+def test_naive_timestamps_are_read_as_utc(monkeypatch):
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    try:
+        assert epoch_seconds("2026-01-01T00:01:00") == epoch_seconds("2026-01-01T00:01:00+00:00")
+        assert epoch_seconds(None) is None
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+
+def test_circle_of_trust_is_judged_alike_whatever_order_shards_are_read_in():
+    registry = ShardRegistry({"trust_tokens.0": "0.0.5010", "trust_tokens.1": "0.0.5011"})
+    sender = "0.0.1001"
+    other = next(
+        f"0.0.{number}" for number in range(1100, 1200)
+        if registry.topic_for("trust_tokens", f"0.0.{number}") != registry.topic_for("trust_tokens", sender)
+    )
+
+    def token(transaction_id, sender, expires_at=None):
+        return {
+            "type": "TRUST_TOKEN_GIVEN",
+            "timestamp": "2026-01-01T00:00:00+00:00",
+            "data": {
+                "transaction_id": transaction_id, "sender": sender, "recipient": "0.0.1002",
+                "amount": 1, "trust_type": "community", "trst_staked": 20.0,
+                "transaction_hash": f"hash-{transaction_id}", "expires_at": expires_at
+            }
+        }
+
+    # The sender's shard: the first token expires at 10s, so the third (at
+    # 5s) is past a circle of two; another sender's shard reaches 20s
+    senders_shard = [
+        (token("tx-1", sender, "2026-01-01T00:00:10+00:00"), GIVEN + SECOND),
+        (token("tx-2", sender), GIVEN + 2 * SECOND),
+        (token("tx-3", sender), GIVEN + 5 * SECOND)
+    ]
+    others_shard = [(token("tx-4", other), GIVEN + 20 * SECOND)]
+
+    in_turn = TrustMeshState(circle_size=2)
+    for event, consensus_timestamp in senders_shard + others_shard:
+        in_turn.apply(event, consensus_timestamp)
+    interleaved = TrustMeshState(circle_size=2)
+    for event, consensus_timestamp in senders_shard[:2] + others_shard + senders_shard[2:]:
+        interleaved.apply(event, consensus_timestamp)
+
+    for state in (in_turn, interleaved):
+        assert "tx-3" not in state.gifts
+        assert state.trust_data("0.0.1002")["tokens_received"] == 2
+        assert tokens_received(state, GIVEN + 6 * SECOND) == 2
@@ -0,0 +1,159 @@
+"""Poll deadlines are judged by consensus time"""
+
+from trustmesh_history import ScoreHistory
+from trustmesh_reputation import ReputationEngine
+from trustmesh_state import TrustMeshState
+
+SECOND = 1_000_000_000
+# 2026-01-01T00:00:00+00:00
+OPENS = 1_767_225_600 * SECOND
+
+def create_poll(state, minimum_trust_score=0.0):
+    state.apply({
+        "type": "COMMUNITY_POLL_CREATED",
+        "timestamp": "2026-01-01T00:00:00+00:00",
+        "data": {
+            "poll_id": "poll-1",
+            "options": [{"option_id": "a"}, {"option_id": "b"}],
+            "timeline": {
+                "voting_opens": "2026-01-01T00:00:00+00:00",
+                "voting_closes": "2026-01-01T01:00:00+00:00"
+            },
+            "eligibility": {"minimum_trust_score": minimum_trust_score}
+        }
+    }, OPENS)
+
+def vote(state, voter, option_id, consensus_timestamp, timestamp="2026-01-01T00:30:00+00:00"):
+    state.apply({
+        "type": "POLL_VOTE_CAST",
+        "timestamp": timestamp,
+        "data": {
+            "poll_id": "poll-1", "vote_id": f"vote-{voter}", "voter": voter,
+            "selected_option": option_id, "vote_weight": 1.0, "timestamp": timestamp
+        }
+    }, consensus_timestamp)
+
+def test_backdated_ballot_after_deadline_is_refused():
+    state = TrustMeshState()
+    create_poll(state)
+    vote(state, "0.0.1001", "a", OPENS + 30 * 60 * SECOND)
+    vote(state, "0.0.1002", "b", OPENS + 2 * 3600 * SECOND, timestamp="2026-01-01T00:59:00+00:00")
+
+    results = state.poll_results("poll-1")
+    assert results["counts"] == {"a": 1, "b": 0}
+    assert results["rejected"]["closed"] == 1
+
+def test_local_close_keeps_ballots_that_reached_consensus_in_time():
+    state = TrustMeshState()
+    create_poll(state)
+    state.tallies.close("poll-1")
+    vote(state, "0.0.1001", "a", OPENS + 59 * 60 * SECOND)
+
+    assert state.poll_results("poll-1")["counts"] == {"a": 1, "b": 0}
+
+def test_poll_closed_message_refuses_later_ballots():
+    state = TrustMeshState()
+    create_poll(state)
+    state.apply({"type": "POLL_CLOSED", "data": {"poll_id": "poll-1"}}, OPENS + 10 * 60 * SECOND)
+    vote(state, "0.0.1001", "a", OPENS + 20 * 60 * SECOND)
+
+    assert state.poll_results("poll-1")["counts"] == {"a": 0, "b": 0}
+
+def gift(sender, recipient, consensus_timestamp):
+    return ({
+        "type": "TRUST_TOKEN_GIVEN",
+        "timestamp": "2026-01-01T00:00:00+00:00",
+        "data": {
+            "transaction_id": f"tx-{sender}-{recipient}", "sender": sender, "recipient": recipient,
+            "amount": 1, "trust_type": "professional", "transaction_hash": f"hash-{sender}-{recipient}"
+        }
+    }, consensus_timestamp)
+
+def ballot(voter, option_id, consensus_timestamp, claimed_score=99.0):
+    return ({
+        "type": "POLL_VOTE_CAST",
+        "timestamp": "2026-01-01T00:30:00+00:00",
+        "data": {
+            "poll_id": "poll-1", "vote_id": f"vote-{voter}", "voter": voter, "selected_option": option_id,
+            "vote_weight": 1.0, "voter_profile": {"trust_score": claimed_score}
+        }
+    }, consensus_timestamp)
+
+def gated_poll_events():
+    """Voter 0.0.2001 is trusted before voting, 0.0.2002 only afterwards and
+    0.0.2003 never (but claims a score of 99)"""
+    vote_time = OPENS + 30 * 60 * SECOND
+    events = [gift(f"0.0.{3000 + i}", "0.0.2001", vote_time - (i + 1) * SECOND) for i in range(5)]
+    events += [gift(f"0.0.{3000 + i}", "0.0.2002", vote_time + (i + 1) * SECOND) for i in range(5)]
+    events += [
+        ballot("0.0.2001", "a", vote_time),
+        ballot("0.0.2002", "b", vote_time + 100),
+        ballot("0.0.2003", "b", vote_time + 200)
+    ]
+    return events
+
+def tally_in_order(events):
+    state = TrustMeshState()
+    ReputationEngine(state)
+    create_poll(state, minimum_trust_score=5.0)
+    for event, consensus_timestamp in events:
+        state.apply(event, consensus_timestamp)
+    return state.poll_results("poll-1")
+
+def test_eligibility_depends_on_consensus_order_not_ingestion_order():
+    events = gated_poll_events()
+    in_consensus_order = tally_in_order(sorted(events, key=lambda item: item[1]))
+    votes_first = tally_in_order(sorted(events, key=lambda item: item[0]["type"] != "POLL_VOTE_CAST"))
+    gifts_first = tally_in_order(sorted(events, key=lambda item: item[0]["type"] == "POLL_VOTE_CAST"))
+
+    assert in_consensus_order["counts"] == {"a": 1, "b": 0}
+    assert in_consensus_order["rejected"]["ineligible"] == 2
+    assert votes_first == in_consensus_order
+    assert gifts_first == in_consensus_order
+
+def test_reported_trust_score_is_ignored_without_a_scorer():
+    state = TrustMeshState()
+    create_poll(state, minimum_trust_score=10.0)
+    state.apply(*ballot("0.0.2003", "a", OPENS + SECOND))
+
+    assert state.poll_results("poll-1")["counts"] == {"a": 0, "b": 0}
+
+def test_score_history_sums_out_of_order_changes_and_keeps_them_after_compaction():
+    history = ScoreHistory()
+    for offset in (3, 1, 2):
+        history.add_received(0, OPENS + offset * SECOND, 1, 5.0, 20.0)
+        history.add_badge(0, OPENS + offset * SECOND, "rare" if offset == 1 else "legendary")
+        history.add_activity(0, OPENS + offset * SECOND)
+    later = history.inputs_at(0, OPENS + 4 * SECOND)
+
+    trust_data, badge_data, activity = history.inputs_at(0, OPENS + 3 * SECOND)
+    assert trust_data["tokens_received"] == 2
+    assert badge_data == {"total_badges": 2, "rare_badges": 1, "legendary_badges": 1}
+    assert activity == 2
+
+    assert history.compact(OPENS + 3 * SECOND) == 3
+    assert history.inputs_at(0, OPENS + 4 * SECOND) == later
+    assert history.inputs_at(0, OPENS + 3 * SECOND) == (trust_data, badge_data, activity)
+
+def test_history_is_compacted_no_further_than_open_polls_with_a_minimum():
+    state = TrustMeshState()
+    ReputationEngine(state)
+    for i in range(5):
+        state.apply(*gift(f"0.0.{3000 + i}", "0.0.2001", OPENS - (i + 1) * SECOND))
+    create_poll(state, minimum_trust_score=5.0)
+    state.apply(*gift("0.0.3009", "0.0.2001", OPENS + SECOND))
+    state.apply(*ballot("0.0.2001", "a", OPENS + 60 * SECOND))
+    voter = state.interner.key("0.0.2001")
+    after_opening = state.history.inputs_at(voter, OPENS + 2 * SECOND)
+
+    assert state.compact_history(OPENS + 3600 * SECOND) == 4
+    assert state.history.inputs_at(voter, OPENS + 2 * SECOND) == after_opening
+    assert state.poll_results("poll-1")["counts"] == {"a": 1, "b": 0}
+
+    # Once the poll closes its ballots are final and history folds past them
+    state.tallies.close("poll-1")
+    assert state.compact_history(OPENS + 3600 * SECOND) == 1
+    state.apply(*ballot("0.0.2002", "b", OPENS + 120 * SECOND))
+    results = state.poll_results("poll-1")
+    assert results["counts"] == {"a": 1, "b": 0}
+    assert results["rejected"]["closed"] == 1
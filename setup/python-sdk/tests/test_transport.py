@@ -0,0 +1,57 @@
+"""The in-memory transport orders messages like the consensus service"""
+
+import asyncio
+
+import pytest
+
+from trustmesh_transport import HCSTransport, InMemoryTransport
+
+def test_incomplete_transport_cannot_be_created():
+    class SubmitOnly(HCSTransport):
+        async def submit(self, topic_id, payload):
+            pass
+
+    with pytest.raises(TypeError):
+        SubmitOnly()
+
+def test_messages_get_ordered_timestamps_and_sequence_numbers():
+    async def main():
+        transport = InMemoryTransport(consensus_latency_seconds=0.001)
+        topic_id = await transport.create_topic("TrustMesh User Profiles (HCS-11)")
+        futures = [await transport.submit(topic_id, bytes([number])) for number in range(3)]
+        receipts = await asyncio.gather(*futures)
+
+        assert [receipt.topicSequenceNumber for receipt in receipts] == [1, 2, 3]
+        timestamps = [receipt.consensusTimestamp for receipt in receipts]
+        assert timestamps == sorted(set(timestamps))
+
+        history = [message async for message in transport.history(topic_id, start_after=timestamps[0])]
+        assert [message.contents for message in history] == [b"\x01", b"\x02"]
+    asyncio.run(main())
+
+def test_subscription_replays_then_follows_the_topic():
+    async def main():
+        transport = InMemoryTransport()
+        topic_id = await transport.create_topic("TrustMesh Community Polls (HCS-8)")
+        await transport.submit(topic_id, b"before")
+
+        seen = []
+
+        async def follow():
+            async for message in transport.subscribe(topic_id):
+                seen.append(message.contents)
+                if len(seen) == 2:
+                    return
+
+        reader = asyncio.ensure_future(follow())
+        await asyncio.sleep(0)
+        await transport.submit(topic_id, b"after")
+        await asyncio.wait_for(reader, 1)
+        assert seen == [b"before", b"after"]
+    asyncio.run(main())
+
+def test_unknown_topic_is_refused_without_auto_create():
+    async def main():
+        with pytest.raises(ValueError):
+            await InMemoryTransport(auto_create_topics=False).submit("0.0.404", b"{}")
+    asyncio.run(main())
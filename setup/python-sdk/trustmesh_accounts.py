@@ -0,0 +1,67 @@
+"""
+TrustMesh Account Interning
+===========================
+
+Maps shard.realm.num account IDs to dense integer keys (0, 1, 2, ... in
+order of first appearance). The state projection owns one interner and
+shares it with the ledger, graph, circle of trust and poll tallies, so
+every index keyed by an account uses the same integer, arrays can be
+indexed by it directly and joins across components are integer
+operations. Account ID strings are looked up on the way in and translated
+back only when results leave the state layer. The interner is saved with
+the state snapshot; keys are never reused or reassigned.
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+class AccountInterner:
+    """Dense integer keys for account IDs"""
+
+    def __init__(self, account_ids: Iterable[str] = ()):
+        self.account_ids: List[str] = []
+        self._keys: Dict[str, int] = {}
+        # Times the keys were replaced by restore(); anything indexed by
+        # the old keys is stale once it changes
+        self.restores = 0
+        for account_id in account_ids:
+            self.intern(account_id)
+
+    def intern(self, account_id: str) -> int:
+        """Key of an account, assigning the next one if it is new"""
+        key = self._keys.get(account_id)
+        if key is None:
+            key = self._keys[account_id] = len(self.account_ids)
+            self.account_ids.append(account_id)
+        return key
+
+    def key(self, account_id: str) -> Optional[int]:
+        """Key of a known account (None if it was never interned)"""
+        return self._keys.get(account_id)
+
+    def account_id(self, key: int) -> str:
+        """Account ID of a key"""
+        return self.account_ids[key]
+
+    def translate(self, keys: Iterable[int]) -> List[str]:
+        """Account IDs of many keys"""
+        account_ids = self.account_ids
+        return [account_ids[key] for key in keys]
+
+    def snapshot(self) -> List[str]:
+        """Account IDs in key order"""
+        return list(self.account_ids)
+
+    def restore(self, account_ids: Iterable[str]):
+        """Replace the keys with a snapshot's, in place so every component
+        sharing the interner sees them"""
+        self.account_ids[:] = []
+        self._keys.clear()
+        for account_id in account_ids:
+            self.intern(account_id)
+        self.restores += 1
+
+    def __len__(self) -> int:
+        return len(self.account_ids)
+
+    def __contains__(self, account_id: str) -> bool:
+        return account_id in self._keys
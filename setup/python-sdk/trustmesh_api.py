@@ -12,20 +12,27 @@ Quick Start:
 Endpoints:
     POST /profiles - Create user profile
     POST /trust-tokens - Give trust token
+    GET /trust-tokens/{user_id} - Trust token balance and totals
+    DELETE /trust-tokens/{transaction_id} - Revoke trust token
+    GET /trust-graph/{user_id} - Trust graph neighborhood
+    POST /trust-graph/propagate - Recompute transitive trust
     POST /badges - Create recognition badge
-    GET /reputation/{user_id} - Calculate reputation
+    GET /reputation/{user_id} - Get reputation
+    POST /reputation/{user_id}/publish - Publish reputation to HCS
     POST /polls - Create community poll
+    GET /polls/{poll_id} - Live poll results
     POST /polls/{poll_id}/vote - Vote in poll
     GET /demo/setup - Set up demo data
 """
 
 import asyncio
 import json
+import os
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, Header
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse
 from pydantic import BaseModel, Field
@@ -36,6 +43,8 @@ from trustmesh_sdk import (
     TrustMeshSDK, TrustType, BadgeType, BadgeRarity,
     DemoDataGenerator
 )
+from trustmesh_idempotency import IdempotencyError
+from trustmesh_transport import InMemoryTransport
 
 # Pydantic models for API requests/responses
 class CreateProfileRequest(BaseModel):
@@ -48,6 +57,7 @@ class GiveTrustTokenRequest(BaseModel):
     relationship: str = Field(..., example="colleague")
     context: str = Field("", example="Great collaboration on project")
     trst_staked: float = Field(0.0, example=25.0)
+    expires_at: Optional[str] = Field(None, example="2026-12-31T00:00:00+00:00")
 
 class CreateBadgeRequest(BaseModel):
     recipient: str = Field(..., example="0.0.67890")
@@ -69,6 +79,7 @@ class CreatePollRequest(BaseModel):
     description: str = Field(..., example="Vote for the most stylish member!")
     options: List[PollOption]
     voting_duration_hours: int = Field(168, example=24)
+    minimum_trust_score: float = Field(0.0, example=10.0)
 
 class VoteRequest(BaseModel):
     option_id: str = Field(..., example="option_1")
@@ -94,12 +105,23 @@ async def lifespan(app: FastAPI):
     """Initialize SDK on startup"""
     global sdk
     
-    # Initialize with demo credentials (replace with your actual credentials)
-    sdk = TrustMeshSDK(
-        account_id="0.0.YOUR_ACCOUNT",  # Replace with your account
-        private_key="your_private_key_here",  # Replace with your key
-        network="testnet"
-    )
+    # TRUSTMESH_TRANSPORT=memory runs against an in-process fake HCS
+    if os.getenv("TRUSTMESH_TRANSPORT") == "memory":
+        sdk = TrustMeshSDK(account_id="0.0.1001", transport=InMemoryTransport(), ingest=True)
+        await sdk.create_topics()
+    else:
+        # TRUSTMESH_SNAPSHOT_DIR follows the topics, restarting from the
+        # newest snapshot instead of replaying every topic
+        snapshot_dir = os.getenv("TRUSTMESH_SNAPSHOT_DIR")
+        # Initialize with demo credentials (replace with your actual credentials)
+        sdk = TrustMeshSDK(
+            account_id="0.0.YOUR_ACCOUNT",  # Replace with your account
+            private_key="your_private_key_here",  # Replace with your key
+            network="testnet",
+            ingest=snapshot_dir is not None,
+            snapshot_dir=snapshot_dir
+        )
+    await sdk.start()
     
     print("🚀 TrustMesh API initialized!")
     yield
@@ -107,6 +129,8 @@ async def lifespan(app: FastAPI):
     # Cleanup
     if sdk:
         print("👋 TrustMesh API shutting down...")
+        await sdk.flush()
+        await sdk.close()
 
 # FastAPI app
 app = FastAPI(
@@ -257,7 +281,8 @@ async def create_profile(
 @app.post("/trust-tokens", response_model=APIResponse)
 async def give_trust_token(
     request: GiveTrustTokenRequest,
-    sdk_instance: TrustMeshSDK = Depends(get_sdk)
+    sdk_instance: TrustMeshSDK = Depends(get_sdk),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
     """Give a trust token to another user"""
     try:
@@ -266,7 +291,9 @@ async def give_trust_token(
             trust_type=request.trust_type,
             relationship=request.relationship,
             context=request.context,
-            trst_staked=request.trst_staked
+            trst_staked=request.trst_staked,
+            expires_at=request.expires_at,
+            idempotency_key=idempotency_key
         )
         
         return APIResponse(
@@ -280,13 +307,83 @@ async def give_trust_token(
             }
         )
         
+    except IdempotencyError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.get("/trust-tokens/{user_id}", response_model=APIResponse)
+async def get_trust_ledger(
+    user_id: str,
+    sdk_instance: TrustMeshSDK = Depends(get_sdk)
+):
+    """Get a user's trust token balance, totals and per-type breakdown"""
+    summary = sdk_instance.ledger.summary(user_id)
+    summary["circle_of_trust"] = {
+        "size": sdk_instance.circle.size,
+        "live": sdk_instance.circle.live(user_id),
+        "available": sdk_instance.circle.available(user_id)
+    }
+    return APIResponse(
+        message=f"Trust ledger for {user_id}",
+        data=summary
+    )
+
+@app.delete("/trust-tokens/{transaction_id}", response_model=APIResponse)
+async def revoke_trust_token(
+    transaction_id: str,
+    reason: str = "",
+    sdk_instance: TrustMeshSDK = Depends(get_sdk)
+):
+    """Revoke a trust token, freeing a circle-of-trust slot"""
+    try:
+        await sdk_instance.revoke_trust_token(transaction_id, reason)
+        return APIResponse(
+            message=f"Trust token {transaction_id} revoked",
+            data={"transaction_id": transaction_id}
+        )
+        
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@app.get("/trust-graph/{user_id}", response_model=APIResponse)
+async def get_trust_neighbors(
+    user_id: str,
+    sdk_instance: TrustMeshSDK = Depends(get_sdk)
+):
+    """Get the accounts a user trusts and the accounts trusting them"""
+    graph = sdk_instance.state.graph
+    if graph is None:
+        raise HTTPException(status_code=501, detail="Trust graph needs numpy")
+    return APIResponse(
+        message=f"Trust graph neighborhood of {user_id}",
+        data={
+            "trusts": graph.neighbors(user_id, "out"),
+            "trusted_by": graph.neighbors(user_id, "in"),
+            "tokens_given": graph.out_degree(user_id),
+            "tokens_received": graph.in_degree(user_id)
+        }
+    )
+
+@app.post("/trust-graph/propagate", response_model=APIResponse)
+async def propagate_trust(
+    seeds: Optional[List[str]] = None,
+    sdk_instance: TrustMeshSDK = Depends(get_sdk)
+):
+    """Recompute transitive trust from the given pre-trusted seed accounts"""
+    if sdk_instance.state.graph is None:
+        raise HTTPException(status_code=501, detail="Trust propagation needs numpy")
+    stats = await sdk_instance.propagate_trust(seeds)
+    return APIResponse(
+        message=f"Trust propagated in {stats['iterations']} iterations",
+        data=stats
+    )
+
 @app.post("/badges", response_model=APIResponse)
 async def create_badge(
     request: CreateBadgeRequest,
-    sdk_instance: TrustMeshSDK = Depends(get_sdk)
+    sdk_instance: TrustMeshSDK = Depends(get_sdk),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
     """Create and issue a recognition badge"""
     try:
@@ -297,7 +394,8 @@ async def create_badge(
             badge_type=request.badge_type,
             category=request.category,
             rarity=request.rarity,
-            issuance_context=request.issuance_context
+            issuance_context=request.issuance_context,
+            idempotency_key=idempotency_key
         )
         
         return APIResponse(
@@ -312,6 +410,8 @@ async def create_badge(
             }
         )
         
+    except IdempotencyError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -320,7 +420,7 @@ async def get_reputation(
     user_id: str,
     sdk_instance: TrustMeshSDK = Depends(get_sdk)
 ):
-    """Calculate user's reputation score"""
+    """Get user's current reputation score"""
     try:
         reputation_data = await sdk_instance.calculate_reputation(user_id)
         
@@ -329,10 +429,29 @@ async def get_reputation(
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.post("/reputation/{user_id}/publish", response_model=APIResponse)
+async def publish_reputation(
+    user_id: str,
+    force: bool = False,
+    sdk_instance: TrustMeshSDK = Depends(get_sdk)
+):
+    """Publish user's reputation score to the reputation topic (rate limited)"""
+    try:
+        reputation_data = await sdk_instance.publish_reputation(user_id, force=force)
+        
+        return APIResponse(
+            message="Reputation published" if reputation_data else "Reputation recently published; skipped",
+            data={"published": reputation_data is not None, "reputation": reputation_data}
+        )
+        
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.post("/polls", response_model=APIResponse)
 async def create_poll(
     request: CreatePollRequest,
-    sdk_instance: TrustMeshSDK = Depends(get_sdk)
+    sdk_instance: TrustMeshSDK = Depends(get_sdk),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
     """Create a community poll"""
     try:
@@ -343,7 +462,9 @@ async def create_poll(
             title=request.title,
             description=request.description,
             options=options,
-            voting_duration_hours=request.voting_duration_hours
+            voting_duration_hours=request.voting_duration_hours,
+            minimum_trust_score=request.minimum_trust_score,
+            idempotency_key=idempotency_key
         )
         
         return APIResponse(
@@ -357,18 +478,37 @@ async def create_poll(
             }
         )
         
+    except IdempotencyError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.get("/polls/{poll_id}", response_model=APIResponse)
+async def get_poll_results(
+    poll_id: str,
+    sdk_instance: TrustMeshSDK = Depends(get_sdk)
+):
+    """Get a poll's live results"""
+    results = sdk_instance.poll_results(poll_id)
+    if results is None:
+        raise HTTPException(status_code=404, detail=f"Unknown poll: {poll_id}")
+    return APIResponse(
+        message=f"Results of poll {poll_id}",
+        data=results
+    )
+
 @app.post("/polls/{poll_id}/vote", response_model=APIResponse)
 async def vote_in_poll(
     poll_id: str,
     request: VoteRequest,
-    sdk_instance: TrustMeshSDK = Depends(get_sdk)
+    sdk_instance: TrustMeshSDK = Depends(get_sdk),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
     """Vote in a community poll"""
     try:
-        vote_id = await sdk_instance.vote_in_poll(poll_id, request.option_id)
+        vote_id = await sdk_instance.vote_in_poll(
+            poll_id, request.option_id, idempotency_key=idempotency_key
+        )
         
         return APIResponse(
             success=True,
@@ -380,6 +520,8 @@ async def vote_in_poll(
             }
         )
         
+    except IdempotencyError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -555,6 +697,27 @@ async def health_check():
         "version": "1.0.0"
     }
 
+@app.get("/health/submissions")
+async def submission_health(sdk_instance: TrustMeshSDK = Depends(get_sdk)):
+    """Submission pipeline state: transport (clients, rate limiter buckets) and outbox backlog"""
+    return {
+        "in_flight_confirmations": len(sdk_instance.pending_confirmations),
+        "transport": sdk_instance.transport.stats(),
+        "outbox": await sdk_instance.outbox.stats() if sdk_instance.outbox else None
+    }
+
+@app.get("/health/cache")
+async def cache_health(sdk_instance: TrustMeshSDK = Depends(get_sdk)):
+    """Reputation cache hit, miss and eviction counters"""
+    return sdk_instance.reputation_cache.stats()
+
+@app.get("/health/ingestion")
+async def ingestion_health(sdk_instance: TrustMeshSDK = Depends(get_sdk)):
+    """Topic ingestion state: per-topic cursors, events applied and errors"""
+    if not sdk_instance.ingestion:
+        return {"running": False}
+    return sdk_instance.ingestion.stats()
+
 if __name__ == "__main__":
     print("🚀 Starting TrustMesh API Server...")
     print("📊 API Documentation: http://localhost:8000/docs")
@@ -0,0 +1,186 @@
+"""
+TrustMesh Envelope Batching
+===========================
+
+Opt-in batching layer for the TrustMesh SDK. Events bound for the same HCS
+topic are gathered for a short linger window (or until a byte budget is hit)
+and submitted as a single multi-event envelope:
+
+    {
+        "type": "EVENT_BATCH",
+        "timestamp": "...",
+        "data": {"count": 3, "events": [<envelope>, <envelope>, <envelope>]},
+        "hcs_standard": "TRUSTMESH-BATCH"
+    }
+
+Consumers call unpack_envelope() on every message they read to get back the
+individual {"type", "timestamp", "data", "hcs_standard"} events.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from trustmesh_codec import FRAME_HEADER_BYTES, HCS_MAX_MESSAGE_BYTES, WIRE_FORMATS, encoded_size
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+BATCH_MESSAGE_TYPE = "EVENT_BATCH"
+
+# A full batch still fits one HCS message, framed or not
+DEFAULT_MAX_BATCH_BYTES = HCS_MAX_MESSAGE_BYTES - FRAME_HEADER_BYTES
+
+def pack_envelopes(events: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Wrap several event envelopes into one batch envelope"""
+    return {
+        "type": BATCH_MESSAGE_TYPE,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "data": {"count": len(events), "events": events},
+        "hcs_standard": "TRUSTMESH-BATCH"
+    }
+
+def _envelope_bytes(wire_format: str) -> int:
+    """Bytes of a batch envelope around its events: fixed fields plus room
+    for the event count to grow (up to three JSON digits, or a 16-bit
+    MessagePack array header)"""
+    return encoded_size(pack_envelopes([]), wire_format) + 2
+
+def unpack_envelope(message: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Split a message read from a topic back into individual events
+
+    Args:
+        message: Decoded HCS message (batched or not)
+
+    Returns:
+        List of event envelopes, in submission order
+    """
+    if message.get("type") == BATCH_MESSAGE_TYPE:
+        return list(message["data"]["events"])
+    return [message]
+
+class _TopicBatch:
+    """Events waiting to be submitted to one topic"""
+
+    def __init__(self):
+        self.events: List[Dict[str, Any]] = []
+        self.futures: List[asyncio.Future] = []
+        self.size = 0
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+class EnvelopeBatcher:
+    """Gathers events per topic and submits them as batch envelopes"""
+
+    def __init__(
+        self,
+        send: Callable[[str, Dict[str, Any]], Awaitable[asyncio.Future]],
+        linger_ms: float = 50.0,
+        max_batch_bytes: int = DEFAULT_MAX_BATCH_BYTES,
+        max_batch_events: int = 100,
+        wire_format: str = "json"
+    ):
+        """Initialize the batcher
+
+        Args:
+            send: Coroutine that submits one envelope to a topic and returns
+                a future for its consensus receipt
+            linger_ms: How long the first event of a batch may wait for others
+            max_batch_bytes: Byte budget for one batch envelope in the wire
+                format, its own fields included
+            max_batch_events: Maximum events per batch envelope
+            wire_format: "json" or "msgpack", what batches are measured in
+        """
+        if wire_format not in WIRE_FORMATS:
+            raise ValueError(f"Unknown wire format: {wire_format}")
+        self._send = send
+        self.linger_ms = linger_ms
+        self.max_batch_bytes = max_batch_bytes
+        self.max_batch_events = max_batch_events
+        self.wire_format = wire_format
+        self._envelope_bytes = _envelope_bytes(wire_format)
+        # JSON separates events with a comma
+        self._separator_bytes = 1 if wire_format == "json" else 0
+
+        self._batches: Dict[str, _TopicBatch] = {}
+        self._sending: Set[asyncio.Task] = set()
+
+    async def add(self, topic_id: str, message: Dict[str, Any]) -> asyncio.Future:
+        """Queue an event for its topic's next batch
+
+        Args:
+            topic_id: HCS topic the event is bound for
+            message: Event envelope
+
+        Returns:
+            Future resolving to the receipt of the batch carrying the event
+        """
+        size = encoded_size(message, self.wire_format) + self._separator_bytes
+
+        batch = self._batches.get(topic_id)
+        if batch and self._envelope_bytes + batch.size + size > self.max_batch_bytes:
+            self._flush_topic(topic_id)
+            batch = None
+
+        if batch is None:
+            batch = _TopicBatch()
+            batch.timer = asyncio.get_running_loop().call_later(
+                self.linger_ms / 1000, self._flush_topic, topic_id
+            )
+            self._batches[topic_id] = batch
+
+        future = asyncio.get_running_loop().create_future()
+        batch.events.append(message)
+        batch.futures.append(future)
+        batch.size += size
+
+        if (len(batch.events) >= self.max_batch_events
+                or self._envelope_bytes + batch.size >= self.max_batch_bytes):
+            self._flush_topic(topic_id)
+
+        return future
+
+    async def flush(self):
+        """Submit every open batch and wait until all of them have been sent"""
+        for topic_id in list(self._batches):
+            self._flush_topic(topic_id)
+        if self._sending:
+            await asyncio.gather(*self._sending, return_exceptions=True)
+
+    def _flush_topic(self, topic_id: str):
+        """Close a topic's open batch and hand it to a sender task"""
+        batch = self._batches.pop(topic_id, None)
+        if batch is None:
+            return
+        if batch.timer:
+            batch.timer.cancel()
+
+        task = asyncio.ensure_future(self._send_batch(topic_id, batch))
+        self._sending.add(task)
+        task.add_done_callback(self._sending.discard)
+
+    async def _send_batch(self, topic_id: str, batch: _TopicBatch):
+        """Submit a batch and resolve its events' futures with the receipt"""
+        if len(batch.events) == 1:
+            envelope = batch.events[0]
+        else:
+            envelope = pack_envelopes(batch.events)
+
+        try:
+            receipt_future = await self._send(topic_id, envelope)
+            receipt = await receipt_future
+        except asyncio.CancelledError:
+            # Shutting down: waiters learn the events may never be sent
+            for future in batch.futures:
+                future.cancel()
+            raise
+        except Exception as e:
+            logger.error(f"❌ Error submitting batch of {len(batch.events)} events: {e}")
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future in batch.futures:
+            if not future.done():
+                future.set_result(receipt)
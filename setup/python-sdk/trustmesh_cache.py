@@ -0,0 +1,138 @@
+"""
+TrustMesh Read Cache
+====================
+
+Bounded LRU cache with a TTL for hot read paths such as reputation lookups.
+Entries are dropped as soon as an applied event touches their key
+(invalidate()); the TTL is only a safety net. Once an entry outlives its
+TTL it is still served for a short stale window while a refresh runs in the
+background, so readers never wait on a reload of a hot key.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Set
+
+class _Entry:
+    __slots__ = ("value", "expires_at")
+
+    def __init__(self, value: Any, expires_at: float):
+        self.value = value
+        self.expires_at = expires_at
+
+class ReadCache:
+    """LRU/TTL cache with event-driven invalidation and stale-while-revalidate"""
+
+    def __init__(
+        self,
+        max_entries: int = 100_000,
+        ttl_seconds: float = 60.0,
+        stale_seconds: float = 30.0
+    ):
+        """Initialize the cache
+
+        Args:
+            max_entries: Least recently used entries are evicted beyond this
+            ttl_seconds: How long an entry is fresh
+            stale_seconds: How long past its TTL an entry is still served
+                while it is refreshed in the background
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._refreshing: Set[Hashable] = set()
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.refreshes = 0
+
+    def get(self, key: Hashable, load: Callable[[], Any]) -> Any:
+        """Get a cached value, loading it on a miss
+
+        Args:
+            key: Cache key
+            load: Computes the current value for the key
+
+        Returns:
+            The cached (possibly slightly stale) or freshly loaded value;
+            callers must not modify it
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            now = time.monotonic()
+            if now < entry.expires_at:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry.value
+            if now < entry.expires_at + self.stale_seconds:
+                self.stale_hits += 1
+                self._entries.move_to_end(key)
+                self._schedule_refresh(key, load)
+                return entry.value
+
+        self.misses += 1
+        return self._store(key, load())
+
+    def invalidate(self, key: Hashable):
+        """Drop a key because its underlying data changed"""
+        if self._entries.pop(key, None) is not None:
+            self.invalidations += 1
+
+    def invalidate_many(self, keys: Iterable[Hashable]):
+        for key in keys:
+            self.invalidate(key)
+
+    def clear(self):
+        """Drop every entry (e.g. after the scoring weights change)"""
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters, for monitoring"""
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "refreshes": self.refreshes
+        }
+
+    def _store(self, key: Hashable, value: Any) -> Any:
+        self._entries[key] = _Entry(value, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return value
+
+    def _schedule_refresh(self, key: Hashable, load: Callable[[], Any]):
+        """Reload a stale key after the current read, once at a time"""
+        if key in self._refreshing:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._refresh(key, load)
+            return
+        self._refreshing.add(key)
+        loop.call_soon(self._refresh, key, load)
+
+    def _refresh(self, key: Hashable, load: Callable[[], Any]):
+        self._refreshing.discard(key)
+        # Invalidated meanwhile: the next read loads it
+        if key not in self._entries:
+            return
+        self.refreshes += 1
+        self._store(key, load())
@@ -0,0 +1,169 @@
+"""
+TrustMesh Circle of Trust
+=========================
+
+Enforces the 9-token Circle of Trust: an account can have at most
+CIRCLE_OF_TRUST_SIZE live trust tokens out at once. A token stops being
+live when it is revoked (TRUST_TOKEN_REVOKED) or passes its expires_at,
+which frees the slot for a new gift. Live counts are kept per sender so a
+check is constant time; expiries sit in a heap and are drained lazily.
+Senders and recipients are held as AccountInterner keys.
+"""
+
+import heapq
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from trustmesh_accounts import AccountInterner
+from trustmesh_models import epoch_seconds
+
+# Live trust tokens an account may have out at once
+CIRCLE_OF_TRUST_SIZE = 9
+
+class CircleOfTrustFull(Exception):
+    """The sender already has a full circle of live trust tokens"""
+
+class CircleOfTrust:
+    """Per-sender live trust token counters"""
+
+    def __init__(self, size: int = CIRCLE_OF_TRUST_SIZE, interner: Optional[AccountInterner] = None):
+        """Initialize empty counters
+
+        Args:
+            size: Live tokens allowed per sender
+            interner: Account keys shared with the rest of the state (a
+                private one by default)
+        """
+        self.size = size
+        self.interner = interner if interner is not None else AccountInterner()
+        # Sender key -> live tokens
+        self.counts: Dict[int, int] = {}
+        # transaction_id -> (sender, recipient) keys of every live token
+        self._tokens: Dict[str, Tuple[int, int]] = {}
+        # (expires_at epoch seconds, transaction_id)
+        self._expiries: List[Tuple[float, str]] = []
+        self.on_release: Optional[Callable[[str], None]] = None
+
+    def add(
+        self,
+        transaction_id: str,
+        sender: str,
+        expires_at: Optional[str] = None,
+        recipient: str = ""
+    ) -> bool:
+        """Count a live token, whatever the sender's count
+
+        Used for confirmed events, which the state projection has judged
+        against the sender's circle as of their consensus time (another
+        client may have filled it meanwhile). Adding a token twice is a
+        no-op.
+
+        Returns:
+            True if the token was newly counted
+        """
+        if not transaction_id or transaction_id in self._tokens:
+            return False
+        expires = epoch_seconds(expires_at)
+        if expires is not None and expires <= time.time():
+            return False
+        sender_key = self.interner.intern(sender)
+        self._tokens[transaction_id] = (sender_key, self.interner.intern(recipient))
+        self.counts[sender_key] = self.counts.get(sender_key, 0) + 1
+        if expires is not None:
+            heapq.heappush(self._expiries, (expires, transaction_id))
+        return True
+
+    def reserve(
+        self,
+        transaction_id: str,
+        sender: str,
+        expires_at: Optional[str] = None,
+        recipient: str = ""
+    ) -> bool:
+        """Take a slot for a gift about to be submitted
+
+        Returns:
+            True if the slot was taken, False if the circle is full
+        """
+        if self.live(sender) >= self.size:
+            return False
+        self.add(transaction_id, sender, expires_at, recipient)
+        return True
+
+    def release(self, transaction_id: str) -> bool:
+        """Free a token's slot (revoked, expired or never submitted)
+
+        Returns:
+            True if the token was live
+        """
+        token = self._tokens.pop(transaction_id, None)
+        if token is None:
+            return False
+        sender = token[0]
+        remaining = self.counts[sender] - 1
+        if remaining:
+            self.counts[sender] = remaining
+        else:
+            del self.counts[sender]
+        if self.on_release is not None:
+            self.on_release(self.interner.account_id(sender))
+        return True
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Release every token past its expiry
+
+        Returns:
+            Number of tokens released
+        """
+        now = time.time() if now is None else now
+        released = 0
+        while self._expiries and self._expiries[0][0] <= now:
+            _, transaction_id = heapq.heappop(self._expiries)
+            released += self.release(transaction_id)
+        return released
+
+    def live(self, sender: str) -> int:
+        """Live tokens a sender has out"""
+        self.expire()
+        return self.counts.get(self.interner.key(sender), 0)
+
+    def available(self, sender: str) -> int:
+        """Gifts a sender can still make"""
+        return max(self.size - self.live(sender), 0)
+
+    def sender(self, transaction_id: str) -> Optional[str]:
+        """Sender of a live token"""
+        token = self._tokens.get(transaction_id)
+        return self.interner.account_id(token[0]) if token else None
+
+    def recipient(self, transaction_id: str) -> Optional[str]:
+        """Recipient of a live token"""
+        token = self._tokens.get(transaction_id)
+        return self.interner.account_id(token[1]) if token else None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Live tokens (with account keys) and pending expiries as plain data"""
+        return {
+            "tokens": {transaction_id: list(token) for transaction_id, token in self._tokens.items()},
+            "expiries": [
+                [expires, transaction_id] for expires, transaction_id in self._expiries
+                if transaction_id in self._tokens
+            ]
+        }
+
+    def restore(self, snapshot: Dict[str, Any]):
+        """Replace the live tokens with a snapshot's"""
+        self._tokens = {transaction_id: tuple(token) for transaction_id, token in snapshot["tokens"].items()}
+        self.counts = {}
+        for sender, _ in self._tokens.values():
+            self.counts[sender] = self.counts.get(sender, 0) + 1
+        self._expiries = [tuple(entry) for entry in snapshot["expiries"]]
+        heapq.heapify(self._expiries)
+
+    def seconds_until_expiry(self) -> Optional[float]:
+        """Time until the next live token expires, if any will"""
+        while self._expiries and self._expiries[0][1] not in self._tokens:
+            heapq.heappop(self._expiries)
+        if not self._expiries:
+            return None
+        return max(self._expiries[0][0] - time.time(), 0.0)
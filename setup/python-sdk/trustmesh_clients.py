@@ -0,0 +1,154 @@
+"""
+TrustMesh Client Pool
+=====================
+
+Spreads HCS submissions across several operator accounts (and network
+nodes) so throughput is not capped by a single payer account's transaction
+ID space. Clients are picked round-robin or least-loaded; a client that keeps
+failing is taken out of rotation for a cooldown period.
+"""
+
+import itertools
+import time
+from typing import Any, Dict, List, Optional
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+SELECTION_STRATEGIES = ("least_loaded", "round_robin")
+
+class PooledClient:
+    """One operator's Hedera client plus its load and health counters"""
+
+    def __init__(
+        self,
+        client: Any,
+        account_id: str,
+        node_account_ids: Optional[List[Any]] = None
+    ):
+        """Initialize the pooled client
+
+        Args:
+            client: Hedera Client with this operator set
+            account_id: Operator account ID (0.0.xxxxx)
+            node_account_ids: Preferred nodes for this client's transactions
+        """
+        self.client = client
+        self.account_id = account_id
+        self.node_account_ids = node_account_ids
+
+        self.in_flight = 0
+        self.submitted = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.unhealthy_until = 0.0
+        self.last_error = ""
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.unhealthy_until
+
+class ClientPool:
+    """Selects a client per submission and tracks per-client health"""
+
+    def __init__(
+        self,
+        clients: List[PooledClient],
+        strategy: str = "least_loaded",
+        failure_threshold: int = 3,
+        cooldown_seconds: float = 30.0
+    ):
+        """Initialize the pool
+
+        Args:
+            clients: Pooled clients, one per operator account
+            strategy: "least_loaded" or "round_robin"
+            failure_threshold: Consecutive failures before a client is
+                taken out of rotation
+            cooldown_seconds: How long an unhealthy client stays out
+        """
+        if not clients:
+            raise ValueError("ClientPool needs at least one client")
+        if strategy not in SELECTION_STRATEGIES:
+            raise ValueError(f"Unknown client selection strategy: {strategy}")
+
+        self.clients = clients
+        self.strategy = strategy
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._rotation = itertools.cycle(range(len(clients)))
+
+    def acquire(self) -> PooledClient:
+        """Pick a client for the next submission and count it as in flight"""
+        entry = self.select()
+        self.claim(entry)
+        return entry
+
+    def select(self) -> PooledClient:
+        """Pick a client for the next submission without counting it
+
+        Unhealthy clients are skipped unless every client is unhealthy, in
+        which case the one whose cooldown ends first is used.
+        """
+        now = time.monotonic()
+        candidates = [entry for entry in self.clients if entry.healthy(now)]
+        if not candidates:
+            entry = min(self.clients, key=lambda c: c.unhealthy_until)
+        elif self.strategy == "round_robin":
+            entry = None
+            for _ in range(len(self.clients)):
+                candidate = self.clients[next(self._rotation)]
+                if candidate.healthy(now):
+                    entry = candidate
+                    break
+        else:
+            entry = min(candidates, key=lambda c: c.in_flight)
+        return entry
+
+    def claim(self, entry: PooledClient):
+        """Count a selected client as in flight, once its submission starts"""
+        entry.in_flight += 1
+
+    def release(self, entry: PooledClient, error: Optional[Exception] = None):
+        """Return a client after its submission finished
+
+        Args:
+            entry: Client returned by acquire()
+            error: The submission's error, if it failed
+        """
+        entry.in_flight -= 1
+        if error is None:
+            entry.submitted += 1
+            entry.consecutive_failures = 0
+            return
+
+        entry.failures += 1
+        entry.consecutive_failures += 1
+        entry.last_error = str(error)
+        if entry.consecutive_failures >= self.failure_threshold:
+            entry.unhealthy_until = time.monotonic() + self.cooldown_seconds
+            entry.consecutive_failures = 0
+            logger.warning(
+                f"⚠️  Client {entry.account_id} marked unhealthy for {self.cooldown_seconds}s: {error}"
+            )
+
+    def abandon(self, entry: PooledClient):
+        """Return a client whose submission got no verdict on the client -
+        throttled by the network or cancelled - without counting it for or
+        against the client's health"""
+        entry.in_flight -= 1
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per-client load and health, for monitoring"""
+        now = time.monotonic()
+        return [
+            {
+                "account_id": entry.account_id,
+                "healthy": entry.healthy(now),
+                "in_flight": entry.in_flight,
+                "submitted": entry.submitted,
+                "failures": entry.failures,
+                "last_error": entry.last_error
+            }
+            for entry in self.clients
+        ]
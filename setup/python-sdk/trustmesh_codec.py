@@ -0,0 +1,440 @@
+"""
+TrustMesh Wire Codec
+====================
+
+Encodes SDK envelopes into HCS message payloads and back.
+
+Small JSON envelopes are sent as plain UTF-8 JSON, exactly as before;
+compression is opt-in, so by default only envelopes too large for one
+message or encoded as MessagePack change form. Anything else is wrapped
+in a binary frame whose first byte is the frame version:
+
+    Version 1 (JSON body)
+        byte 0      1
+        byte 1      flags: 0x01 zlib-compressed body, 0x02 chunked
+
+    Version 2 (any content type)
+        byte 0      2
+        byte 1      flags, as above
+        byte 2      content type: 0 JSON, 1 MessagePack
+        byte 3      schema version of the compact MessagePack layout
+
+    Chunked frames (either version) continue with
+        8 bytes     chunk set ID
+        uint16      chunk index
+        uint16      chunk count
+
+    rest            body (a slice of the body when chunked)
+
+A consumer can tell plain JSON from frames by the first byte: JSON always
+starts with "{", frames never do. Chunked frames are reassembled with
+ChunkAssembler.
+
+The MessagePack content type stores the known TrustMesh event types
+positionally (no repeated keys), UTC ISO-8601 timestamps as integer epoch
+microseconds and enum fields as small integer codes. Decoding yields exactly
+the envelope the JSON path would have produced.
+"""
+
+import json
+import os
+import struct
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+HCS_MAX_MESSAGE_BYTES = 1024
+
+FRAME_VERSION_1 = 1
+FRAME_VERSION_2 = 2
+FLAG_COMPRESSED = 0x01
+FLAG_CHUNKED = 0x02
+
+CONTENT_JSON = 0
+CONTENT_MSGPACK = 1
+
+WIRE_FORMATS = {"json": CONTENT_JSON, "msgpack": CONTENT_MSGPACK}
+
+SCHEMA_VERSION = 1
+
+_V1_HEADER = struct.Struct(">BB")
+_V2_HEADER = struct.Struct(">BBBB")
+_CHUNK_INFO = struct.Struct(">8sHH")
+
+# Largest unchunked frame header, what a body must leave room for
+FRAME_HEADER_BYTES = _V2_HEADER.size
+
+# Compact layout, schema version 1. Field order is part of the wire format:
+# append new fields (and bump SCHEMA_VERSION) rather than reordering.
+_TS = "timestamp"
+_ENUMS = {
+    "trust_type": ("personal", "professional", "community"),
+    "badge_type": ("achievement", "personality", "skill", "contribution"),
+    "rarity": ("common", "rare", "legendary"),
+}
+
+_MESSAGE_SCHEMAS: Dict[str, Tuple[int, Tuple[Tuple[str, Optional[str]], ...]]] = {
+    "PROFILE_CREATE": (1, (
+        ("profile_id", None), ("display_name", None), ("schema_version", None),
+        ("created_at", _TS), ("updated_at", _TS), ("trust_score", None),
+        ("trust_tokens_given", None), ("trust_tokens_received", None),
+        ("total_trst_staked", None), ("badges_earned", None), ("badge_count", None),
+        ("reputation_breakdown", None), ("connections", None), ("visibility", None),
+        ("allow_trust_requests", None), ("show_trust_score", None),
+    )),
+    "TRUST_TOKEN_GIVEN": (2, (
+        ("transaction_id", None), ("transaction_type", None), ("point_type", None),
+        ("amount", None), ("sender", None), ("recipient", None),
+        ("timestamp", _TS), ("context", None), ("expires_at", _TS),
+        ("trust_type", "trust_type"), ("relationship", None), ("trst_staked", None),
+        ("previous_balance", None), ("new_balance", None),
+        ("transaction_hash", None), ("signature", None),
+    )),
+    "BADGE_ISSUED": (3, (
+        ("hashinal_id", None), ("name", None), ("description", None),
+        ("badge_type", "badge_type"), ("category", None), ("rarity", "rarity"),
+        ("recipient", None), ("issued_by", None), ("issued_at", _TS),
+        ("background_color", None), ("icon_url", None), ("border_style", None),
+        ("points", None), ("level", None), ("achievements", None),
+        ("issuance_context", None),
+    )),
+    "COMMUNITY_POLL_CREATED": (4, (
+        ("poll_id", None), ("title", None), ("description", None),
+        ("poll_type", None), ("options", None), ("timeline", None),
+        ("eligibility", None), ("current_votes", None),
+    )),
+    "POLL_VOTE_CAST": (5, (
+        ("poll_id", None), ("vote_id", None), ("selected_option", None),
+        ("voter", None), ("voter_profile", None), ("vote_weight", None),
+        ("timestamp", _TS),
+    )),
+}
+_SCHEMAS_BY_ID = {
+    schema_id: (message_type, fields)
+    for message_type, (schema_id, fields) in _MESSAGE_SCHEMAS.items()
+}
+
+_BATCH_TYPE = "EVENT_BATCH"
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+def encode_message(
+    message: Dict[str, Any],
+    max_message_bytes: int = HCS_MAX_MESSAGE_BYTES,
+    compress: bool = False,
+    compress_threshold: int = 256,
+    wire_format: str = "json"
+) -> List[bytes]:
+    """Encode an envelope into one or more HCS message payloads
+
+    Args:
+        message: Envelope to encode
+        max_message_bytes: Largest payload a single HCS message may carry
+        compress: Compress the body when that makes it smaller (turns
+            plain JSON envelopes into binary frames)
+        compress_threshold: Minimum body size worth compressing
+        wire_format: "json" or "msgpack"
+
+    Returns:
+        Payloads to submit, in chunk order
+    """
+    content_type = WIRE_FORMATS[wire_format]
+    if content_type == CONTENT_MSGPACK:
+        raw = _pack_msgpack(message)
+        header = _V2_HEADER.pack(FRAME_VERSION_2, 0, CONTENT_MSGPACK, SCHEMA_VERSION)
+    else:
+        raw = json.dumps(message, separators=(",", ":")).encode("utf-8")
+        header = _V1_HEADER.pack(FRAME_VERSION_1, 0)
+
+    body, flags = raw, 0
+    if compress and len(raw) >= compress_threshold:
+        compressed = zlib.compress(raw, 6)
+        if len(compressed) < len(raw):
+            body, flags = compressed, FLAG_COMPRESSED
+
+    if content_type == CONTENT_JSON and not flags and len(raw) <= max_message_bytes:
+        return [raw]
+    if len(header) + len(body) <= max_message_bytes:
+        return [_with_flags(header, flags) + body]
+
+    return _chunk(body, _with_flags(header, flags | FLAG_CHUNKED), max_message_bytes)
+
+def encoded_size(message: Dict[str, Any], wire_format: str = "json") -> int:
+    """Bytes an envelope's body takes in a wire format, before framing,
+    compression or chunking"""
+    if WIRE_FORMATS[wire_format] == CONTENT_MSGPACK:
+        return len(_pack_msgpack(message))
+    return len(json.dumps(message, separators=(",", ":")).encode("utf-8"))
+
+def _with_flags(header: bytes, flags: int) -> bytes:
+    """Return a frame header with its flags byte set"""
+    return header[:1] + bytes((flags,)) + header[2:]
+
+def _chunk(body: bytes, header: bytes, max_message_bytes: int) -> List[bytes]:
+    """Split an encoded body into ordered chunk frames"""
+    slice_size = max_message_bytes - len(header) - _CHUNK_INFO.size
+    if slice_size <= 0:
+        raise ValueError(f"max_message_bytes too small for chunking: {max_message_bytes}")
+
+    total = -(-len(body) // slice_size)
+    if total > 0xFFFF:
+        raise ValueError(f"Message too large to chunk: {len(body)} bytes")
+
+    chunk_id = os.urandom(8)
+    view = memoryview(body)
+    frames = []
+    for index in range(total):
+        chunk_info = _CHUNK_INFO.pack(chunk_id, index, total)
+        frames.append(b"".join((
+            header, chunk_info, view[index * slice_size:(index + 1) * slice_size]
+        )))
+    return frames
+
+class _Frame:
+    """Parsed frame header"""
+
+    def __init__(self, payload: bytes):
+        version = payload[0]
+        if version == FRAME_VERSION_1:
+            _, self.flags = _V1_HEADER.unpack_from(payload)
+            self.content_type, self.schema_version = CONTENT_JSON, SCHEMA_VERSION
+            offset = _V1_HEADER.size
+        elif version == FRAME_VERSION_2:
+            _, self.flags, self.content_type, self.schema_version = _V2_HEADER.unpack_from(payload)
+            offset = _V2_HEADER.size
+        else:
+            raise ValueError(f"Unsupported frame version: {version}")
+
+        if self.content_type not in WIRE_FORMATS.values():
+            raise ValueError(f"Unsupported content type: {self.content_type}")
+        if self.schema_version > SCHEMA_VERSION:
+            raise ValueError(f"Unsupported schema version: {self.schema_version}")
+
+        self.chunk_id = None
+        self.index = self.total = 0
+        if self.flags & FLAG_CHUNKED:
+            self.chunk_id, self.index, self.total = _CHUNK_INFO.unpack_from(payload, offset)
+            offset += _CHUNK_INFO.size
+        self.body_offset = offset
+
+    def decode(self, body: bytes) -> Dict[str, Any]:
+        """Decode a complete frame body into an envelope"""
+        if self.flags & FLAG_COMPRESSED:
+            body = zlib.decompress(body)
+        if self.content_type == CONTENT_MSGPACK:
+            return _unpack_msgpack(body)
+        return json.loads(body)
+
+def decode_message(payload: bytes) -> Dict[str, Any]:
+    """Decode a single, unchunked HCS message payload
+
+    Raises:
+        ValueError: If the payload is a chunk (use ChunkAssembler)
+    """
+    if payload[:1] == b"{":
+        return json.loads(payload)
+
+    frame = _Frame(payload)
+    if frame.flags & FLAG_CHUNKED:
+        raise ValueError("Chunked frame must be decoded with ChunkAssembler")
+    return frame.decode(payload[frame.body_offset:])
+
+class _ChunkSet:
+    """Chunks received so far for one chunked message"""
+
+    def __init__(self, total: int):
+        self.first_seen = time.monotonic()
+        self.parts: List[Optional[bytes]] = [None] * total
+        self.missing = total
+
+class ChunkAssembler:
+    """Reassembles chunked messages read from a topic"""
+
+    def __init__(self, max_pending: int = 1024, timeout_seconds: float = 600.0):
+        """Initialize the assembler
+
+        Args:
+            max_pending: Maximum incomplete chunk sets held at once
+            timeout_seconds: Drop incomplete chunk sets older than this
+        """
+        self.max_pending = max_pending
+        self.timeout_seconds = timeout_seconds
+        self._pending: Dict[bytes, _ChunkSet] = {}
+
+    def feed(self, payload: bytes) -> Optional[Dict[str, Any]]:
+        """Feed one HCS message payload
+
+        Returns:
+            The decoded envelope once complete, None while chunks are missing
+        """
+        if payload[:1] == b"{":
+            return json.loads(payload)
+
+        frame = _Frame(payload)
+        if not frame.flags & FLAG_CHUNKED:
+            return frame.decode(payload[frame.body_offset:])
+        body = self._collect(frame, payload)
+        return None if body is None else frame.decode(body)
+
+    def join(self, payload: bytes) -> Optional[bytes]:
+        """Feed one HCS message payload without decoding it
+
+        Returns:
+            The payload itself if it is not chunked, the reassembled
+            unchunked payload once the last chunk arrives, None while
+            chunks are missing
+        """
+        if len(payload) < 2 or payload[:1] == b"{" or not payload[1] & FLAG_CHUNKED:
+            return payload
+        frame = _Frame(payload)
+        body = self._collect(frame, payload)
+        if body is None:
+            return None
+        header = payload[:frame.body_offset - _CHUNK_INFO.size]
+        return _with_flags(header, frame.flags & ~FLAG_CHUNKED) + body
+
+    def _collect(self, frame: _Frame, payload: bytes) -> Optional[bytes]:
+        """Store a chunk; returns the whole body once every chunk is in
+
+        Raises:
+            ValueError: If the chunk index or count does not fit its chunk set
+        """
+        if frame.index >= frame.total:
+            raise ValueError(f"Chunk index {frame.index} out of range for {frame.total} chunks")
+        chunk_set = self._pending.get(frame.chunk_id)
+        if chunk_set is not None and len(chunk_set.parts) != frame.total:
+            raise ValueError(f"Chunk count {frame.total} does not match the chunk set's {len(chunk_set.parts)}")
+        if chunk_set is None:
+            self._expire()
+            chunk_set = self._pending[frame.chunk_id] = _ChunkSet(frame.total)
+        if chunk_set.parts[frame.index] is None:
+            chunk_set.parts[frame.index] = payload[frame.body_offset:]
+            chunk_set.missing -= 1
+
+        if chunk_set.missing:
+            return None
+        del self._pending[frame.chunk_id]
+        return b"".join(chunk_set.parts)
+
+    def snapshot(self) -> Dict[bytes, List[Optional[bytes]]]:
+        """Chunks received so far of every incomplete chunk set"""
+        return {chunk_id: list(chunk_set.parts) for chunk_id, chunk_set in self._pending.items()}
+
+    def restore(self, snapshot: Dict[bytes, List[Optional[bytes]]]):
+        """Resume incomplete chunk sets from a snapshot"""
+        for chunk_id, parts in snapshot.items():
+            chunk_set = self._pending[chunk_id] = _ChunkSet(len(parts))
+            chunk_set.parts = list(parts)
+            chunk_set.missing = sum(part is None for part in parts)
+
+    def _expire(self):
+        """Drop stale or excess incomplete chunk sets"""
+        cutoff = time.monotonic() - self.timeout_seconds
+        stale = [cid for cid, chunk_set in self._pending.items() if chunk_set.first_seen < cutoff]
+        for chunk_id in stale:
+            del self._pending[chunk_id]
+        while len(self._pending) >= self.max_pending:
+            del self._pending[next(iter(self._pending))]
+
+# Compact MessagePack layout
+
+def _require_msgpack():
+    if msgpack is None:
+        raise ImportError("MessagePack wire format requires msgpack: pip install msgpack")
+
+def _pack_msgpack(message: Dict[str, Any]) -> bytes:
+    """Serialize an envelope with the compact MessagePack layout"""
+    _require_msgpack()
+    return msgpack.packb(_compact_envelope(message), use_bin_type=True)
+
+def _unpack_msgpack(body: bytes) -> Dict[str, Any]:
+    """Deserialize an envelope written by _pack_msgpack"""
+    _require_msgpack()
+    return _expand_envelope(msgpack.unpackb(body, raw=False, strict_map_key=False))
+
+def _compact_envelope(message: Dict[str, Any]) -> Any:
+    """Turn an envelope into its compact form
+
+    Known event types become [schema_id, timestamp, hcs_standard, values];
+    batches become [0, timestamp, hcs_standard, [compact events]]; anything
+    else is kept as a map.
+    """
+    message_type = message.get("type")
+    if message_type == _BATCH_TYPE:
+        events = [_compact_envelope(event) for event in message["data"]["events"]]
+        return [0, _pack_timestamp(message["timestamp"]), message["hcs_standard"], events]
+
+    schema = _MESSAGE_SCHEMAS.get(message_type)
+    if schema is None or set(message) != {"type", "timestamp", "data", "hcs_standard"}:
+        return message
+    schema_id, fields = schema
+    data = message["data"]
+    if len(data) != len(fields) or any(name not in data for name, _ in fields):
+        return message
+
+    values = [_pack_value(data[name], kind) for name, kind in fields]
+    return [schema_id, _pack_timestamp(message["timestamp"]), message["hcs_standard"], values]
+
+def _expand_envelope(compact: Any) -> Dict[str, Any]:
+    """Inverse of _compact_envelope"""
+    if isinstance(compact, dict):
+        return compact
+
+    schema_id, timestamp, hcs_standard, values = compact
+    if schema_id == 0:
+        events = [_expand_envelope(event) for event in values]
+        return {
+            "type": _BATCH_TYPE,
+            "timestamp": _unpack_timestamp(timestamp),
+            "data": {"count": len(events), "events": events},
+            "hcs_standard": hcs_standard
+        }
+
+    message_type, fields = _SCHEMAS_BY_ID[schema_id]
+    return {
+        "type": message_type,
+        "timestamp": _unpack_timestamp(timestamp),
+        "data": {
+            name: _unpack_value(value, kind)
+            for (name, kind), value in zip(fields, values)
+        },
+        "hcs_standard": hcs_standard
+    }
+
+def _pack_value(value: Any, kind: Optional[str]) -> Any:
+    if kind == _TS:
+        return _pack_timestamp(value)
+    if kind is not None and value in _ENUMS[kind]:
+        return _ENUMS[kind].index(value)
+    return value
+
+def _unpack_value(value: Any, kind: Optional[str]) -> Any:
+    if kind == _TS:
+        return _unpack_timestamp(value)
+    if kind is not None and isinstance(value, int):
+        return _ENUMS[kind][value]
+    return value
+
+def _pack_timestamp(value: Any) -> Any:
+    """Store a UTC ISO-8601 string as epoch microseconds when lossless"""
+    if not isinstance(value, str):
+        return value
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return value
+    if parsed.tzinfo is None or parsed.utcoffset():
+        return value
+    micros = (parsed - _EPOCH) // _MICROSECOND
+    return micros if _unpack_timestamp(micros) == value else value
+
+def _unpack_timestamp(value: Any) -> Any:
+    if isinstance(value, int):
+        return (_EPOCH + value * _MICROSECOND).isoformat()
+    return value
@@ -0,0 +1,195 @@
+"""
+TrustMesh Trust Propagation
+===========================
+
+EigenTrust-style transitive trust over the trust graph. Each account's
+outgoing tokens are weighted by trust type and TRST staked and normalized
+into local trust; global trust is the fixed point of
+
+    t = (1 - alpha) * C^T t + alpha * p
+
+found by sparse power iteration over the graph's edge arrays, where p
+spreads restart mass over pre-trusted seed accounts. Trust only reaches a
+cluster through edges from accounts that already hold trust, so a ring of
+sybils trusting each other earns nothing. That only holds while the
+restart mass stays with the seeds, so seeds are required: with none of
+them in the graph nobody holds trust, rather than everybody. Each run
+starts from the previous vector, so small graph changes converge in a few
+iterations; once the account keys are restored (from a snapshot or a
+replay) the previous vector no longer lines up and the run starts over.
+"""
+
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import logging
+
+from trustmesh_graph import TRUST_TYPES, TrustGraph, np
+
+logger = logging.getLogger(__name__)
+
+# Edge weight multiplier per trust type
+TRUST_TYPE_WEIGHTS = {
+    "personal": 1.0,
+    "professional": 1.5,
+    "community": 1.25
+}
+
+class EigenTrust:
+    """Global trust vector over a TrustGraph"""
+
+    def __init__(
+        self,
+        graph: TrustGraph,
+        seeds: Iterable[str],
+        alpha: float = 0.15,
+        tolerance: float = 1e-6,
+        max_iterations: int = 100,
+        type_weights: Optional[Dict[str, float]] = None
+    ):
+        """Initialize the engine
+
+        Args:
+            graph: Trust graph to propagate over
+            seeds: Pre-trusted accounts receiving the restart mass
+            alpha: Restart probability; higher pins trust closer to seeds
+            tolerance: Stop once the L1 change of an iteration is below this
+            max_iterations: Upper bound on iterations per run
+            type_weights: Edge weight per trust type
+
+        Raises:
+            ValueError: No seeds
+        """
+        self.graph = graph
+        self.seeds = set(seeds)
+        if not self.seeds:
+            raise ValueError("Trust propagation needs at least one seed account")
+        self.alpha = alpha
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        self.type_weights = dict(type_weights or TRUST_TYPE_WEIGHTS)
+
+        self.trust = np.zeros(0, dtype=np.float64)
+        # Interner restores self.trust was computed after
+        self._restores = graph.interner.restores
+        # Nodes with edges (the graph's nodes are every interned account)
+        self.active = np.zeros(0, dtype=bool)
+        self.iterations = 0
+        self.residual = 0.0
+        self.seconds = 0.0
+
+    def run(
+        self,
+        compact: bool = True,
+        arrays: Optional[Tuple["np.ndarray", ...]] = None
+    ) -> "np.ndarray":
+        """Propagate trust to convergence, warm-starting from the last run
+
+        Only compacted edges take part. To run in a worker thread while
+        new edges keep arriving, take the graph's csr() on the thread that
+        applies events and pass it in: the run then reads only those arrays.
+
+        Args:
+            compact: Merge buffered edges into the graph first (when the
+                arrays are taken here)
+            arrays: The graph's csr(), taken by the caller
+
+        Returns:
+            Global trust per graph node (sums to 1; all zero when no seed
+            has edges)
+        """
+        started = time.perf_counter()
+        if arrays is None:
+            if compact:
+                self.graph.compact()
+            arrays = self.graph.csr()
+        source, target, trust_type, trst_staked, out_indptr, in_indptr = arrays
+        if self._restores != self.graph.interner.restores:
+            self.trust = np.zeros(0, dtype=np.float64)
+            self._restores = self.graph.interner.restores
+        nodes = len(out_indptr) - 1
+        if nodes <= 0:
+            self.trust = np.zeros(0, dtype=np.float64)
+            self.active = np.zeros(0, dtype=bool)
+            return self.trust
+        self.active = (np.diff(out_indptr) + np.diff(in_indptr)) > 0
+
+        type_weights = np.asarray([self.type_weights.get(name, 1.0) for name in TRUST_TYPES])
+        weights = type_weights[trust_type] * (1.0 + np.log1p(np.maximum(trst_staked, 0.0)))
+
+        row_sums = np.bincount(source, weights=weights, minlength=nodes)
+        local_trust = weights / row_sums[source]
+        dangling = row_sums == 0
+
+        restart = self._restart_vector(nodes)
+        if not restart.any():
+            logger.warning("⚠️  No seed account has trust edges; nobody holds network trust")
+            self.trust = np.zeros(nodes, dtype=np.float64)
+            self.iterations, self.residual = 0, 0.0
+            self.seconds = time.perf_counter() - started
+            return self.trust
+        trust = self._warm_start(nodes, restart)
+
+        iteration = 0
+        residual = 0.0
+        for iteration in range(1, self.max_iterations + 1):
+            propagated = np.bincount(target, weights=local_trust * trust[source], minlength=nodes)
+            propagated += trust[dangling].sum() * restart
+            updated = (1.0 - self.alpha) * propagated + self.alpha * restart
+            residual = float(np.abs(updated - trust).sum())
+            trust = updated
+            if residual < self.tolerance:
+                break
+
+        self.trust = trust
+        self.iterations = iteration
+        self.residual = residual
+        self.seconds = time.perf_counter() - started
+        logger.info(
+            f"✅ Trust propagated over {int(self.active.sum())} accounts / {len(source)} edges "
+            f"in {iteration} iterations ({self.seconds:.2f}s)"
+        )
+        return trust
+
+    def scores(self, scale: float = 40.0) -> Dict[str, float]:
+        """Global trust per account, scaled so the most trusted gets scale"""
+        if not len(self.trust) or self.trust.max() <= 0:
+            return {}
+        scaled = self.trust * (scale / self.trust.max())
+        nodes = np.nonzero(self.active)[0]
+        return dict(zip(self.graph.interner.translate(nodes.tolist()), scaled[nodes].tolist()))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "accounts": int(self.active.sum()),
+            "seeds": len(self.seeds),
+            "iterations": self.iterations,
+            "residual": self.residual,
+            "seconds": round(self.seconds, 4)
+        }
+
+    def _restart_vector(self, nodes: int) -> "np.ndarray":
+        """Restart distribution: uniform over seeds with edges (all zero
+        when there are none)"""
+        seed_nodes = [
+            node for node in map(self.graph.node, self.seeds)
+            if node is not None and node < nodes and self.active[node]
+        ]
+        restart = np.zeros(nodes, dtype=np.float64)
+        if seed_nodes:
+            restart[seed_nodes] = 1.0 / len(seed_nodes)
+        return restart
+
+    def _warm_start(self, nodes: int, restart: "np.ndarray") -> "np.ndarray":
+        """Previous vector extended to new accounts, renormalized (the
+        restart vector when there is none, or it holds no trust)"""
+        if not len(self.trust):
+            return restart.copy()
+        kept = min(len(self.trust), nodes)
+        trust = np.zeros(nodes, dtype=np.float64)
+        trust[:kept] = self.trust[:kept]
+        trust[kept:] = restart[kept:]
+        total = trust.sum()
+        if not np.isfinite(total) or total <= 0:
+            return restart.copy()
+        return trust / total
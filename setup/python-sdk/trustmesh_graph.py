@@ -0,0 +1,369 @@
+"""
+TrustMesh Trust Graph
+=====================
+
+Sparse index of the trust network built from TRUST_TOKEN_GIVEN events.
+Nodes are the dense account keys of an AccountInterner (shared with the
+rest of the state projection). Edges (one per token) are held in parallel
+NumPy arrays - source, target, trust type code, TRST staked, timestamp -
+in compressed-sparse-row order by source, with a second CSR index by
+target, so both directions are a slice away. New edges land in a
+small delta buffer and are merged into the arrays by compact(), which runs
+automatically once the buffer reaches its threshold. Removed edges (of
+revoked or expired tokens) leave reads at once and the arrays at the next
+compact().
+"""
+
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from trustmesh_accounts import AccountInterner
+from trustmesh_models import epoch_seconds
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Trust type codes stored per edge
+TRUST_TYPE_CODES = {"personal": 0, "professional": 1, "community": 2}
+TRUST_TYPES = tuple(TRUST_TYPE_CODES)
+
+class TrustGraph:
+    """Trust network in CSR form with a delta buffer for new edges"""
+
+    def __init__(self, compact_threshold: int = 65536, interner: Optional[AccountInterner] = None):
+        """Initialize an empty graph
+
+        Args:
+            compact_threshold: Buffered edges that trigger a compaction
+            interner: Account keys used as node IDs (a private one by default)
+        """
+        if np is None:
+            raise ImportError("Install numpy for the trust graph: pip install numpy")
+        self.compact_threshold = compact_threshold
+        self.interner = interner if interner is not None else AccountInterner()
+
+        # Compacted edges, sorted by (source, target)
+        self.source = np.zeros(0, dtype=np.int32)
+        self.target = np.zeros(0, dtype=np.int32)
+        self.trust_type = np.zeros(0, dtype=np.int8)
+        self.trst_staked = np.zeros(0, dtype=np.float64)
+        self.timestamp = np.zeros(0, dtype=np.int64)
+        self.out_indptr = np.zeros(1, dtype=np.int64)
+        self.in_indptr = np.zeros(1, dtype=np.int64)
+        # Edge positions ordered by target (the incoming CSR index)
+        self.in_order = np.zeros(0, dtype=np.int64)
+
+        # Delta buffer: (source, target, trust type, trst_staked, timestamp)
+        # columns, plus per-node positions in them
+        self._delta: Tuple[List, ...] = ([], [], [], [], [])
+        self._delta_out: Dict[int, List[int]] = {}
+        self._delta_in: Dict[int, List[int]] = {}
+        # Removed edges still in the arrays (edge IDs) or the delta buffer
+        # (positions), until the next compact()
+        self._dropped: Set[int] = set()
+        self._dropped_delta: Set[int] = set()
+
+        self.compactions = 0
+
+    @property
+    def account_ids(self) -> List[str]:
+        """Account ID of every node"""
+        return self.interner.account_ids
+
+    @property
+    def node_count(self) -> int:
+        return len(self.interner)
+
+    @property
+    def edge_count(self) -> int:
+        return (len(self.source) - len(self._dropped)
+                + len(self._delta[0]) - len(self._dropped_delta))
+
+    def intern(self, account_id: str) -> int:
+        """Node (account key) of an account, assigning one if new"""
+        return self.interner.intern(account_id)
+
+    def node(self, account_id: str) -> Optional[int]:
+        """Node of a known account"""
+        return self.interner.key(account_id)
+
+    def add_edge(
+        self,
+        sender: str,
+        recipient: str,
+        trust_type: str = "personal",
+        trst_staked: float = 0.0,
+        timestamp: int = 0
+    ):
+        """Buffer one trust edge
+
+        Args:
+            sender: Account giving the token
+            recipient: Account receiving it
+            trust_type: "personal", "professional" or "community"
+            trst_staked: TRST staked behind the token
+            timestamp: Epoch microseconds
+        """
+        source, target = self.intern(sender), self.intern(recipient)
+        position = len(self._delta[0])
+        for column, value in zip(self._delta, (
+            source, target, TRUST_TYPE_CODES.get(trust_type, 0), trst_staked, timestamp
+        )):
+            column.append(value)
+        self._delta_out.setdefault(source, []).append(position)
+        self._delta_in.setdefault(target, []).append(position)
+
+        if position + 1 + len(self._dropped) >= self.compact_threshold:
+            self.compact()
+
+    def remove_edge(
+        self,
+        sender: str,
+        recipient: str,
+        trust_type: str = "personal",
+        trst_staked: float = 0.0,
+        timestamp: int = 0
+    ) -> bool:
+        """Remove one trust edge with these attributes, e.g. of a revoked
+        or expired token
+
+        Returns:
+            False if the graph holds no such edge
+        """
+        source, target = self.interner.key(sender), self.interner.key(recipient)
+        if source is None or target is None:
+            return False
+        edge = (source, target, TRUST_TYPE_CODES.get(trust_type, 0), trst_staked, timestamp)
+
+        for position in self._delta_out.get(source, ()):
+            if tuple(column[position] for column in self._delta) == edge:
+                self._delta_out[source].remove(position)
+                self._delta_in[target].remove(position)
+                self._dropped_delta.add(position)
+                return True
+
+        span = self._slice(self.out_indptr, source)
+        matches = np.nonzero(
+            (self.target[span] == target) & (self.trust_type[span] == edge[2])
+            & (self.trst_staked[span] == trst_staked) & (self.timestamp[span] == timestamp)
+        )[0] + span.start
+        for edge_id in matches.tolist():
+            if edge_id not in self._dropped:
+                self._dropped.add(edge_id)
+                if len(self._delta[0]) + len(self._dropped) >= self.compact_threshold:
+                    self.compact()
+                return True
+        return False
+
+    def add_event(self, data: Dict[str, Any], timestamp: str = ""):
+        """Buffer the edge of a TRUST_TOKEN_GIVEN event's data"""
+        self.add_edge(*event_edge(data, timestamp))
+
+    def add_edges(self, source, target, trust_type, trst_staked, timestamp):
+        """Add many edges at once, in order, bypassing the delta buffer
+
+        Args:
+            source: Account key of each edge's giving account
+            target: Account key of each edge's receiving account
+            trust_type: Trust type codes
+            trst_staked: TRST staked per edge
+            timestamp: Epoch microseconds per edge
+        """
+        if not len(source):
+            return
+        self.compact()
+        self._merge(
+            np.asarray(source, dtype=np.int32), np.asarray(target, dtype=np.int32),
+            np.asarray(trust_type, dtype=np.int8),
+            np.asarray(trst_staked, dtype=np.float64),
+            np.asarray(timestamp, dtype=np.int64)
+        )
+
+    def compact(self):
+        """Merge the delta buffer into the CSR arrays and drop removed edges"""
+        if not self._delta[0] and not self._dropped:
+            return
+        if self._dropped:
+            kept = np.ones(len(self.source), dtype=bool)
+            kept[list(self._dropped)] = False
+            self.source, self.target = self.source[kept], self.target[kept]
+            self.trust_type, self.trst_staked, self.timestamp = (
+                self.trust_type[kept], self.trst_staked[kept], self.timestamp[kept]
+            )
+            self._dropped.clear()
+        positions = [
+            position for position in range(len(self._delta[0])) if position not in self._dropped_delta
+        ]
+        self._merge(
+            np.asarray([self._delta[0][i] for i in positions], dtype=np.int32),
+            np.asarray([self._delta[1][i] for i in positions], dtype=np.int32),
+            np.asarray([self._delta[2][i] for i in positions], dtype=np.int8),
+            np.asarray([self._delta[3][i] for i in positions], dtype=np.float64),
+            np.asarray([self._delta[4][i] for i in positions], dtype=np.int64)
+        )
+        self._clear_delta()
+
+    def _clear_delta(self):
+        self._delta = ([], [], [], [], [])
+        self._delta_out.clear()
+        self._delta_in.clear()
+        self._dropped_delta.clear()
+
+    def csr(self) -> Tuple["np.ndarray", ...]:
+        """Compacted edges with both CSR indexes, as one consistent set:
+        (source, target, trust_type, trst_staked, out_indptr, in_indptr)
+
+        compact() replaces these arrays rather than mutating them, so a set
+        taken on the thread that applies events stays valid for a reader
+        on another thread; reading them one by one there could mix arrays
+        from before and after a compaction.
+        """
+        return (
+            self.source, self.target, self.trust_type, self.trst_staked,
+            self.out_indptr, self.in_indptr
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Edge arrays as plain data (compacts first; the accounts are saved
+        with the interner)"""
+        self.compact()
+        return {
+            "source": self.source.tobytes(),
+            "target": self.target.tobytes(),
+            "trust_type": self.trust_type.tobytes(),
+            "trst_staked": self.trst_staked.tobytes(),
+            "timestamp": self.timestamp.tobytes(),
+            "compactions": self.compactions
+        }
+
+    def restore(self, snapshot: Dict[str, Any]):
+        """Replace the graph with a snapshot's and rebuild the CSR indexes
+        (node keys must match the interner's)"""
+        self.source = np.frombuffer(snapshot["source"], dtype=np.int32).copy()
+        self.target = np.frombuffer(snapshot["target"], dtype=np.int32).copy()
+        self.trust_type = np.frombuffer(snapshot["trust_type"], dtype=np.int8).copy()
+        self.trst_staked = np.frombuffer(snapshot["trst_staked"], dtype=np.float64).copy()
+        self.timestamp = np.frombuffer(snapshot["timestamp"], dtype=np.int64).copy()
+        self.compactions = snapshot.get("compactions", 0)
+        self._clear_delta()
+        self._dropped.clear()
+        self._index()
+
+    def out_edges(self, account_id: str) -> Dict[str, Any]:
+        """Tokens an account has given: targets plus edge attributes"""
+        return self._edges(account_id, outgoing=True)
+
+    def in_edges(self, account_id: str) -> Dict[str, Any]:
+        """Tokens an account has received: sources plus edge attributes"""
+        return self._edges(account_id, outgoing=False)
+
+    def out_degree(self, account_id: str) -> int:
+        node = self.interner.key(account_id)
+        if node is None:
+            return 0
+        compacted = self._slice(self.out_indptr, node)
+        dropped = sum(compacted.start <= edge_id < compacted.stop for edge_id in self._dropped)
+        return compacted.stop - compacted.start - dropped + len(self._delta_out.get(node, ()))
+
+    def in_degree(self, account_id: str) -> int:
+        node = self.interner.key(account_id)
+        if node is None:
+            return 0
+        compacted = self._slice(self.in_indptr, node)
+        dropped = sum(self.target[edge_id] == node for edge_id in self._dropped)
+        return compacted.stop - compacted.start - dropped + len(self._delta_in.get(node, ()))
+
+    def neighbors(self, account_id: str, direction: str = "out") -> List[str]:
+        """Distinct accounts trusted by ("out") or trusting ("in") an account"""
+        edges = self._edges(account_id, outgoing=(direction == "out"))
+        return self.interner.translate(np.unique(edges["nodes"]).tolist())
+
+    def stats(self) -> Dict[str, Any]:
+        arrays = (
+            self.source, self.target, self.trust_type, self.trst_staked, self.timestamp,
+            self.out_indptr, self.in_indptr, self.in_order
+        )
+        return {
+            "nodes": self.node_count,
+            "edges": self.edge_count,
+            "buffered_edges": len(self._delta[0]) - len(self._dropped_delta),
+            "removed_edges": len(self._dropped),
+            "compactions": self.compactions,
+            "array_bytes": sum(array.nbytes for array in arrays)
+        }
+
+    def _merge(self, source, target, trust_type, trst_staked, timestamp):
+        """Append edge columns to the arrays and restore CSR order (stable,
+        so parallel edges keep their insertion order)"""
+        source = np.concatenate([self.source, source])
+        target = np.concatenate([self.target, target])
+        trust_type = np.concatenate([self.trust_type, trust_type])
+        trst_staked = np.concatenate([self.trst_staked, trst_staked])
+        timestamp = np.concatenate([self.timestamp, timestamp])
+
+        order = np.lexsort((target, source))
+        self.source, self.target = source[order], target[order]
+        self.trust_type, self.trst_staked, self.timestamp = trust_type[order], trst_staked[order], timestamp[order]
+        self._index()
+        self.compactions += 1
+
+    def _index(self):
+        """Rebuild both CSR indexes from the sorted edge arrays"""
+        nodes = self.node_count
+        self.out_indptr = np.zeros(nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.source, minlength=nodes), out=self.out_indptr[1:])
+        self.in_order = np.argsort(self.target, kind="stable")
+        self.in_indptr = np.zeros(nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.target, minlength=nodes), out=self.in_indptr[1:])
+
+    def _slice(self, indptr, node: int) -> slice:
+        if node + 1 >= len(indptr):
+            return slice(0, 0)
+        return slice(int(indptr[node]), int(indptr[node + 1]))
+
+    def _edges(self, account_id: str, outgoing: bool) -> Dict[str, Any]:
+        """Compacted plus buffered edges of a node in one direction"""
+        node = self.interner.key(account_id)
+        if node is None:
+            edge_ids, buffered = np.zeros(0, dtype=np.int64), []
+        elif outgoing:
+            span = self._slice(self.out_indptr, node)
+            edge_ids, buffered = np.arange(span.start, span.stop), self._delta_out.get(node, [])
+        else:
+            edge_ids, buffered = self.in_order[self._slice(self.in_indptr, node)], self._delta_in.get(node, [])
+        if self._dropped:
+            edge_ids = edge_ids[~np.isin(edge_ids, list(self._dropped))]
+
+        other, other_column = (self.target, 1) if outgoing else (self.source, 0)
+        return {
+            "nodes": self._join(other, edge_ids, other_column, buffered),
+            "trust_type": self._join(self.trust_type, edge_ids, 2, buffered),
+            "trst_staked": self._join(self.trst_staked, edge_ids, 3, buffered),
+            "timestamp": self._join(self.timestamp, edge_ids, 4, buffered)
+        }
+
+    def _join(self, array, edge_ids, delta_column: int, buffered: List[int]):
+        """Attribute values of compacted edges followed by buffered ones"""
+        values = array[edge_ids]
+        if not buffered:
+            return values
+        column = self._delta[delta_column]
+        return np.concatenate([values, np.asarray([column[i] for i in buffered], dtype=array.dtype)])
+
+def event_edge(data: Dict[str, Any], timestamp: str = "") -> Tuple[str, str, str, float, int]:
+    """(sender, recipient, trust type, TRST staked, epoch micros) of a
+    TRUST_TOKEN_GIVEN event's data"""
+    trust_type = data.get("trust_type", "personal")
+    return (
+        data.get("sender", ""),
+        data.get("recipient", ""),
+        getattr(trust_type, "value", trust_type),
+        data.get("trst_staked", 0.0),
+        _epoch_micros(data.get("timestamp") or timestamp)
+    )
+
+def _epoch_micros(timestamp: str) -> int:
+    """ISO-8601 timestamp to epoch microseconds (0 if missing)"""
+    seconds = epoch_seconds(timestamp)
+    return 0 if seconds is None else round(seconds * 1_000_000)
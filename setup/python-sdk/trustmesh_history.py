@@ -0,0 +1,260 @@
+"""
+TrustMesh Score History
+=======================
+
+The reputation inputs of every account as they stood at any consensus
+time, so poll eligibility is a function of the events before a vote in
+consensus order. Topics are followed independently, so a reader may apply
+a vote before trust tokens that reached consensus earlier on another
+topic, or after ones that reached it later; the running aggregates of the
+state projection reflect that ingestion order, the history does not.
+
+Each change to an account's inputs - a token received with its trust level
+and TRST backing, a badge with its rarity, an event the account took part
+in - is recorded with the consensus timestamp of the event that made it,
+sorted by that timestamp whatever order events arrive in, next to the
+running sums of every change up to it. inputs_at() finds the last change
+before a timestamp by bisection and reads its sums, so an eligibility
+check costs O(log n) however long the history; the sums are always added
+up in timestamp order, so every reader that has read the same messages
+gets the same answer. compact() folds the changes before a time no ballot
+will be judged at any more into one per account (the SDK does so through
+TrustMeshState.compact_history() before saving a snapshot). Entries are
+typed arrays per account, created as needed, keyed by AccountInterner key.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+# Badge rarities the badge score weighs, stored as codes (others are 0)
+RARITY_CODES = {"rare": 1, "legendary": 2}
+
+class _Timeline:
+    """One account's input changes, each column sorted by consensus
+    timestamp: the changes of each entry and their running sums"""
+    __slots__ = (
+        "received_at", "received", "received_sums",
+        "badges_at", "badges", "badge_sums",
+        "activity_at", "activity", "activity_sums"
+    )
+
+    def __init__(self):
+        # (tokens, trust level total, TRST staked) per entry of received_at
+        self.received_at: Optional[array] = None
+        self.received: Optional[array] = None
+        self.received_sums: Optional[array] = None
+        # (badges, rare, legendary) per entry of badges_at
+        self.badges_at: Optional[array] = None
+        self.badges: Optional[array] = None
+        self.badge_sums: Optional[array] = None
+        # Events per entry of activity_at
+        self.activity_at: Optional[array] = None
+        self.activity: Optional[array] = None
+        self.activity_sums: Optional[array] = None
+
+# Timestamp array, change array, running sum array, their typecode and
+# values per entry
+_COLUMNS = (
+    ("received_at", "received", "received_sums", "d", 3),
+    ("badges_at", "badges", "badge_sums", "q", 3),
+    ("activity_at", "activity", "activity_sums", "q", 1)
+)
+_RECEIVED, _BADGES, _ACTIVITY = _COLUMNS
+
+def _insert(timestamps: array, consensus_timestamp: int) -> int:
+    """Add a timestamp after any equal ones; returns its index"""
+    index = bisect_right(timestamps, consensus_timestamp)
+    if index == len(timestamps):
+        timestamps.append(consensus_timestamp)
+    else:
+        timestamps.insert(index, consensus_timestamp)
+    return index
+
+class ScoreHistory:
+    """Reputation inputs of each account over consensus time"""
+
+    def __init__(self):
+        self.timelines: Dict[int, _Timeline] = {}
+
+    def _timeline(self, key: int) -> _Timeline:
+        timeline = self.timelines.get(key)
+        if timeline is None:
+            timeline = self.timelines[key] = _Timeline()
+        return timeline
+
+    def add_received(
+        self,
+        key: int,
+        consensus_timestamp: int,
+        tokens: float,
+        trust_level_total: float,
+        trst_staked: float
+    ):
+        """Record trust tokens received (negative amounts take them back)"""
+        _add(self._timeline(key), _RECEIVED, consensus_timestamp, (tokens, trust_level_total, trst_staked))
+
+    def add_badge(self, key: int, consensus_timestamp: int, rarity: str):
+        """Record a badge received"""
+        code = RARITY_CODES.get(rarity, 0)
+        _add(self._timeline(key), _BADGES, consensus_timestamp, (1, code == 1, code == 2))
+
+    def add_activity(self, key: int, consensus_timestamp: int):
+        """Record an event the account took part in"""
+        _add(self._timeline(key), _ACTIVITY, consensus_timestamp, (1,))
+
+    def inputs_at(
+        self, key: Optional[int], consensus_timestamp: int
+    ) -> Tuple[Dict[str, Any], Dict[str, Any], int]:
+        """Reputation inputs of an account from the events that reached
+        consensus before a timestamp (ns)
+
+        Returns:
+            (trust data, badge data, activity events): the fields of the
+            state projection's trust_data(), badge_data() and activity()
+            that the scores use
+        """
+        timeline = self.timelines.get(key) or _Timeline()
+        tokens, trust_level_total, trst_staked = _sums_at(timeline, _RECEIVED, consensus_timestamp)
+        badges, rare, legendary = _sums_at(timeline, _BADGES, consensus_timestamp)
+        activity, = _sums_at(timeline, _ACTIVITY, consensus_timestamp)
+
+        tokens = int(tokens)
+        trust_data = {
+            "tokens_received": tokens,
+            "average_trust_level": round(trust_level_total / tokens, 2) if tokens else 0.0,
+            "trst_backing": trst_staked
+        }
+        badge_data = {"total_badges": badges, "rare_badges": rare, "legendary_badges": legendary}
+        return trust_data, badge_data, activity
+
+    def compact(self, before: int) -> int:
+        """Fold each account's changes before a consensus timestamp (ns)
+        into one entry, at the time of the last of them
+
+        inputs_at() stays exact after that entry; earlier times read as if
+        nothing had happened, so only fold what no ballot will be judged
+        at any more.
+
+        Returns:
+            Number of entries folded away
+        """
+        folded = 0
+        for timeline in self.timelines.values():
+            for at, changes, sums, _, width in _COLUMNS:
+                timestamps = getattr(timeline, at)
+                count = bisect_left(timestamps, before) if timestamps is not None else 0
+                if count < 2:
+                    continue
+                last = (count - 1) * width
+                running = getattr(timeline, sums)
+                setattr(timeline, at, timestamps[count - 1:])
+                setattr(timeline, changes, running[last:last + width] + getattr(timeline, changes)[last + width:])
+                setattr(timeline, sums, running[last:])
+                folded += count - 1
+        return folded
+
+    def merge(self, other: "ScoreHistory", keys: Sequence[int]):
+        """Add another history's entries to this one's
+
+        Args:
+            other: History to add
+            keys: This history's key for each of the other's keys
+        """
+        for other_key, theirs in other.timelines.items():
+            timeline = self._timeline(keys[other_key])
+            for at, changes, sums, typecode, width in _COLUMNS:
+                new_timestamps = getattr(theirs, at)
+                if new_timestamps is None:
+                    continue
+                if getattr(timeline, at) is None:
+                    _create(timeline, at, changes, sums, typecode)
+                start = _merge_columns(
+                    getattr(timeline, at), getattr(timeline, changes),
+                    new_timestamps, getattr(theirs, changes), width
+                )
+                _accumulate(getattr(timeline, changes), getattr(timeline, sums), start, width)
+
+    def snapshot(self) -> Dict[int, list]:
+        """Every timeline as raw array bytes (None for absent arrays)"""
+        return {
+            key: [
+                None if values is None else values.tobytes()
+                for values in (getattr(timeline, name) for name in _Timeline.__slots__)
+            ]
+            for key, timeline in self.timelines.items()
+        }
+
+    def restore(self, snapshot: Dict[int, list]):
+        """Replace the history with a snapshot's"""
+        self.timelines = {}
+        for key, columns in snapshot.items():
+            timeline = self.timelines[key] = _Timeline()
+            for name, typecode, data in zip(_Timeline.__slots__, "qddqqqqqq", columns):
+                if data is not None:
+                    values = array(typecode)
+                    values.frombytes(data)
+                    setattr(timeline, name, values)
+
+def _create(timeline: _Timeline, at: str, changes: str, sums: str, typecode: str):
+    setattr(timeline, at, array("q"))
+    setattr(timeline, changes, array(typecode))
+    setattr(timeline, sums, array(typecode))
+
+def _add(timeline: _Timeline, column: Tuple[str, str, str, str, int], consensus_timestamp: int, values):
+    """Insert a change into a column and bring the running sums after it up to date"""
+    at, changes, sums, typecode, width = column
+    if getattr(timeline, at) is None:
+        _create(timeline, at, changes, sums, typecode)
+    index = _insert(getattr(timeline, at), consensus_timestamp)
+    getattr(timeline, changes)[index * width:index * width] = array(typecode, values)
+    _accumulate(getattr(timeline, changes), getattr(timeline, sums), index, width)
+
+def _accumulate(changes: array, sums: array, start: int, width: int):
+    """Recompute the running sums from an entry on, in timestamp order (a
+    change arriving in order only adds its own)"""
+    if len(sums) < len(changes):
+        sums.extend(changes[len(sums):])
+    for index in range(start * width, len(changes)):
+        sums[index] = sums[index - width] + changes[index] if index >= width else changes[index]
+
+def _sums_at(timeline: _Timeline, column: Tuple[str, str, str, str, int], consensus_timestamp: int) -> tuple:
+    """Running sums of a column's changes before a timestamp"""
+    at, _, sums, typecode, width = column
+    timestamps = getattr(timeline, at)
+    count = bisect_left(timestamps, consensus_timestamp) if timestamps is not None else 0
+    if not count:
+        return (0.0 if typecode == "d" else 0,) * width
+    return tuple(getattr(timeline, sums)[(count - 1) * width:count * width])
+
+def _merge_columns(
+    timestamps: array,
+    values: array,
+    new_timestamps: array,
+    new_values: array,
+    width: int
+) -> int:
+    """Merge sorted entries into sorted entries, in place, keeping equal
+    timestamps in their existing order
+
+    Returns:
+        Index of the first entry that changed
+    """
+    if not timestamps or new_timestamps[0] >= timestamps[-1]:
+        start = len(timestamps)
+        timestamps.extend(new_timestamps)
+        values.extend(new_values)
+        return start
+
+    start = bisect_right(timestamps, new_timestamps[0])
+    entries = sorted(
+        [(timestamp, 0, index) for index, timestamp in enumerate(timestamps)]
+        + [(timestamp, 1, index) for index, timestamp in enumerate(new_timestamps)]
+    )
+    merged = array(values.typecode)
+    for _, source, index in entries:
+        column = new_values if source else values
+        merged.extend(column[index * width:(index + 1) * width])
+    values[:] = merged
+    timestamps[:] = array("q", (timestamp for timestamp, _, _ in entries))
+    return start
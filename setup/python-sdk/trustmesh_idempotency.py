@@ -0,0 +1,269 @@
+"""
+TrustMesh Idempotency
+=====================
+
+Client retries of /trust-tokens, /badges, /polls and /polls/{poll_id}/vote
+must not mint a second transaction. IdempotencyCache remembers the result of
+each operation under the caller's idempotency key for a bounded time and
+returns it for repeats; concurrent repeats wait for the first call instead
+of running it again. Each key is bound to a fingerprint of its request, and
+a key reused for a different request is refused (IdempotencyConflict).
+
+A shared backend (Redis) extends this across API processes. The first call
+reserves the key atomically (SET NX with a short expiry) before running the
+operation and stores the result over the reservation when it is done;
+callers in other processes that find the key reserved wait for the result,
+and give up with IdempotencyInProgress if it does not come in time.
+
+RecentKeyFilter is the consumer-side counterpart: a bounded set used to drop
+events whose transaction hash has already been applied.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+class IdempotencyError(Exception):
+    """An idempotency key cannot be used for this request"""
+    status_code = 409
+
+class IdempotencyConflict(IdempotencyError):
+    """The key was already used for a different request"""
+    status_code = 422
+
+class IdempotencyInProgress(IdempotencyError):
+    """The first request with the key is still running elsewhere"""
+    status_code = 409
+
+def request_fingerprint(*values: Any) -> str:
+    """Digest of a request's arguments, to tell a retry from another request
+    reusing its idempotency key"""
+    body = json.dumps(values, sort_keys=True, default=lambda value: getattr(value, "value", str(value)))
+    return hashlib.sha256(body.encode()).hexdigest()
+
+# Deletes a key only while it holds the given value
+_RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+class RedisIdempotencyBackend:
+    """Shares idempotency reservations and results between processes through
+    Redis
+
+    Each key holds {"state": "pending" | "done", "fingerprint", "result"}.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        prefix: str = "trustmesh:idempotency:",
+        pending_ttl_seconds: float = 60.0,
+        client: Optional[Any] = None
+    ):
+        """Initialize the backend
+
+        Args:
+            url: Redis URL, e.g. redis://localhost:6379
+            prefix: Key prefix for idempotency entries
+            pending_ttl_seconds: How long a reservation lasts without a
+                result, so a process that died mid-request frees the key
+            client: Asyncio Redis client to use instead of connecting to url
+        """
+        if client is None:
+            if aioredis is None:
+                raise ImportError("Install redis for the shared idempotency backend: pip install redis")
+            client = aioredis.from_url(url)
+        self._redis = client
+        self.prefix = prefix
+        self.pending_ttl_seconds = pending_ttl_seconds
+        # Reservation values this process set, by key
+        self._reservations: Dict[str, str] = {}
+
+    async def reserve(self, key: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Reserve a key for a request, atomically
+
+        Returns:
+            None if this caller now holds the reservation, otherwise the
+            entry already there
+        """
+        pending = json.dumps({"state": "pending", "fingerprint": fingerprint, "holder": uuid.uuid4().hex})
+        expiry = max(1, int(self.pending_ttl_seconds))
+        if await self._redis.set(self.prefix + key, pending, nx=True, ex=expiry):
+            self._reservations[key] = pending
+            return None
+        # Gone again since (released or expired): report it pending, the
+        # caller tries again
+        return await self.get(key) or {"state": "pending", "fingerprint": fingerprint}
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = await self._redis.get(self.prefix + key)
+        return None if value is None else json.loads(value)
+
+    async def complete(self, key: str, fingerprint: str, result: Any, ttl_seconds: float):
+        """Store a reserved key's result over its reservation"""
+        self._reservations.pop(key, None)
+        entry = {"state": "done", "fingerprint": fingerprint, "result": result}
+        await self._redis.set(self.prefix + key, json.dumps(entry), ex=max(1, int(ttl_seconds)))
+
+    async def release(self, key: str):
+        """Drop a reservation whose request failed, so a retry can run (only
+        if it is still this caller's)"""
+        pending = self._reservations.pop(key, None)
+        if pending is not None:
+            await self._redis.eval(_RELEASE_SCRIPT, 1, self.prefix + key, pending)
+
+class IdempotencyCache:
+    """Bounded TTL cache of operation results keyed by idempotency key"""
+
+    def __init__(
+        self,
+        max_entries: int = 100_000,
+        ttl_seconds: float = 86400.0,
+        backend: Optional[RedisIdempotencyBackend] = None,
+        wait_seconds: float = 10.0,
+        poll_seconds: float = 0.05
+    ):
+        """Initialize the cache
+
+        Args:
+            max_entries: Oldest entries are evicted beyond this many
+            ttl_seconds: How long a result is returned for repeats
+            backend: Optional shared backend consulted on local misses
+            wait_seconds: How long to wait for a request another process
+                is running with the same key
+            poll_seconds: Interval between checks for that result
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend
+        self.wait_seconds = wait_seconds
+        self.poll_seconds = poll_seconds
+        # key -> (expiry, request fingerprint, result future)
+        self._entries: "OrderedDict[str, Tuple[float, str, asyncio.Future]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    async def run(
+        self,
+        key: str,
+        operation: Callable[[], Awaitable[Any]],
+        fingerprint: str = ""
+    ) -> Any:
+        """Run an operation once per key and return its (cached) result
+
+        Failed or cancelled operations are not cached, so a retry after an
+        error or a timeout runs the operation again.
+
+        Args:
+            key: Idempotency key
+            operation: Runs the request
+            fingerprint: request_fingerprint() of the request
+
+        Raises:
+            IdempotencyConflict: The key was used for a different request
+            IdempotencyInProgress: Another process is still running the
+                request (shared backend only)
+        """
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry and entry[0] > now:
+            if entry[1] != fingerprint:
+                raise IdempotencyConflict(f"Idempotency key {key} was used for a different request")
+            self.hits += 1
+            return await asyncio.shield(entry[2])
+
+        future = asyncio.get_running_loop().create_future()
+        self._entries[key] = (now + self.ttl_seconds, fingerprint, future)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+        reserved = False
+        try:
+            if self.backend:
+                reserved, result = await self._reserve(key, fingerprint)
+                if not reserved:
+                    self.hits += 1
+                    future.set_result(result)
+                    return result
+
+            self.misses += 1
+            result = await operation()
+        except BaseException as e:
+            self._entries.pop(key, None)
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                # Concurrent repeats (if any) see the error; don't warn when there are none
+                future.exception()
+            if reserved:
+                await self.backend.release(key)
+            raise
+
+        future.set_result(result)
+        if self.backend:
+            await self.backend.complete(key, fingerprint, result, self.ttl_seconds)
+        return result
+
+    async def _reserve(self, key: str, fingerprint: str) -> Tuple[bool, Any]:
+        """Reserve a key in the shared backend, or wait for the result of
+        the process holding it
+
+        Returns:
+            (True, None) once reserved, or (False, the other request's result)
+        """
+        deadline = time.monotonic() + self.wait_seconds
+        while True:
+            entry = await self.backend.reserve(key, fingerprint)
+            if entry is None:
+                return True, None
+            if entry.get("fingerprint") != fingerprint:
+                raise IdempotencyConflict(f"Idempotency key {key} was used for a different request")
+            if entry.get("state") == "done":
+                return False, entry.get("result")
+            if time.monotonic() >= deadline:
+                raise IdempotencyInProgress(f"A request with idempotency key {key} is still running")
+            await asyncio.sleep(self.poll_seconds)
+
+class RecentKeyFilter:
+    """Bounded set of recently seen keys, oldest forgotten first"""
+
+    def __init__(self, max_keys: int = 1_000_000):
+        self.max_keys = max_keys
+        self._keys: "OrderedDict[str, None]" = OrderedDict()
+        self.duplicates = 0
+
+    def seen(self, key: str) -> bool:
+        """Record a key and report whether it had been seen before"""
+        if key in self._keys:
+            self.duplicates += 1
+            return True
+        self._keys[key] = None
+        if len(self._keys) > self.max_keys:
+            self._keys.popitem(last=False)
+        return False
+
+    def snapshot(self) -> List[str]:
+        """Remembered keys, oldest first"""
+        return list(self._keys)
+
+    def restore(self, keys: List[str]):
+        """Remember keys from a snapshot, as if just seen in that order"""
+        for key in keys:
+            self._keys[key] = None
+            self._keys.move_to_end(key)
+        while len(self._keys) > self.max_keys:
+            self._keys.popitem(last=False)
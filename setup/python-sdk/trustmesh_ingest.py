@@ -0,0 +1,268 @@
+"""
+TrustMesh Ingestion Engine
+==========================
+
+Long-running consumer that reads every TrustMesh topic back through the
+transport (the mirror node on Hedera), decodes each message (frames, chunks,
+batches) and applies the events to a TrustMeshState projection.
+
+Sharded streams are merged by following every shard topic; events about
+one key always share a shard, so per-key order is consensus order. Shards
+announced in a SHARD_REGISTRY message are picked up while running.
+
+Each topic is followed from a consensus-timestamp cursor. A cursor advances
+once a message has been applied, so a dropped subscription resumes right
+after the last message applied, messages delivered again are dropped, and
+cursors() / start(cursors=...) carry the position across restarts together
+with a saved copy of the state. An event the state cannot apply is counted
+and logged; it never stops the topic.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
+import logging
+
+from trustmesh_batching import unpack_envelope
+from trustmesh_codec import ChunkAssembler
+from trustmesh_idempotency import RecentKeyFilter
+from trustmesh_sharding import ShardRegistry
+from trustmesh_state import TrustMeshState
+from trustmesh_transport import HCSTransport, TopicMessage
+
+logger = logging.getLogger(__name__)
+
+# Data fields identifying each event, used to drop duplicate submissions.
+# Profiles are republished under the same ID, so a profile event is one
+# version of it
+EVENT_KEYS = {
+    "PROFILE_CREATE": ("profile_id", "updated_at"),
+    "TRUST_TOKEN_GIVEN": ("transaction_hash",),
+    "TRUST_TOKEN_REVOKED": ("transaction_id",),
+    "BADGE_ISSUED": ("hashinal_id",),
+    "COMMUNITY_POLL_CREATED": ("poll_id",),
+    "POLL_VOTE_CAST": ("vote_id",),
+    "POLL_CLOSED": ("poll_id",)
+}
+
+def event_key(event: Dict[str, Any]) -> Optional[str]:
+    """Key identifying an event across duplicate submissions (None if it
+    has none)"""
+    fields = EVENT_KEYS.get(event.get("type"))
+    if not fields:
+        return None
+    data = event.get("data") or {}
+    values = [data.get(field) for field in fields]
+    if not all(values):
+        return None
+    return ":".join([event["type"], *map(str, values)])
+
+class IngestionEngine:
+    """Follows TrustMesh topics and keeps a state projection up to date"""
+
+    def __init__(
+        self,
+        transport: HCSTransport,
+        topics: Dict[str, str],
+        state: Optional[TrustMeshState] = None,
+        max_recent_events: int = 1_000_000,
+        retry_seconds: float = 1.0,
+        max_retry_seconds: float = 30.0,
+        shards: Optional[ShardRegistry] = None
+    ):
+        """Initialize the engine
+
+        Args:
+            transport: Transport to read topics from
+            topics: Stream names to topic IDs (SDK topics); unset
+                placeholder IDs are skipped. Ignored when shards is given:
+                the registry's topic map is followed
+            state: Projection to apply events to (a new one by default)
+            max_recent_events: Event keys remembered for duplicate detection
+            retry_seconds: First delay before resubscribing after an error,
+                doubled on each consecutive error
+            max_retry_seconds: Upper bound for the resubscribe delay
+            shards: Shard registry holding the topic map, updated from
+                SHARD_REGISTRY messages (a new one over topics by default)
+        """
+        self.transport = transport
+        self.state = state or TrustMeshState()
+        self.shards = shards or ShardRegistry(topics)
+        self.retry_seconds = retry_seconds
+        self.max_retry_seconds = max_retry_seconds
+
+        self.recent_events = RecentKeyFilter(max_recent_events)
+        self._cursors: Dict[str, int] = {}
+        self._assemblers: Dict[str, ChunkAssembler] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+        self.messages_ingested = 0
+        self.redeliveries = 0
+        self.decode_errors = 0
+        self.apply_errors = 0
+        self.last_message_at: Dict[str, float] = {}
+
+    @property
+    def topics(self) -> Dict[str, str]:
+        """Stream names to topic IDs, discovered shards included"""
+        return self.shards.topics
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def topic_ids(self) -> List[str]:
+        """Distinct topic IDs to follow"""
+        return sorted({
+            topic_id for topic_id in self.topics.values() if "TOPIC" not in topic_id
+        })
+
+    async def start(self, cursors: Optional[Dict[str, int]] = None):
+        """Start following every topic
+
+        Args:
+            cursors: Topic IDs to consensus timestamps (ns) to resume after;
+                topics without a cursor are read from the beginning
+        """
+        if self._tasks:
+            return
+        if cursors:
+            self._cursors.update(cursors)
+        for topic_id in self.topic_ids():
+            self._tasks[topic_id] = asyncio.ensure_future(self._follow(topic_id))
+        logger.info(f"📥 Ingesting {len(self._tasks)} topics")
+
+    async def stop(self):
+        """Stop following topics; cursors keep their position"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = {}
+
+    def cursors(self) -> Dict[str, int]:
+        """Consensus timestamp of the last message applied, per topic"""
+        return dict(self._cursors)
+
+    async def wait_until(self, cursors: Dict[str, int], timeout: Optional[float] = None):
+        """Wait until every topic has been ingested up to the given cursors"""
+        async def caught_up():
+            while any(self._cursors.get(topic_id, 0) < cursor for topic_id, cursor in cursors.items()):
+                await asyncio.sleep(0.01)
+        await asyncio.wait_for(caught_up(), timeout)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Cursors, partly received chunked messages and the keys of recent
+        events, to resume from (duplicates delivered after a restart are
+        still dropped)"""
+        chunks = {topic_id: assembler.snapshot() for topic_id, assembler in self._assemblers.items()}
+        return {
+            "cursors": self.cursors(),
+            "chunks": {topic_id: pending for topic_id, pending in chunks.items() if pending},
+            "recent_events": self.recent_events.snapshot()
+        }
+
+    def restore(self, snapshot: Dict[str, Any]):
+        """Resume from a snapshot's position (call before start())"""
+        self._cursors.update(snapshot["cursors"])
+        for topic_id, chunks in snapshot["chunks"].items():
+            assembler = self._assemblers.get(topic_id)
+            if assembler is None:
+                assembler = self._assemblers[topic_id] = ChunkAssembler()
+            assembler.restore(chunks)
+        # A replayed position carries no event keys
+        self.recent_events.restore(snapshot.get("recent_events", ()))
+
+    def stats(self) -> Dict[str, Any]:
+        """Ingestion progress, for monitoring"""
+        now = time.monotonic()
+        return {
+            "running": self.running,
+            "messages_ingested": self.messages_ingested,
+            "events_applied": self.state.events_applied,
+            "duplicates_dropped": self.recent_events.duplicates,
+            "redeliveries_dropped": self.redeliveries,
+            "decode_errors": self.decode_errors,
+            "apply_errors": self.apply_errors,
+            "topics": {
+                topic_id: {
+                    "cursor": self._cursors.get(topic_id, 0),
+                    "idle_seconds": round(now - self.last_message_at[topic_id], 1)
+                    if topic_id in self.last_message_at else None
+                }
+                for topic_id in self.topic_ids()
+            }
+        }
+
+    async def _follow(self, topic_id: str):
+        """Apply a topic's messages, resubscribing from the cursor on errors"""
+        delay = self.retry_seconds
+        while True:
+            try:
+                async for message in self.transport.subscribe(
+                    topic_id, start_after=self._cursors.get(topic_id, 0)
+                ):
+                    self.ingest(message)
+                    delay = self.retry_seconds
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Subscription to {topic_id} failed, retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_retry_seconds)
+
+    def ingest(self, message: TopicMessage):
+        """Decode one topic message and apply its events"""
+        topic_id = message.topic_id
+        if message.consensus_timestamp <= self._cursors.get(topic_id, 0):
+            # Consensus timestamps only grow within a topic: already applied
+            self.redeliveries += 1
+            return
+        self.messages_ingested += 1
+        self.last_message_at[topic_id] = time.monotonic()
+        self._apply_message(message)
+        self._cursors[topic_id] = message.consensus_timestamp
+
+    def _apply_message(self, message: TopicMessage):
+        topic_id = message.topic_id
+        assembler = self._assemblers.get(topic_id)
+        if assembler is None:
+            assembler = self._assemblers[topic_id] = ChunkAssembler()
+        try:
+            envelope = assembler.feed(message.contents)
+        except Exception as e:
+            self.decode_errors += 1
+            logger.warning(f"⚠️  Undecodable message {topic_id}#{message.sequence_number}: {e}")
+            return
+        if envelope is None:
+            return
+
+        for event in unpack_envelope(envelope):
+            key = event_key(event)
+            if key and self.recent_events.seen(key):
+                continue
+            if event.get("type") == "SHARD_REGISTRY":
+                self._add_shards(event.get("data") or {})
+                continue
+            try:
+                self.state.apply(event, message.consensus_timestamp)
+            except Exception as e:
+                self.apply_errors += 1
+                logger.warning(
+                    f"⚠️  Skipped {event.get('type')} event in {topic_id}#{message.sequence_number}: {e}"
+                )
+
+    def _add_shards(self, registry: Dict[str, Any]):
+        """Adopt a shard registry and follow any shard topics new to us"""
+        try:
+            new_topics = self.shards.apply(registry)
+        except (KeyError, ValueError) as e:
+            logger.warning(f"⚠️  Ignoring shard registry: {e}")
+            return
+        if not self._tasks:
+            return
+        for topic_id in new_topics:
+            if topic_id not in self._tasks:
+                self._tasks[topic_id] = asyncio.ensure_future(self._follow(topic_id))
+                logger.info(f"📥 Following {registry.get('stream')} shard {topic_id}")
@@ -0,0 +1,205 @@
+"""
+TrustMesh Trust Ledger
+======================
+
+Materialized per-account trust token ledger (HCS-20). Confirmed
+TRUST_TOKEN_GIVEN events update running totals as they are ingested;
+gifts this process has submitted but not yet seen confirmed are held as
+pending deltas on top, so consecutive gifts to the same recipient get
+correct running balances. Every lookup is constant time. Accounts are
+keyed by their AccountInterner key.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from trustmesh_accounts import AccountInterner
+
+@dataclass
+class LedgerAccount:
+    """Confirmed trust token totals for one account"""
+    given: int = 0
+    received: int = 0
+    trst_staked_given: float = 0.0
+    trst_staked_received: float = 0.0
+    given_by_type: Dict[str, int] = field(default_factory=dict)
+    received_by_type: Dict[str, int] = field(default_factory=dict)
+
+@dataclass
+class _PendingGift:
+    sender: int
+    recipient: int
+    amount: int
+
+class TrustLedger:
+    """Per-account trust token balances with optimistic pending updates"""
+
+    def __init__(self, interner: Optional[AccountInterner] = None):
+        """Initialize an empty ledger
+
+        Args:
+            interner: Account keys shared with the rest of the state (a
+                private one by default)
+        """
+        self.interner = interner if interner is not None else AccountInterner()
+        self.accounts: Dict[int, LedgerAccount] = {}
+        self._pending: Dict[str, _PendingGift] = {}
+        self._pending_given: Dict[int, int] = {}
+        self._pending_received: Dict[int, int] = {}
+
+    def apply(self, data: Dict[str, Any]):
+        """Apply a confirmed TRUST_TOKEN_GIVEN event
+
+        Args:
+            data: The event's data (a serialized TrustToken)
+        """
+        self.discard_pending(data.get("transaction_id", ""))
+
+        amount = data.get("amount", 1)
+        staked = data.get("trst_staked", 0.0)
+        trust_type = data.get("trust_type", "personal")
+        trust_type = getattr(trust_type, "value", trust_type)
+
+        sender = self._account(self.interner.intern(data.get("sender", "")))
+        sender.given += amount
+        sender.trst_staked_given += staked
+        sender.given_by_type[trust_type] = sender.given_by_type.get(trust_type, 0) + amount
+
+        recipient = self._account(self.interner.intern(data.get("recipient", "")))
+        recipient.received += amount
+        recipient.trst_staked_received += staked
+        recipient.received_by_type[trust_type] = recipient.received_by_type.get(trust_type, 0) + amount
+
+    def merge(self, other: "TrustLedger", keys: Optional[Sequence[int]] = None):
+        """Add another ledger's confirmed totals to this one's (pending
+        gifts are not merged)
+
+        Args:
+            other: Ledger to add
+            keys: This ledger's key for each of the other ledger's keys,
+                when they use different interners (looked up by account
+                ID if not given)
+        """
+        for key, theirs in other.accounts.items():
+            if keys is not None:
+                key = keys[key]
+            elif other.interner is not self.interner:
+                key = self.interner.intern(other.interner.account_id(key))
+            account = self._account(key)
+            account.given += theirs.given
+            account.received += theirs.received
+            account.trst_staked_given += theirs.trst_staked_given
+            account.trst_staked_received += theirs.trst_staked_received
+            for trust_type, amount in theirs.given_by_type.items():
+                account.given_by_type[trust_type] = account.given_by_type.get(trust_type, 0) + amount
+            for trust_type, amount in theirs.received_by_type.items():
+                account.received_by_type[trust_type] = account.received_by_type.get(trust_type, 0) + amount
+
+    def add_pending(self, transaction_id: str, sender: str, recipient: str, amount: int = 1):
+        """Count a submitted gift before it is confirmed"""
+        if transaction_id in self._pending:
+            return
+        sender_key, recipient_key = self.interner.intern(sender), self.interner.intern(recipient)
+        self._pending[transaction_id] = _PendingGift(sender_key, recipient_key, amount)
+        self._pending_given[sender_key] = self._pending_given.get(sender_key, 0) + amount
+        self._pending_received[recipient_key] = self._pending_received.get(recipient_key, 0) + amount
+
+    def discard_pending(self, transaction_id: str):
+        """Drop a pending gift (confirmed, or failed to submit)"""
+        gift = self._pending.pop(transaction_id, None)
+        if gift is None:
+            return
+        self._release(self._pending_given, gift.sender, gift.amount)
+        self._release(self._pending_received, gift.recipient, gift.amount)
+
+    def balance(self, account_id: str, include_pending: bool = True) -> int:
+        """Trust tokens received by an account"""
+        key = self.interner.key(account_id)
+        account = self.accounts.get(key)
+        balance = account.received if account else 0
+        if include_pending:
+            balance += self._pending_received.get(key, 0)
+        return balance
+
+    def given(self, account_id: str, include_pending: bool = True) -> int:
+        """Trust tokens given by an account"""
+        key = self.interner.key(account_id)
+        account = self.accounts.get(key)
+        given = account.given if account else 0
+        if include_pending:
+            given += self._pending_given.get(key, 0)
+        return given
+
+    def account(self, account_id: str) -> Optional[LedgerAccount]:
+        """Confirmed totals of an account, if it has any"""
+        return self.accounts.get(self.interner.key(account_id))
+
+    def summary(self, account_id: str) -> Dict[str, Any]:
+        """Confirmed totals plus pending counts, for display"""
+        key = self.interner.key(account_id)
+        account = self.accounts.get(key) or LedgerAccount()
+        return {
+            "account_id": account_id,
+            "balance": account.received,
+            "given": account.given,
+            "trst_staked_given": account.trst_staked_given,
+            "trst_staked_received": account.trst_staked_received,
+            "given_by_type": dict(account.given_by_type),
+            "received_by_type": dict(account.received_by_type),
+            "pending_received": self._pending_received.get(key, 0),
+            "pending_given": self._pending_given.get(key, 0)
+        }
+
+    def snapshot(self) -> Dict[int, Any]:
+        """Confirmed totals as plain data, by account key (pending gifts
+        stay process-local)"""
+        return {
+            key: [
+                account.given, account.received,
+                account.trst_staked_given, account.trst_staked_received,
+                account.given_by_type, account.received_by_type
+            ]
+            for key, account in self.accounts.items()
+        }
+
+    def restore(self, snapshot: Dict[int, Any], pending: Iterable[Tuple[str, str, str, int]] = ()):
+        """Replace the confirmed totals with a snapshot's (keys must match
+        the interner's)
+
+        Args:
+            snapshot: Confirmed totals by account key
+            pending: Pending gifts to keep, from pending_gifts() called
+                before the interner was restored
+        """
+        self.accounts = {
+            key: LedgerAccount(*values) for key, values in snapshot.items()
+        }
+        self._pending, self._pending_given, self._pending_received = {}, {}, {}
+        for gift in pending:
+            self.add_pending(*gift)
+
+    def pending_gifts(self) -> List[Tuple[str, str, str, int]]:
+        """(transaction_id, sender, recipient, amount) of every pending gift"""
+        account_id = self.interner.account_id
+        return [
+            (transaction_id, account_id(gift.sender), account_id(gift.recipient), gift.amount)
+            for transaction_id, gift in self._pending.items()
+        ]
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def _account(self, key: int) -> LedgerAccount:
+        account = self.accounts.get(key)
+        if account is None:
+            account = self.accounts[key] = LedgerAccount()
+        return account
+
+    @staticmethod
+    def _release(counts: Dict[int, int], key: int, amount: int):
+        remaining = counts.get(key, 0) - amount
+        if remaining > 0:
+            counts[key] = remaining
+        else:
+            counts.pop(key, None)
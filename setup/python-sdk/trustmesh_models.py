@@ -0,0 +1,162 @@
+"""
+TrustMesh Data Models
+=====================
+
+Enums and HCS message structures shared by the SDK, the API and the state
+layer: HCS-11 profiles, HCS-20 trust tokens and HCS-5 recognition badges.
+This module has no TrustMesh dependencies and no import side effects, so
+lower layers (e.g. trustmesh_records) can use the models without importing
+the SDK. trustmesh_sdk re-exports everything here.
+
+Timestamps are ISO-8601 strings in UTC; epoch_seconds() reads one the same
+way everywhere, taking a naive timestamp as UTC.
+"""
+
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+def epoch_seconds(timestamp: Optional[str]) -> Optional[float]:
+    """ISO-8601 timestamp to epoch seconds (None if missing; naive
+    timestamps are taken as UTC)"""
+    if not timestamp:
+        return None
+    moment = datetime.fromisoformat(timestamp)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+class TrustType(str, Enum):
+    PERSONAL = "personal"
+    PROFESSIONAL = "professional"
+    COMMUNITY = "community"
+
+class BadgeRarity(str, Enum):
+    COMMON = "common"
+    RARE = "rare"
+    LEGENDARY = "legendary"
+
+class BadgeType(str, Enum):
+    ACHIEVEMENT = "achievement"
+    PERSONALITY = "personality" 
+    SKILL = "skill"
+    CONTRIBUTION = "contribution"
+
+@dataclass
+class TrustMeshProfile:
+    """HCS-11 compliant profile structure"""
+    profile_id: str
+    display_name: str
+    schema_version: str = "1.0"
+    created_at: str = ""
+    updated_at: str = ""
+    
+    # Trust data
+    trust_score: float = 0.0
+    trust_tokens_given: int = 0
+    trust_tokens_received: int = 0
+    total_trst_staked: float = 0.0
+    
+    # Badge data
+    badges_earned: List[str] = None
+    badge_count: int = 0
+    
+    # Reputation data
+    reputation_breakdown: Dict[str, float] = None
+    connections: List[str] = None
+    
+    # Preferences
+    visibility: str = "public"
+    allow_trust_requests: bool = True
+    show_trust_score: bool = True
+    
+    def __post_init__(self):
+        if not self.created_at:
+            self.created_at = datetime.now(timezone.utc).isoformat()
+        if not self.updated_at:
+            self.updated_at = self.created_at
+        if self.badges_earned is None:
+            self.badges_earned = []
+        if self.reputation_breakdown is None:
+            self.reputation_breakdown = {
+                "reliability": 0.0,
+                "collaboration": 0.0, 
+                "leadership": 0.0
+            }
+        if self.connections is None:
+            self.connections = []
+
+@dataclass  
+class TrustToken:
+    """HCS-20 compliant trust token structure"""
+    transaction_id: str
+    transaction_type: str = "TRANSFER"
+    point_type: str = "TRUST_TOKEN"
+    amount: int = 1
+    
+    sender: str = ""
+    recipient: str = ""
+    
+    timestamp: str = ""
+    context: str = ""
+    expires_at: Optional[str] = None
+    
+    # Trust metadata
+    trust_type: TrustType = TrustType.PERSONAL
+    relationship: str = ""
+    trst_staked: float = 0.0
+    
+    # Audit data
+    previous_balance: int = 0
+    new_balance: int = 0
+    transaction_hash: str = ""
+    signature: str = ""
+    
+    def __post_init__(self):
+        if not self.timestamp:
+            self.timestamp = datetime.now(timezone.utc).isoformat()
+        if not self.transaction_hash:
+            self.transaction_hash = self._generate_hash()
+            
+    def _generate_hash(self) -> str:
+        """Generate transaction hash"""
+        data = f"{self.transaction_id}:{self.sender}:{self.recipient}:{self.timestamp}"
+        return hashlib.sha256(data.encode()).hexdigest()
+
+@dataclass
+class RecognitionBadge:
+    """HCS-5 compliant badge structure"""
+    hashinal_id: str
+    name: str
+    description: str
+    
+    badge_type: BadgeType = BadgeType.ACHIEVEMENT
+    category: str = ""
+    rarity: BadgeRarity = BadgeRarity.COMMON
+    
+    recipient: str = ""
+    issued_by: str = ""
+    issued_at: str = ""
+    
+    # Visual design
+    background_color: str = "#95A5A6"
+    icon_url: str = ""
+    border_style: str = "silver"
+    
+    # Gamification
+    points: int = 25
+    level: int = 1
+    achievements: List[str] = None
+    
+    # Context
+    issuance_context: Dict[str, Any] = None
+    
+    def __post_init__(self):
+        if not self.issued_at:
+            self.issued_at = datetime.now(timezone.utc).isoformat()
+        if self.achievements is None:
+            self.achievements = []
+        if self.issuance_context is None:
+            self.issuance_context = {}
@@ -0,0 +1,272 @@
+"""
+TrustMesh Submission Outbox
+===========================
+
+Durable write-ahead outbox for SDK submissions. Every envelope is written to
+a local SQLite database before anything goes to the network; background
+workers then drain the outbox and mark each entry confirmed once its
+consensus receipt arrives, resending with exponential backoff on failure.
+Workers only send: receipts are awaited by a task per entry, so how many
+submissions are in flight is bounded by send() (the SDK's in-flight
+window), not by the number of workers. Entries still
+pending when the process stops are picked up again by start(), so delivery
+is at-least-once; each resumed entry's receipt future is handed to
+on_resumed, so the caller settles it like one submitted in this run.
+
+SQLite runs with synchronous=FULL, so every write waits for the disk. All
+database calls therefore go to one writer thread, which owns the
+connection, and the event loop never blocks on a sync.
+"""
+
+import asyncio
+import json
+import random
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple, Union
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = "pending"
+STATUS_CONFIRMED = "confirmed"
+STATUS_FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    operation_id TEXT,
+    topic_id TEXT NOT NULL,
+    message TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS outbox_status ON outbox (status, id);
+"""
+
+class SubmissionOutbox:
+    """SQLite-backed outbox drained by background submission workers"""
+
+    def __init__(
+        self,
+        path: str,
+        send: Callable[[str, Dict[str, Any]], Awaitable[asyncio.Future]],
+        workers: int = 4,
+        max_attempts: int = 10,
+        base_backoff_seconds: float = 0.5,
+        max_backoff_seconds: float = 30.0,
+        retention_seconds: float = 86400.0
+    ):
+        """Initialize the outbox
+
+        Args:
+            path: SQLite database file
+            send: Coroutine that submits an envelope to a topic and returns a
+                future for its consensus receipt
+            workers: Number of entries sent concurrently
+            max_attempts: Give up on an entry after this many failed sends
+            base_backoff_seconds: First retry delay, doubled on each attempt
+            max_backoff_seconds: Upper bound for the retry delay
+            retention_seconds: Confirmed entries older than this are pruned
+                on start()
+        """
+        self.path = path
+        self._send = send
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.base_backoff_seconds = base_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.retention_seconds = retention_seconds
+
+        # The connection is only used on the writer thread
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="outbox")
+        self._db: Optional[sqlite3.Connection] = None
+        self._writer.submit(self._open).result()
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._settling: Set[asyncio.Task] = set()
+        self._futures: Dict[int, asyncio.Future] = {}
+        # Called with (operation_id, message, receipt future) for every
+        # entry start() resumes from a previous run
+        self.on_resumed: Optional[Callable[[Optional[str], Dict[str, Any], asyncio.Future], None]] = None
+
+    async def start(self) -> int:
+        """Start the workers and resume entries left pending by a previous run
+
+        Returns:
+            Number of pending entries resumed
+        """
+        if self._queue is not None:
+            return 0
+        self._queue = asyncio.Queue()
+
+        pending = await self._call(self._resume)
+        loop = asyncio.get_running_loop()
+        for entry_id, operation_id, message_json in pending:
+            future = self._futures[entry_id] = loop.create_future()
+            if self.on_resumed is not None:
+                self.on_resumed(operation_id, json.loads(message_json), future)
+            self._queue.put_nowait(entry_id)
+
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+        if pending:
+            logger.info(f"📦 Resuming {len(pending)} pending outbox entries")
+        return len(pending)
+
+    async def submit(
+        self,
+        topic_id: str,
+        message: Dict[str, Any],
+        operation_id: Optional[str] = None
+    ) -> asyncio.Future:
+        """Durably record an envelope and queue it for delivery
+
+        Returns:
+            Future resolving to the consensus receipt once delivered
+        """
+        await self.start()
+
+        now = time.time()
+        entry_id = await self._call(
+            self._insert,
+            "INSERT INTO outbox (operation_id, topic_id, message, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (operation_id, topic_id, json.dumps(message), now, now)
+        )
+
+        future = asyncio.get_running_loop().create_future()
+        self._futures[entry_id] = future
+        self._queue.put_nowait(entry_id)
+        return future
+
+    async def drain(self):
+        """Wait until every queued entry has been confirmed or given up on"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self):
+        """Stop the workers and close the database; pending entries persist"""
+        tasks = self._tasks + list(self._settling)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        await self._call(self._db.close)
+        self._writer.shutdown()
+
+    async def stats(self) -> Dict[str, int]:
+        """Count entries by status"""
+        counts = {STATUS_PENDING: 0, STATUS_CONFIRMED: 0, STATUS_FAILED: 0}
+        counts.update(await self._call(
+            self._fetch_all, "SELECT status, COUNT(*) FROM outbox GROUP BY status", ()
+        ))
+        return counts
+
+    async def _worker(self):
+        """Send queued entries without waiting for their receipts"""
+        while True:
+            entry_id = await self._queue.get()
+            try:
+                row = await self._call(
+                    self._fetch_one,
+                    "SELECT topic_id, message, attempts FROM outbox WHERE id = ? AND status = ?",
+                    (entry_id, STATUS_PENDING)
+                )
+            except Exception as e:
+                logger.error(f"❌ Outbox worker error on entry {entry_id}: {e}")
+                row = None
+            if row is None:
+                self._queue.task_done()
+                continue
+
+            topic_id, message_json, attempts = row
+            try:
+                sent = await self._send(topic_id, json.loads(message_json))
+            except Exception as e:
+                sent = e
+            task = asyncio.ensure_future(self._settle(entry_id, attempts, sent))
+            self._settling.add(task)
+            task.add_done_callback(self._settling.discard)
+
+    async def _settle(self, entry_id: int, attempts: int, sent: Union[asyncio.Future, Exception]):
+        """Record an entry's outcome once its receipt resolves, queueing it
+        again after a backoff if the send or the receipt failed"""
+        try:
+            try:
+                if isinstance(sent, Exception):
+                    raise sent
+                receipt = await sent
+            except Exception as e:
+                attempts += 1
+                status = STATUS_FAILED if attempts >= self.max_attempts else STATUS_PENDING
+                await self._call(
+                    self._execute,
+                    "UPDATE outbox SET attempts = ?, last_error = ?, status = ?, updated_at = ? "
+                    "WHERE id = ?",
+                    (attempts, str(e), status, time.time(), entry_id)
+                )
+                if status == STATUS_FAILED:
+                    logger.error(f"❌ Outbox entry {entry_id} failed after {attempts} attempts: {e}")
+                    future = self._futures.pop(entry_id, None)
+                    if future and not future.done():
+                        future.set_exception(e)
+                    return
+
+                delay = min(self.base_backoff_seconds * 2 ** (attempts - 1), self.max_backoff_seconds)
+                await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+                # Queued again before this delivery is marked done, so drain() keeps waiting
+                self._queue.put_nowait(entry_id)
+                return
+
+            await self._call(
+                self._execute,
+                "UPDATE outbox SET attempts = ?, status = ?, updated_at = ? WHERE id = ?",
+                (attempts + 1, STATUS_CONFIRMED, time.time(), entry_id)
+            )
+            future = self._futures.pop(entry_id, None)
+            if future and not future.done():
+                future.set_result(receipt)
+        except Exception as e:
+            logger.error(f"❌ Outbox error settling entry {entry_id}: {e}")
+        finally:
+            self._queue.task_done()
+
+    # Database calls (run on the writer thread)
+
+    async def _call(self, function: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._writer, function, *args)
+
+    def _open(self):
+        self._db = sqlite3.connect(self.path, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.executescript(_SCHEMA)
+
+    def _resume(self) -> List[Tuple[int, Optional[str], str]]:
+        """Prune old confirmed entries and list the pending ones"""
+        self._db.execute(
+            "DELETE FROM outbox WHERE status = ? AND updated_at < ?",
+            (STATUS_CONFIRMED, time.time() - self.retention_seconds)
+        )
+        return self._db.execute(
+            "SELECT id, operation_id, message FROM outbox WHERE status = ? ORDER BY id", (STATUS_PENDING,)
+        ).fetchall()
+
+    def _insert(self, sql: str, parameters: tuple) -> int:
+        return self._db.execute(sql, parameters).lastrowid
+
+    def _execute(self, sql: str, parameters: tuple):
+        self._db.execute(sql, parameters)
+
+    def _fetch_one(self, sql: str, parameters: tuple) -> Optional[tuple]:
+        return self._db.execute(sql, parameters).fetchone()
+
+    def _fetch_all(self, sql: str, parameters: tuple) -> List[tuple]:
+        return self._db.execute(sql, parameters).fetchall()
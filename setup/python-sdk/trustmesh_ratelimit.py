@@ -0,0 +1,167 @@
+"""
+TrustMesh Submission Rate Limiting
+==================================
+
+Adaptive token-bucket rate limiter for HCS submissions. Each key (a topic,
+an operator account, ...) gets its own bucket. Rates follow an AIMD policy:
+every successful submission nudges the rate up by roughly
+`additive_increase` messages/second per second, and every BUSY/throttle
+response halves it and pauses the bucket for a jittered exponential backoff.
+Sustained throughput therefore settles just under the network's ceiling
+instead of oscillating between saturation and error storms.
+"""
+
+import asyncio
+import random
+import time
+from typing import Any, Dict, Hashable
+
+THROTTLE_STATUSES = (
+    "BUSY",
+    "THROTTLED_AT_CONSENSUS",
+    "PLATFORM_TRANSACTION_NOT_CREATED",
+    "PLATFORM_NOT_ACTIVE",
+)
+
+def is_throttle_error(error: Exception) -> bool:
+    """Check whether a submission error is the network pushing back"""
+    message = str(error)
+    return any(status in message for status in THROTTLE_STATUSES)
+
+class _Bucket:
+    """Token bucket with an adjustable refill rate"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.consecutive_throttles = 0
+        self.submitted = 0
+        self.throttled = 0
+
+    def refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until this bucket can hand out a token"""
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+class AdaptiveRateLimiter:
+    """Per-key token buckets that adapt to network throttling"""
+
+    def __init__(
+        self,
+        initial_rate: float = 50.0,
+        min_rate: float = 1.0,
+        max_rate: float = 1000.0,
+        burst_seconds: float = 1.0,
+        additive_increase: float = 5.0,
+        decrease_factor: float = 0.5,
+        base_backoff_seconds: float = 0.25,
+        max_backoff_seconds: float = 10.0
+    ):
+        """Initialize the limiter
+
+        Args:
+            initial_rate: Starting rate for a new key, messages/second
+            min_rate: Floor the rate never drops below
+            max_rate: Ceiling the rate never ramps above
+            burst_seconds: Bucket capacity, in seconds of traffic at the
+                current rate
+            additive_increase: Rate gained per second of clean submissions
+            decrease_factor: Rate multiplier applied on each throttle
+            base_backoff_seconds: Pause after the first throttle, doubled on
+                each consecutive throttle
+            max_backoff_seconds: Upper bound for the pause
+        """
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst_seconds = burst_seconds
+        self.additive_increase = additive_increase
+        self.decrease_factor = decrease_factor
+        self.base_backoff_seconds = base_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+
+        self._buckets: Dict[Hashable, _Bucket] = {}
+
+    async def acquire(self, *keys: Hashable):
+        """Wait until every key's bucket has a token, then take one from each"""
+        buckets = [self._bucket(key) for key in keys]
+        while True:
+            now = time.monotonic()
+            for bucket in buckets:
+                bucket.refill(now)
+            wait = max((bucket.wait_time(now) for bucket in buckets), default=0.0)
+            if wait <= 0:
+                for bucket in buckets:
+                    bucket.tokens -= 1
+                    bucket.submitted += 1
+                return
+            await asyncio.sleep(wait)
+
+    def on_success(self, *keys: Hashable):
+        """Ramp rates back up after an accepted submission"""
+        for key in keys:
+            bucket = self._bucket(key)
+            bucket.consecutive_throttles = 0
+            bucket.rate = min(self.max_rate, bucket.rate + self.additive_increase / bucket.rate)
+            bucket.burst = max(1.0, bucket.rate * self.burst_seconds)
+
+    def on_throttle(self, *keys: Hashable) -> float:
+        """Back off after a BUSY/throttle response
+
+        Returns:
+            Jittered delay to wait before retrying, in seconds
+        """
+        now = time.monotonic()
+        delay = 0.0
+        for key in keys:
+            bucket = self._bucket(key)
+            bucket.throttled += 1
+            bucket.consecutive_throttles += 1
+            bucket.rate = max(self.min_rate, bucket.rate * self.decrease_factor)
+            bucket.burst = max(1.0, bucket.rate * self.burst_seconds)
+            bucket.tokens = min(bucket.tokens, 0.0)
+
+            backoff = min(
+                self.base_backoff_seconds * 2 ** (bucket.consecutive_throttles - 1),
+                self.max_backoff_seconds
+            )
+            bucket_delay = random.uniform(backoff / 2, backoff)
+            bucket.paused_until = max(bucket.paused_until, now + bucket_delay)
+            delay = max(delay, bucket_delay)
+        return delay
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Current limiter state per key, for monitoring"""
+        now = time.monotonic()
+        return {
+            _key_name(key): {
+                "rate": round(bucket.rate, 2),
+                "tokens": round(bucket.tokens, 2),
+                "paused_for": round(max(0.0, bucket.paused_until - now), 3),
+                "submitted": bucket.submitted,
+                "throttled": bucket.throttled
+            }
+            for key, bucket in self._buckets.items()
+        }
+
+    def _bucket(self, key: Hashable) -> _Bucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            rate = self.initial_rate
+            bucket = self._buckets[key] = _Bucket(rate, max(1.0, rate * self.burst_seconds))
+        return bucket
+
+def _key_name(key: Hashable) -> str:
+    if isinstance(key, tuple):
+        return ":".join(str(part) for part in key)
+    return str(key)
@@ -0,0 +1,477 @@
+"""
+TrustMesh Compact Records
+=========================
+
+Memory-lean forms of the TrustToken, RecognitionBadge and TrustMeshProfile
+models, for holding the network's whole history in RAM. The record classes
+use __slots__, store timestamps as integer epoch microseconds (UTC), enums
+as small integer codes and empty lists and dicts as None; repeated strings
+such as account IDs are interned. A token's transaction hash is dropped
+when it can be derived again from the token's other fields.
+
+TokenColumns and BadgeColumns go further and keep one typed array per
+field, with account IDs stored as AccountInterner keys (shareable with the
+state projection, so columns join against the ledger and graph by key) and
+other repeated strings as indexes into a string table. Every form converts
+to and from the dataclasses.
+
+Timestamps are normalized to UTC: converting back gives the same instant
+as an ISO-8601 string with a +00:00 offset, not the original spelling (a
++02:00 offset, or a naive timestamp, comes back rewritten). Tokens whose
+hash was computed over a non-UTC timestamp keep their stored hash.
+"""
+
+import hashlib
+import sys
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from trustmesh_accounts import AccountInterner
+from trustmesh_graph import TRUST_TYPE_CODES, TRUST_TYPES
+from trustmesh_models import (
+    BadgeRarity, BadgeType, RecognitionBadge, TrustMeshProfile, TrustToken, TrustType
+)
+
+# Enum codes stored per record (trust type codes match the trust graph's)
+BADGE_TYPES = tuple(badge_type.value for badge_type in BadgeType)
+BADGE_TYPE_CODES = {badge_type: code for code, badge_type in enumerate(BADGE_TYPES)}
+BADGE_RARITIES = tuple(rarity.value for rarity in BadgeRarity)
+BADGE_RARITY_CODES = {rarity: code for code, rarity in enumerate(BADGE_RARITIES)}
+
+# Reputation breakdown a new profile starts with (stored as None)
+_DEFAULT_BREAKDOWN = {"reliability": 0.0, "collaboration": 0.0, "leadership": 0.0}
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+def to_epoch_micros(timestamp: Optional[str]) -> int:
+    """ISO-8601 timestamp to epoch microseconds (0 if missing; naive
+    timestamps are taken as UTC)"""
+    if not timestamp:
+        return 0
+    moment = datetime.fromisoformat(timestamp)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return (moment - _EPOCH) // _MICROSECOND
+
+def from_epoch_micros(micros: int, missing: Optional[str] = "") -> Optional[str]:
+    """Epoch microseconds back to an ISO-8601 timestamp, always in UTC
+    (the original offset is not kept)"""
+    if not micros:
+        return missing
+    return (_EPOCH + timedelta(microseconds=micros)).isoformat()
+
+class _Record:
+    """Base of the slotted records: positional construction in slot order"""
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def __eq__(self, other) -> bool:
+        return type(other) is type(self) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+        )
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+class TokenRecord(_Record):
+    """Compact TrustToken"""
+    __slots__ = (
+        "transaction_id", "transaction_type", "point_type", "amount",
+        "sender", "recipient", "timestamp", "context", "expires_at",
+        "trust_type", "relationship", "trst_staked",
+        "previous_balance", "new_balance", "transaction_hash", "signature"
+    )
+
+    @classmethod
+    def from_data(cls, data: Mapping[str, Any]) -> "TokenRecord":
+        """Record of a TrustToken's fields (e.g. a TRUST_TOKEN_GIVEN event's data)"""
+        transaction_id = data.get("transaction_id", "")
+        sender = _intern(data.get("sender", ""))
+        recipient = _intern(data.get("recipient", ""))
+        timestamp = to_epoch_micros(data.get("timestamp"))
+        transaction_hash = data.get("transaction_hash", "")
+        if transaction_hash == _token_hash(transaction_id, sender, recipient, from_epoch_micros(timestamp)):
+            transaction_hash = None
+        return cls(
+            transaction_id,
+            _intern(data.get("transaction_type", "TRANSFER")),
+            _intern(data.get("point_type", "TRUST_TOKEN")),
+            data.get("amount", 1),
+            sender,
+            recipient,
+            timestamp,
+            data.get("context", ""),
+            to_epoch_micros(data.get("expires_at")),
+            _code(TRUST_TYPE_CODES, data.get("trust_type", "personal"), "trust type"),
+            _intern(data.get("relationship", "")),
+            data.get("trst_staked", 0.0),
+            data.get("previous_balance", 0),
+            data.get("new_balance", 0),
+            transaction_hash,
+            data.get("signature", "")
+        )
+
+    @classmethod
+    def from_dataclass(cls, token: TrustToken) -> "TokenRecord":
+        return cls.from_data(vars(token))
+
+    def to_dataclass(self) -> TrustToken:
+        return TrustToken(
+            transaction_id=self.transaction_id,
+            transaction_type=self.transaction_type,
+            point_type=self.point_type,
+            amount=self.amount,
+            sender=self.sender,
+            recipient=self.recipient,
+            timestamp=from_epoch_micros(self.timestamp),
+            context=self.context,
+            expires_at=from_epoch_micros(self.expires_at, None),
+            trust_type=TrustType(TRUST_TYPES[self.trust_type]),
+            relationship=self.relationship,
+            trst_staked=self.trst_staked,
+            previous_balance=self.previous_balance,
+            new_balance=self.new_balance,
+            # An empty hash is derived again by TrustToken.__post_init__
+            transaction_hash=self.transaction_hash or "",
+            signature=self.signature
+        )
+
+class BadgeRecord(_Record):
+    """Compact RecognitionBadge"""
+    __slots__ = (
+        "hashinal_id", "name", "description", "badge_type", "category", "rarity",
+        "recipient", "issued_by", "issued_at",
+        "background_color", "icon_url", "border_style",
+        "points", "level", "achievements", "issuance_context"
+    )
+
+    @classmethod
+    def from_data(cls, data: Mapping[str, Any]) -> "BadgeRecord":
+        """Record of a RecognitionBadge's fields (e.g. a BADGE_ISSUED event's data)"""
+        return cls(
+            data.get("hashinal_id", ""),
+            _intern(data.get("name", "")),
+            data.get("description", ""),
+            _code(BADGE_TYPE_CODES, data.get("badge_type", "achievement"), "badge type"),
+            _intern(data.get("category", "")),
+            _code(BADGE_RARITY_CODES, data.get("rarity", "common"), "badge rarity"),
+            _intern(data.get("recipient", "")),
+            _intern(data.get("issued_by", "")),
+            to_epoch_micros(data.get("issued_at")),
+            _intern(data.get("background_color", "#95A5A6")),
+            _intern(data.get("icon_url", "")),
+            _intern(data.get("border_style", "silver")),
+            data.get("points", 25),
+            data.get("level", 1),
+            _strings(data.get("achievements")),
+            dict(data["issuance_context"]) if data.get("issuance_context") else None
+        )
+
+    @classmethod
+    def from_dataclass(cls, badge: RecognitionBadge) -> "BadgeRecord":
+        return cls.from_data(vars(badge))
+
+    def to_dataclass(self) -> RecognitionBadge:
+        return RecognitionBadge(
+            hashinal_id=self.hashinal_id,
+            name=self.name,
+            description=self.description,
+            badge_type=BadgeType(BADGE_TYPES[self.badge_type]),
+            category=self.category,
+            rarity=BadgeRarity(BADGE_RARITIES[self.rarity]),
+            recipient=self.recipient,
+            issued_by=self.issued_by,
+            issued_at=from_epoch_micros(self.issued_at),
+            background_color=self.background_color,
+            icon_url=self.icon_url,
+            border_style=self.border_style,
+            points=self.points,
+            level=self.level,
+            achievements=list(self.achievements or ()),
+            issuance_context=dict(self.issuance_context or {})
+        )
+
+class ProfileRecord(_Record):
+    """Compact TrustMeshProfile"""
+    __slots__ = (
+        "profile_id", "display_name", "schema_version", "created_at", "updated_at",
+        "trust_score", "trust_tokens_given", "trust_tokens_received", "total_trst_staked",
+        "badges_earned", "badge_count", "reputation_breakdown", "connections",
+        "visibility", "allow_trust_requests", "show_trust_score"
+    )
+
+    @classmethod
+    def from_data(cls, data: Mapping[str, Any]) -> "ProfileRecord":
+        """Record of a TrustMeshProfile's fields (e.g. a PROFILE_CREATE event's data)"""
+        breakdown = data.get("reputation_breakdown")
+        return cls(
+            _intern(data.get("profile_id", "")),
+            data.get("display_name", ""),
+            _intern(data.get("schema_version", "1.0")),
+            to_epoch_micros(data.get("created_at")),
+            to_epoch_micros(data.get("updated_at")),
+            data.get("trust_score", 0.0),
+            data.get("trust_tokens_given", 0),
+            data.get("trust_tokens_received", 0),
+            data.get("total_trst_staked", 0.0),
+            _strings(data.get("badges_earned")),
+            data.get("badge_count", 0),
+            None if breakdown is None or breakdown == _DEFAULT_BREAKDOWN else dict(breakdown),
+            _strings(data.get("connections")),
+            _intern(data.get("visibility", "public")),
+            data.get("allow_trust_requests", True),
+            data.get("show_trust_score", True)
+        )
+
+    @classmethod
+    def from_dataclass(cls, profile: TrustMeshProfile) -> "ProfileRecord":
+        return cls.from_data(vars(profile))
+
+    def to_dataclass(self) -> TrustMeshProfile:
+        return TrustMeshProfile(
+            profile_id=self.profile_id,
+            display_name=self.display_name,
+            schema_version=self.schema_version,
+            created_at=from_epoch_micros(self.created_at),
+            updated_at=from_epoch_micros(self.updated_at),
+            trust_score=self.trust_score,
+            trust_tokens_given=self.trust_tokens_given,
+            trust_tokens_received=self.trust_tokens_received,
+            total_trst_staked=self.total_trst_staked,
+            badges_earned=list(self.badges_earned or ()),
+            badge_count=self.badge_count,
+            reputation_breakdown=(
+                None if self.reputation_breakdown is None else dict(self.reputation_breakdown)
+            ),
+            connections=list(self.connections or ()),
+            visibility=self.visibility,
+            allow_trust_requests=self.allow_trust_requests,
+            show_trust_score=self.show_trust_score
+        )
+
+# Column storage kinds besides array typecodes: an account key, an index
+# into the string table, UTF-8 text packed into one buffer, or a
+# {row: value} dict of the rows that have a value
+_ACCOUNT, _INTERNED, _TEXT, _SPARSE = "account", "interned", "text", "sparse"
+
+class _TextColumn:
+    """Strings packed end to end as UTF-8, with each row's end offset"""
+    __slots__ = ("data", "ends")
+
+    def __init__(self):
+        self.data = bytearray()
+        self.ends = array("q")
+
+    def append(self, value: str):
+        self.data += value.encode()
+        self.ends.append(len(self.data))
+
+    def __getitem__(self, row: int) -> str:
+        start = self.ends[row - 1] if row else 0
+        return self.data[start:self.ends[row]].decode()
+
+    def __len__(self) -> int:
+        return len(self.ends)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.data) + self.ends.itemsize * len(self.ends)
+
+class _Columns:
+    """Records of one type stored column-wise (see TokenColumns)"""
+    _record = _Record
+    # Storage kind of each of the record's slots
+    _layout: Dict[str, str] = {}
+    # Value of a sparse column's rows that have none
+    _missing: Dict[str, Any] = {}
+
+    def __init__(self, interner: Optional[AccountInterner] = None):
+        """Initialize empty columns
+
+        Args:
+            interner: Keys of the account columns (a private one by default)
+        """
+        self.interner = interner if interner is not None else AccountInterner()
+        self.strings: List[str] = []
+        self._string_ids: Dict[str, int] = {}
+        self._columns: Dict[str, Any] = {}
+        for name in self._record.__slots__:
+            kind = self._layout[name]
+            if kind == _TEXT:
+                self._columns[name] = _TextColumn()
+            elif kind == _SPARSE:
+                self._columns[name] = {}
+            else:
+                self._columns[name] = array("i" if kind in (_ACCOUNT, _INTERNED) else kind)
+        self.rows = 0
+
+    @classmethod
+    def from_dataclasses(
+        cls, items: Iterable[Any], interner: Optional[AccountInterner] = None
+    ) -> "_Columns":
+        columns = cls(interner)
+        columns.extend(items)
+        return columns
+
+    def append(self, item: Any):
+        """Append a dataclass instance"""
+        self.append_record(self._record.from_dataclass(item))
+
+    def extend(self, items: Iterable[Any]):
+        for item in items:
+            self.append(item)
+
+    def append_data(self, data: Mapping[str, Any]):
+        """Append the fields of an event's data"""
+        self.append_record(self._record.from_data(data))
+
+    def append_record(self, record: _Record):
+        row = self.rows
+        for name in record.__slots__:
+            value, kind, column = getattr(record, name), self._layout[name], self._columns[name]
+            if kind == _ACCOUNT:
+                column.append(self.interner.intern(value))
+            elif kind == _INTERNED:
+                column.append(self._string_id(value))
+            elif kind == _SPARSE:
+                if value != self._missing.get(name):
+                    column[row] = value
+            else:
+                column.append(value)
+        self.rows += 1
+
+    def record(self, row: int) -> _Record:
+        """Compact record of one row"""
+        if row < 0:
+            row += self.rows
+        if not 0 <= row < self.rows:
+            raise IndexError(f"Row {row} out of range")
+        values = []
+        for name in self._record.__slots__:
+            kind, column = self._layout[name], self._columns[name]
+            if kind == _ACCOUNT:
+                values.append(self.interner.account_id(column[row]))
+            elif kind == _INTERNED:
+                values.append(self.strings[column[row]])
+            elif kind == _SPARSE:
+                values.append(column.get(row, self._missing.get(name)))
+            else:
+                values.append(column[row])
+        return self._record(*values)
+
+    def column(self, name: str):
+        """Raw storage of a column: a typed array (account keys or string
+        table indexes for account and interned columns), packed text, or a
+        {row: value} dict for sparse ones. Typed arrays can be viewed
+        without copying with numpy.frombuffer()."""
+        return self._columns[name]
+
+    def to_dataclasses(self) -> List[Any]:
+        return list(self)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "strings": len(self.strings),
+            "array_bytes": sum(
+                column.itemsize * len(column) if isinstance(column, array) else column.nbytes
+                for column in self._columns.values() if not isinstance(column, dict)
+            )
+        }
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __getitem__(self, row: int) -> Any:
+        return self.record(row).to_dataclass()
+
+    def __iter__(self) -> Iterator[Any]:
+        for row in range(self.rows):
+            yield self.record(row).to_dataclass()
+
+    def _string_id(self, value: str) -> int:
+        string_id = self._string_ids.get(value)
+        if string_id is None:
+            string_id = self._string_ids[value] = len(self.strings)
+            self.strings.append(value)
+        return string_id
+
+class TokenColumns(_Columns):
+    """Trust tokens in typed arrays, one per field
+
+    Senders and recipients are account keys, relationships and the HCS-20
+    transaction/point types string table indexes; signatures and
+    transaction hashes that cannot be derived are held only for the rows
+    that have them.
+    """
+    _record = TokenRecord
+    _layout = {
+        "transaction_id": _TEXT,
+        "transaction_type": _INTERNED,
+        "point_type": _INTERNED,
+        "amount": "q",
+        "sender": _ACCOUNT,
+        "recipient": _ACCOUNT,
+        "timestamp": "q",
+        "context": _TEXT,
+        "expires_at": "q",
+        "trust_type": "b",
+        "relationship": _INTERNED,
+        "trst_staked": "d",
+        "previous_balance": "q",
+        "new_balance": "q",
+        "transaction_hash": _SPARSE,
+        "signature": _SPARSE
+    }
+    _missing = {"transaction_hash": None, "signature": ""}
+
+class BadgeColumns(_Columns):
+    """Recognition badges in typed arrays, one per field
+
+    Recipients and issuers are account keys, names, categories and the
+    visual design fields string table indexes; achievements and issuance
+    context are held only for the rows that have them.
+    """
+    _record = BadgeRecord
+    _layout = {
+        "hashinal_id": _TEXT,
+        "name": _INTERNED,
+        "description": _TEXT,
+        "badge_type": "b",
+        "category": _INTERNED,
+        "rarity": "b",
+        "recipient": _ACCOUNT,
+        "issued_by": _ACCOUNT,
+        "issued_at": "q",
+        "background_color": _INTERNED,
+        "icon_url": _INTERNED,
+        "border_style": _INTERNED,
+        "points": "q",
+        "level": "q",
+        "achievements": _SPARSE,
+        "issuance_context": _SPARSE
+    }
+    _missing = {"achievements": None, "issuance_context": None}
+
+def _token_hash(transaction_id: str, sender: str, recipient: str, timestamp: str) -> str:
+    """Transaction hash TrustToken derives from its fields"""
+    return hashlib.sha256(f"{transaction_id}:{sender}:{recipient}:{timestamp}".encode()).hexdigest()
+
+def _code(codes: Dict[str, int], value: Any, kind: str) -> int:
+    code = codes.get(getattr(value, "value", value))
+    if code is None:
+        raise ValueError(f"Unknown {kind}: {value!r}")
+    return code
+
+def _intern(value: str) -> str:
+    return sys.intern(value) if type(value) is str else value
+
+def _strings(values: Optional[Iterable[str]]) -> Optional[Tuple[str, ...]]:
+    """Interned tuple of a list of account or badge IDs (None if empty)"""
+    return tuple(_intern(value) for value in values) if values else None
@@ -0,0 +1,608 @@
+"""
+TrustMesh Parallel Replay
+=========================
+
+Rebuilds the state projection from the full history of the TrustMesh topics,
+e.g. after a scoring-model change, using every core. Each topic's archive is
+cut into ranges of consecutive messages, and a process pool decodes each
+range (frames, batches, JSON or MessagePack) and pre-aggregates it:
+
+    TRUST_TOKEN_GIVEN       Folded into a partial projection of the range:
+                            ledger totals, users' trust totals, connections
+                            and activity, live circle-of-trust tokens, gifts
+                            with when any revoked in the range were, score history
+                            entries, and graph edges as NumPy columns
+    REPUTATION_CALCULATED   Only each user's latest is kept
+    Anything else           Returned decoded, for the parent to apply
+
+The parent merges the ranges by consensus position (consensus timestamp,
+then place within a batch): decoded events, live tokens, gifts, users' latest
+activity and the first appearance of each account (so accounts get the
+keys a serial replay would give them) are applied in that order across
+all topics, totals are summed and graph edges are sorted into it. A range
+counts every gift, whatever its sender's circle of trust; the parent judges
+each against the sender's circle as of its consensus time and takes those
+past it back out. Only the gifts still counting at the end become graph
+edges.
+Duplicate deliveries are spotted across ranges by a digest of each event's
+key, and a range holding a later copy is aggregated again without it. Chunked messages are reassembled (not
+decoded) while the archive is read, so no message straddles two ranges.
+
+The result matches applying every event one by one in consensus order,
+whatever the range size or scheduling. Votes in polls with a minimum trust
+score are judged against the score rebuilt from the events before them in
+consensus order (see trustmesh_history), never the score a voter reports:
+once every range's score history is merged, the kept ballots are judged
+again, as live ingestion does when an earlier event arrives late.
+"""
+
+import asyncio
+import hashlib
+import heapq
+import os
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from operator import itemgetter
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+
+import logging
+
+from trustmesh_batching import unpack_envelope
+from trustmesh_circle import CIRCLE_OF_TRUST_SIZE
+from trustmesh_codec import ChunkAssembler, decode_message
+from trustmesh_graph import TRUST_TYPE_CODES, event_edge, np
+from trustmesh_history import ScoreHistory
+from trustmesh_ingest import event_key
+from trustmesh_ledger import TrustLedger
+from trustmesh_reputation import score_as_of
+from trustmesh_sharding import ShardRegistry
+from trustmesh_state import TrustGift, TrustMeshState, UserState
+from trustmesh_transport import HCSTransport
+
+logger = logging.getLogger(__name__)
+
+# Kinds of the items merged by consensus position
+_EVENT, _TOKEN, _TOUCH, _ACCOUNT, _GIFT = 0, 1, 2, 3, 4
+
+# Bytes of the event key digests compared across ranges
+_KEY_DIGEST_SIZE = 16
+
+_position = itemgetter(0, 1)
+
+class RangeAggregate:
+    """Decoded and pre-aggregated content of one range of a topic"""
+
+    def __init__(self, topic_id: str):
+        self.topic_id = topic_id
+        # (consensus timestamp, index in message, kind, payload), in order
+        self.items: List[Tuple[int, int, int, Any]] = []
+        # Totals of the range's trust token gifts, by key into accounts
+        self.accounts: List[str] = []
+        self.ledger = TrustLedger()
+        self.users: Dict[int, UserState] = {}
+        self.history = ScoreHistory()
+        # Graph edges as columns, accounts by key into accounts
+        self.edges: Dict[str, Any] = {}
+        # Digests of event keys with their positions, for cross-range dedupe
+        self.keys = b""
+        self.key_positions: List[Tuple[int, int]] = []
+        # SHARD_REGISTRY data with its position
+        self.registries: List[Tuple[int, int, Dict[str, Any]]] = []
+
+        self.messages = 0
+        self.events = 0
+        # Events already applied to the totals above, and dropped
+        # reputation events superseded within the range
+        self.events_applied = 0
+        self.superseded = 0
+        self.duplicates = 0
+        self.decode_errors = 0
+        self.apply_errors = 0
+
+def aggregate_range(
+    topic_id: str,
+    messages: List[Tuple[int, bytes]],
+    skip: FrozenSet[Tuple[int, int]] = frozenset()
+) -> RangeAggregate:
+    """Decode and pre-aggregate consecutive messages of a topic (runs in a
+    pool process)
+
+    Args:
+        topic_id: Topic the messages were read from
+        messages: (consensus timestamp, contents) pairs in consensus order,
+            chunked messages already reassembled
+        skip: Positions of events to drop, being later copies of events
+            seen in other ranges
+
+    Returns:
+        The range's aggregate
+    """
+    part = RangeAggregate(topic_id)
+    # Partial projection the range's gifts are applied to (the parent
+    # applies the circle of trust across ranges)
+    state = TrustMeshState(circle_size=sys.maxsize)
+    state.graph = None
+
+    seen: Set[str] = set()
+    keys: List[bytes] = []
+    gifts: Dict[str, Tuple[int, int, Optional[str]]] = {}
+    # Gifts revoked within the range, with the consensus time they were
+    revoked: Dict[str, Tuple[TrustGift, int]] = {}
+    last_touch: Dict[str, Tuple[int, int, str]] = {}
+    reputation: Dict[str, Tuple[int, int, Dict[str, Any]]] = {}
+    interner = state.interner
+    columns: Tuple[List, ...] = ([], [], [], [], [], [], [], [])
+
+    for timestamp, contents in messages:
+        part.messages += 1
+        try:
+            envelope = decode_message(contents)
+        except Exception:
+            part.decode_errors += 1
+            continue
+
+        for index, event in enumerate(unpack_envelope(envelope)):
+            event_type = event.get("type")
+            data = event.get("data") or {}
+            key = event_key(event)
+            if key:
+                if key in seen or (timestamp, index) in skip:
+                    seen.add(key)
+                    part.duplicates += 1
+                    continue
+                seen.add(key)
+                keys.append(hashlib.blake2b(key.encode(), digest_size=_KEY_DIGEST_SIZE).digest())
+                part.key_positions.append((timestamp, index))
+            part.events += 1
+
+            if event_type == "TRUST_TOKEN_GIVEN":
+                known = len(interner)
+                # A copy under another key is skipped by the state, as live
+                transaction_id = data.get("transaction_id", "")
+                copy = bool(transaction_id) and transaction_id in state.gifts
+                try:
+                    state.apply(event, timestamp)
+                except Exception:
+                    part.apply_errors += 1
+                    continue
+                if copy:
+                    continue
+                if len(interner) > known:
+                    part.items.append((timestamp, index, _ACCOUNT, interner.account_ids[known:]))
+                sender, recipient, trust_type, trst_staked, micros = event_edge(data, event.get("timestamp", ""))
+                gifts.setdefault(transaction_id, (timestamp, index, data.get("expires_at")))
+                last_touch[sender] = (timestamp, index, event.get("timestamp", ""))
+                for column, value in zip(columns, (
+                    interner.key(sender), interner.key(recipient),
+                    TRUST_TYPE_CODES.get(trust_type, 0), trst_staked, micros, timestamp, index,
+                    transaction_id
+                )):
+                    column.append(value)
+            elif event_type == "TRUST_TOKEN_REVOKED" and data.get("transaction_id", "") in state.gifts:
+                # Revokes a gift of this range; others are applied in order by the parent
+                transaction_id = data["transaction_id"]
+                gift = state.gifts[transaction_id]
+                try:
+                    state.apply(event, timestamp)
+                except Exception:
+                    part.apply_errors += 1
+                if transaction_id not in state.gifts:
+                    revoked[transaction_id] = (gift, timestamp)
+            elif event_type == "REPUTATION_CALCULATED":
+                user_id = data.get("user_id", "")
+                if user_id in reputation:
+                    part.superseded += 1
+                else:
+                    # Only the latest is applied, but the user appeared here
+                    part.items.append((timestamp, index, _ACCOUNT, [user_id]))
+                reputation[user_id] = (timestamp, index, event)
+            elif event_type == "SHARD_REGISTRY":
+                part.registries.append((timestamp, index, data))
+            else:
+                part.items.append((timestamp, index, _EVENT, event))
+
+    for transaction_id, (sender, recipient) in state.circle.snapshot()["tokens"].items():
+        timestamp, index, expires_at = gifts[transaction_id]
+        part.items.append((timestamp, index, _TOKEN, (
+            transaction_id, interner.account_id(sender), expires_at, interner.account_id(recipient)
+        )))
+    kept = ((transaction_id, gift, None) for transaction_id, gift in state.gifts.items())
+    for transaction_id, gift, revoked_at in (
+        *kept, *((transaction_id, gift, at) for transaction_id, (gift, at) in revoked.items())
+    ):
+        timestamp, index, _ = gifts[transaction_id]
+        part.items.append((timestamp, index, _GIFT, (
+            transaction_id, interner.account_id(gift.sender), interner.account_id(gift.recipient),
+            gift.amount, gift.trust_level, gift.trst_staked, gift.expires_at, gift.withdrawn,
+            gift.trust_type, gift.given_at, revoked_at
+        )))
+    for user_id, (timestamp, index, stamp) in last_touch.items():
+        part.items.append((timestamp, index, _TOUCH, (user_id, stamp)))
+    for timestamp, index, event in reputation.values():
+        part.items.append((timestamp, index, _EVENT, event))
+    part.items.sort(key=_position)
+
+    part.accounts, part.ledger, part.users = interner.account_ids, state.ledger, state.users
+    part.history = state.history
+    part.events_applied = state.events_applied
+    part.edges = {
+        "source": np.asarray(columns[0], dtype=np.int64),
+        "target": np.asarray(columns[1], dtype=np.int64),
+        "trust_type": np.asarray(columns[2], dtype=np.int8),
+        "trst_staked": np.asarray(columns[3], dtype=np.float64),
+        "timestamp": np.asarray(columns[4], dtype=np.int64),
+        "consensus_timestamp": np.asarray(columns[5], dtype=np.int64),
+        "index": np.asarray(columns[6], dtype=np.int64),
+        "transaction_id": np.asarray(columns[7], dtype=object)
+    }
+    part.keys = b"".join(keys)
+    return part
+
+def _exclude_gift(
+    state: TrustMeshState,
+    transaction_id: str,
+    gift: TrustGift,
+    consensus_timestamp: int,
+    revoked_at: Optional[int]
+):
+    """Take a gift its range counted back out of the trust inputs, its
+    sender's circle of trust having been full, as a serial replay would
+    never have counted it"""
+    state.circle.release(transaction_id)
+    if not gift.withdrawn:
+        receiver = state.user_by_key(gift.recipient)
+        receiver.trust_level_total -= gift.trust_level
+        receiver.tokens_withdrawn += gift.amount
+        receiver.trst_withdrawn += gift.trst_staked
+    # Cancel the score history entries of the gift and of its end
+    state.history.add_received(
+        gift.recipient, consensus_timestamp, -gift.amount, -gift.trust_level, -gift.trst_staked
+    )
+    if revoked_at is not None:
+        ended = revoked_at
+    elif gift.expires_at is not None:
+        ended = max(gift.expires_at, consensus_timestamp)
+    else:
+        return
+    state.history.add_received(gift.recipient, ended, gift.amount, gift.trust_level, gift.trst_staked)
+
+class ParallelReplay:
+    """Rebuilds a TrustMeshState from the topic archives on a process pool"""
+
+    def __init__(
+        self,
+        transport: HCSTransport,
+        topics: Dict[str, str],
+        shards: Optional[ShardRegistry] = None,
+        processes: Optional[int] = None,
+        range_size: int = 20_000,
+        circle_size: int = CIRCLE_OF_TRUST_SIZE,
+        vote_policy: str = "latest",
+        weights: Optional[Dict[str, float]] = None,
+        progress_interval_seconds: float = 5.0
+    ):
+        """Initialize the replay
+
+        Args:
+            transport: Transport to read the topic archives from
+            topics: Stream names to topic IDs; ignored when shards is
+                given, whose topic map is replayed
+            shards: Shard registry holding the topic map, which shards
+                announced in SHARD_REGISTRY messages are added to (a new
+                one over topics by default)
+            processes: Decoding processes (default: one per core); 1 decodes
+                in a thread of this process
+            range_size: Messages per range handed to a process
+            circle_size: Circle of trust size of the rebuilt state
+            vote_policy: Vote policy of the rebuilt state
+            weights: Reputation component weights poll eligibility is
+                judged with (defaults to REPUTATION_WEIGHTS)
+            progress_interval_seconds: Minimum time between progress logs
+        """
+        if np is None:
+            raise ImportError("Install numpy for parallel replay: pip install numpy")
+        self.transport = transport
+        self.shards = shards or ShardRegistry(topics)
+        self.processes = processes or os.cpu_count() or 1
+        self.range_size = range_size
+        self.progress_interval_seconds = progress_interval_seconds
+        self.state = TrustMeshState(circle_size=circle_size, vote_policy=vote_policy)
+        history = self.state.history
+        self.state.tallies.trust_score = lambda key, consensus_timestamp: score_as_of(
+            history, key, consensus_timestamp, weights
+        )
+
+        # (topic_id, range number) -> messages and aggregate of each range
+        self._ranges: Dict[Tuple[str, int], List[Tuple[int, bytes]]] = {}
+        self._parts: Dict[Tuple[str, int], RangeAggregate] = {}
+        self._cursors: Dict[str, int] = {}
+        self._assemblers: Dict[str, ChunkAssembler] = {}
+
+        self.messages_read = 0
+        self.ranges_done = 0
+        self.events_decoded = 0
+        self.duplicates = 0
+        self.decode_errors = 0
+        self.apply_errors = 0
+        self._started = 0.0
+        self._seconds = 0.0
+        self._last_progress = 0.0
+
+    @property
+    def topics(self) -> Dict[str, str]:
+        """Stream names to topic IDs, announced shards included"""
+        return self.shards.topics
+
+    def topic_ids(self) -> List[str]:
+        """Distinct topic IDs to replay"""
+        return sorted({
+            topic_id for topic_id in self.topics.values() if "TOPIC" not in topic_id
+        })
+
+    async def run(self) -> TrustMeshState:
+        """Read, decode and merge every topic
+
+        Returns:
+            The rebuilt state
+        """
+        self._started = self._last_progress = time.perf_counter()
+        executor = self._executor()
+        try:
+            replayed: Set[str] = set()
+            topic_ids = self.topic_ids()
+            while topic_ids:
+                await asyncio.gather(*(self._read(topic_id, executor) for topic_id in topic_ids))
+                replayed.update(topic_ids)
+                self._apply_registries()
+                topic_ids = [topic_id for topic_id in self.topic_ids() if topic_id not in replayed]
+            await self._drop_duplicates(executor)
+        finally:
+            executor.shutdown()
+
+        self._merge()
+        self._seconds = time.perf_counter() - self._started
+        stats = self.stats()
+        logger.info(
+            f"✅ Replayed {stats['messages']} messages, {stats['events']} events in "
+            f"{stats['seconds']:.2f}s ({stats['events_per_second']:,.0f} events/s, "
+            f"{self.processes} processes)"
+        )
+        return self.state
+
+    def position(self) -> Dict[str, Any]:
+        """Where live ingestion should resume, in IngestionEngine.snapshot()
+        form: per-topic cursors and incomplete chunked messages"""
+        chunks = {topic_id: assembler.snapshot() for topic_id, assembler in self._assemblers.items()}
+        return {
+            "cursors": dict(self._cursors),
+            "chunks": {topic_id: pending for topic_id, pending in chunks.items() if pending}
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        seconds = self._seconds or (time.perf_counter() - self._started if self._started else 0.0)
+        return {
+            "processes": self.processes,
+            "range_size": self.range_size,
+            "topics": len(self._cursors),
+            "ranges": self.ranges_done,
+            "messages": self.messages_read,
+            "events": self.events_decoded,
+            "duplicates": self.duplicates,
+            "decode_errors": self.decode_errors + sum(part.decode_errors for part in self._parts.values()),
+            "apply_errors": self.apply_errors + sum(part.apply_errors for part in self._parts.values()),
+            "seconds": round(seconds, 3),
+            "events_per_second": round(self.events_decoded / seconds, 1) if seconds else 0.0
+        }
+
+    def _executor(self) -> Executor:
+        if self.processes > 1:
+            return ProcessPoolExecutor(max_workers=self.processes)
+        return ThreadPoolExecutor(max_workers=1)
+
+    async def _read(self, topic_id: str, executor: Executor):
+        """Read a topic's archive, handing each full range to the pool"""
+        assembler = self._assemblers[topic_id] = ChunkAssembler()
+        aggregating = []
+        messages: List[Tuple[int, bytes]] = []
+        async for message in self.transport.history(topic_id):
+            self._cursors[topic_id] = message.consensus_timestamp
+            self.messages_read += 1
+            try:
+                contents = assembler.join(message.contents)
+            except Exception as e:
+                self.decode_errors += 1
+                logger.warning(f"⚠️  Undecodable message {topic_id}#{message.sequence_number}: {e}")
+                continue
+            if contents is None:
+                continue
+            messages.append((message.consensus_timestamp, contents))
+            if len(messages) >= self.range_size:
+                aggregating.append(self._aggregate(executor, (topic_id, len(aggregating)), messages))
+                messages = []
+        if messages:
+            aggregating.append(self._aggregate(executor, (topic_id, len(aggregating)), messages))
+        await asyncio.gather(*aggregating)
+
+    def _aggregate(
+        self,
+        executor: Executor,
+        key: Tuple[str, int],
+        messages: List[Tuple[int, bytes]],
+        skip: FrozenSet[Tuple[int, int]] = frozenset()
+    ) -> asyncio.Future:
+        """Aggregate a range in the pool, keeping its messages for a rerun"""
+        self._ranges[key] = messages
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(executor, aggregate_range, key[0], messages, skip)
+
+        def done(future: asyncio.Future):
+            if future.cancelled() or future.exception():
+                return
+            part = self._parts[key] = future.result()
+            if not skip:
+                self.ranges_done += 1
+                self.events_decoded += part.events
+                self._report_progress()
+        future.add_done_callback(done)
+        return future
+
+    def _report_progress(self):
+        now = time.perf_counter()
+        if now - self._last_progress < self.progress_interval_seconds:
+            return
+        self._last_progress = now
+        elapsed = now - self._started
+        logger.info(
+            f"🔁 Replay: {self.ranges_done} ranges, {self.messages_read} messages read, "
+            f"{self.events_decoded} events decoded ({self.events_decoded / elapsed:,.0f} events/s)"
+        )
+
+    def _apply_registries(self):
+        """Adopt the shard registries read so far, in consensus order"""
+        registries = sorted(
+            (registry for part in self._parts.values() for registry in part.registries),
+            key=_position
+        )
+        for _, _, data in registries:
+            try:
+                self.shards.apply(data)
+            except (KeyError, ValueError) as e:
+                logger.warning(f"⚠️  Ignoring shard registry: {e}")
+
+    async def _drop_duplicates(self, executor: Executor):
+        """Aggregate ranges again without events an earlier range already had"""
+        keys = sorted(key for key in self._parts if self._parts[key].key_positions)
+        if not keys:
+            return
+        digests = np.frombuffer(b"".join(self._parts[key].keys for key in keys), dtype=np.uint64)
+        digests = digests.reshape(-1, _KEY_DIGEST_SIZE // 8)
+        leading = digests[:, 0]
+
+        # Cheap pass on the first 8 bytes, then an exact one on the few candidates
+        ordered = np.sort(leading)
+        candidates = np.unique(ordered[1:][ordered[1:] == ordered[:-1]])
+        if not len(candidates):
+            return
+        owners = np.repeat(np.arange(len(keys)), [len(self._parts[key].key_positions) for key in keys])
+        offsets = np.concatenate([[0], np.cumsum([len(self._parts[key].key_positions) for key in keys])])
+
+        occurrences: Dict[bytes, List[Tuple[Tuple[int, int], int]]] = {}
+        for row in np.nonzero(np.isin(leading, candidates))[0]:
+            owner = int(owners[row])
+            position = self._parts[keys[owner]].key_positions[row - offsets[owner]]
+            occurrences.setdefault(digests[row].tobytes(), []).append((position, owner))
+
+        skips: Dict[int, Set[Tuple[int, int]]] = {}
+        for copies in occurrences.values():
+            for position, owner in sorted(copies)[1:]:
+                skips.setdefault(owner, set()).add(position)
+        if not skips:
+            return
+
+        await asyncio.gather(*(
+            self._aggregate(executor, keys[owner], self._ranges[keys[owner]], frozenset(positions))
+            for owner, positions in skips.items()
+        ))
+        logger.info(f"🔁 Aggregated {len(skips)} ranges again without duplicates of earlier events")
+
+    def _merge(self):
+        """Fold every range into the state in consensus order"""
+        state = self.state
+        parts = [self._parts[key] for key in sorted(self._parts)]
+
+        last_timestamp = 0
+        # Gifts withdrawn within their range, still in their senders' circles
+        # until they were: (consensus time, sender key)
+        withdrawn: List[Tuple[int, int]] = []
+        held: Dict[int, int] = {}
+        for timestamp, _, kind, payload in heapq.merge(*(part.items for part in parts), key=_position):
+            last_timestamp = timestamp
+            if kind == _EVENT:
+                try:
+                    state.apply(payload, timestamp)
+                except Exception as e:
+                    self.apply_errors += 1
+                    logger.warning(f"⚠️  Skipped {payload.get('type')} event: {e}")
+            elif kind == _TOKEN:
+                state.circle.add(*payload)
+            elif kind == _GIFT:
+                transaction_id, sender, recipient, *values, revoked_at = payload
+                gift = TrustGift(state.interner.intern(sender), state.interner.intern(recipient), *values)
+                while withdrawn and withdrawn[0][0] <= timestamp:
+                    held[heapq.heappop(withdrawn)[1]] -= 1
+                state.expire_gifts(timestamp)
+                if state.live_gifts(gift.sender) + held.get(gift.sender, 0) >= state.circle.size:
+                    _exclude_gift(state, transaction_id, gift, timestamp, revoked_at)
+                    continue
+                if revoked_at is None:
+                    state.add_gift(transaction_id, gift)
+                until = revoked_at if revoked_at is not None else gift.expires_at if gift.withdrawn else None
+                if until is not None and until > timestamp:
+                    held[gift.sender] = held.get(gift.sender, 0) + 1
+                    heapq.heappush(withdrawn, (until, gift.sender))
+            elif kind == _TOUCH:
+                user_id, stamp = payload
+                state.user(user_id).last_activity = stamp
+            else:
+                for account_id in payload:
+                    state.interner.intern(account_id)
+
+        # Every range's account keys in the state's keys
+        keys = [list(map(state.interner.intern, part.accounts)) for part in parts]
+        for part, part_keys in zip(parts, keys):
+            state.ledger.merge(part.ledger, part_keys)
+            state.history.merge(part.history, part_keys)
+            for key, partial in part.users.items():
+                user = state.user_by_key(part_keys[key])
+                user.trust_level_total += partial.trust_level_total
+                user.tokens_withdrawn += partial.tokens_withdrawn
+                user.trst_withdrawn += partial.trst_withdrawn
+                user.connections.update(part_keys[connection] for connection in partial.connections)
+                user.activity_events += partial.activity_events
+            state.events_applied += part.events_applied + part.superseded
+            self.duplicates += part.duplicates
+        # Gifts of the ranges that expired after the range's last event
+        state.expire_gifts(last_timestamp)
+        # Votes were judged before the ranges' gifts were in the history
+        state.tallies.recheck()
+
+        if state.graph is not None:
+            self._merge_edges(parts, keys)
+
+    def _merge_edges(self, parts: List[RangeAggregate], keys: List[List[int]]):
+        """Add the graph edges of every gift still counting to the state's
+        graph in consensus order"""
+        columns: Dict[str, List[Any]] = {}
+        for part, part_keys in zip(parts, keys):
+            if not len(part.edges["source"]):
+                continue
+            nodes = np.asarray(part_keys, dtype=np.int64)
+            for name, column in part.edges.items():
+                columns.setdefault(name, []).append(nodes[column] if name in ("source", "target") else column)
+        if not columns:
+            return
+
+        edges = {name: np.concatenate(column) for name, column in columns.items()}
+        order = np.lexsort((edges["index"], edges["consensus_timestamp"]))
+        source, target, staked = edges["source"][order], edges["target"][order], edges["trst_staked"][order]
+        gifts = self.state.gifts
+        live = np.fromiter((
+            transaction_id in gifts and not gifts[transaction_id].withdrawn
+            for transaction_id in edges["transaction_id"][order].tolist()
+        ), dtype=bool, count=len(order))
+        self.state.graph.add_edges(
+            source[live], target[live], edges["trust_type"][order][live], staked[live],
+            edges["timestamp"][order][live]
+        )
+
+        # Re-add TRST stakes one by one in consensus order (np.add.at is
+        # unbuffered), so the totals match a serial replay to the last bit
+        given = np.zeros(len(self.state.interner), dtype=np.float64)
+        received = np.zeros(len(self.state.interner), dtype=np.float64)
+        np.add.at(given, source, staked)
+        np.add.at(received, target, staked)
+        for key in np.unique(np.concatenate([source, target])).tolist():
+            account = self.state.ledger.accounts[key]
+            account.trst_staked_given = float(given[key])
+            account.trst_staked_received = float(received[key])
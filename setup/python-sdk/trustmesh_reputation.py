@@ -0,0 +1,278 @@
+"""
+TrustMesh Reputation Engine
+===========================
+
+Incremental reputation scoring. The engine listens to the state projection
+and, for every applied event, rescores only the users it touched: trust
+and badge components are recomputed from the running aggregates (tokens
+received, average trust level, TRST backing, badges by rarity, activity),
+so reading a reputation never walks history or touches the network.
+
+Poll eligibility uses score_as_of() instead: the score from the events
+that reached consensus before the vote, read from the state's
+ScoreHistory, which is the same on every reader whatever order it read
+the topics in.
+
+The scoring functions below are the reference definitions used by the SDK.
+"""
+
+import math
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional
+
+from trustmesh_history import ScoreHistory
+from trustmesh_state import TrustMeshState
+
+# Component weights of the overall score. "network" is the propagated
+# (EigenTrust) trust component, which keeps a closed ring of accounts
+# gifting each other from scoring like accounts trusted from the seeds. It
+# is recomputed per reader from its own seeds rather than derived from
+# events (and is 0 until propagation first runs), so poll eligibility
+# leaves it out whatever the weight
+REPUTATION_WEIGHTS = {
+    "trust": 0.3,
+    "badges": 0.25,
+    "activity": 0.25,
+    "network": 0.2
+}
+
+# Activity points per event a user took part in, and the component cap
+ACTIVITY_POINTS_PER_EVENT = 1.5
+MAX_ACTIVITY_SCORE = 30.0
+
+def reputation_weights(network_weight: float) -> Dict[str, float]:
+    """Default component weights with the network component set to
+    network_weight; the event-derived components share the rest in their
+    default proportions"""
+    if not 0.0 <= network_weight <= 1.0:
+        raise ValueError(f"Network weight must be between 0 and 1, not {network_weight}")
+    share = (1.0 - network_weight) / (1.0 - REPUTATION_WEIGHTS["network"])
+    weights = {name: weight * share for name, weight in REPUTATION_WEIGHTS.items()}
+    weights["network"] = network_weight
+    return weights
+
+def calculate_trust_score(trust_data: Dict[str, Any]) -> float:
+    """Calculate trust component of reputation"""
+    base_score = min(trust_data["tokens_received"] * 2, 30)
+    quality_bonus = trust_data["average_trust_level"] * 5
+    backing_bonus = min(trust_data["trst_backing"] / 10, 10)
+    return min(base_score + quality_bonus + backing_bonus, 40.0)
+
+def calculate_badge_score(badge_data: Dict[str, Any]) -> float:
+    """Calculate badge component of reputation"""
+    total_score = 0
+    total_score += badge_data["total_badges"] * 5
+    total_score += badge_data["rare_badges"] * 10
+    total_score += badge_data["legendary_badges"] * 20
+    return min(total_score, 30.0)
+
+def calculate_activity_score(activity_events: int) -> float:
+    """Calculate activity component of reputation"""
+    return min(activity_events * ACTIVITY_POINTS_PER_EVENT, MAX_ACTIVITY_SCORE)
+
+def round_score(score: float) -> float:
+    """Overall score as published (one decimal), halves of the scaled score
+    rounded up; bulk scoring applies the same float operations to whole
+    arrays, so both paths agree on halves"""
+    return math.floor(score * 10 + 0.5) / 10
+
+def get_reputation_milestone(score: float) -> Dict[str, Any]:
+    """Determine reputation milestone and benefits (see MILESTONE_THRESHOLDS)"""
+    if score >= 30:
+        return {
+            "level": "COMMUNITY_LEADER",
+            "benefits": ["event_hosting", "badge_issuing", "trust_verification"]
+        }
+    elif score >= 25:
+        return {
+            "level": "TRUSTED_MEMBER",
+            "benefits": ["vip_access", "mentor_eligibility"]
+        }
+    elif score >= 15:
+        return {
+            "level": "ACTIVE_MEMBER",
+            "benefits": ["full_participation", "voting_rights"]
+        }
+    else:
+        return {
+            "level": "NEW_MEMBER",
+            "benefits": ["basic_participation"]
+        }
+
+def score_as_of(
+    history: ScoreHistory,
+    key: int,
+    consensus_timestamp: int,
+    weights: Optional[Dict[str, float]] = None
+) -> float:
+    """Overall score of an account from the events that reached consensus
+    before a timestamp (ns)
+
+    The network component is left out: it is recomputed periodically on
+    each reader rather than derived from events, so it would make the
+    result depend on when the reader last ran propagation.
+    """
+    weights = weights or REPUTATION_WEIGHTS
+    trust_data, badge_data, activity = history.inputs_at(key, consensus_timestamp)
+    return (
+        calculate_trust_score(trust_data) * weights["trust"] +
+        calculate_badge_score(badge_data) * weights["badges"] +
+        calculate_activity_score(activity) * weights["activity"]
+    )
+
+@dataclass
+class ReputationScore:
+    """Current component scores of one user (overall unrounded)"""
+    trust_score: float = 0.0
+    badge_score: float = 0.0
+    activity_score: float = 0.0
+    network_score: float = 0.0
+    overall_score: float = 0.0
+    updated_at: float = 0.0
+
+class ReputationEngine:
+    """Keeps every user's reputation current as events are applied"""
+
+    def __init__(
+        self,
+        state: TrustMeshState,
+        weights: Optional[Dict[str, float]] = None,
+        features: Optional[Any] = None
+    ):
+        """Initialize the engine and attach it to the state projection
+
+        Args:
+            state: Projection whose events drive the scores
+            weights: Component weights (defaults to REPUTATION_WEIGHTS)
+            features: Optional ReputationFeatures table kept in step with
+                the scores, for bulk scoring
+        """
+        self.state = state
+        self.weights = dict(weights or REPUTATION_WEIGHTS)
+        self.features = features
+        # Both by account key
+        self.network_scores: Dict[int, float] = {}
+        self.scores: Dict[int, ReputationScore] = {}
+        self.rescored = 0
+
+        state.add_listener(self._on_event)
+        self.rescore(state.users)
+        # Poll eligibility follows these weights
+        state.tallies.trust_score = self.score_at
+        state.tallies.recheck()
+
+    def rescore(self, keys: Iterable[int]):
+        """Recompute the scores of the given users (account keys) from
+        their aggregates"""
+        now = time.time()
+        for key in keys:
+            trust_data = self.state.trust_data_by_key(key)
+            badge_data = self.state.badge_data_by_key(key)
+            activity = self.state.activity_by_key(key)
+            network_score = self.network_scores.get(key, 0.0)
+            if self.features is not None:
+                self.features.update(
+                    self.state.interner.account_id(key), trust_data, badge_data, activity, network_score
+                )
+
+            trust_score = calculate_trust_score(trust_data)
+            badge_score = calculate_badge_score(badge_data)
+            activity_score = calculate_activity_score(activity)
+            self.scores[key] = ReputationScore(
+                trust_score=trust_score,
+                badge_score=badge_score,
+                activity_score=activity_score,
+                network_score=network_score,
+                overall_score=(
+                    trust_score * self.weights["trust"] +
+                    badge_score * self.weights["badges"] +
+                    activity_score * self.weights["activity"] +
+                    network_score * self.weights.get("network", 0.0)
+                ),
+                updated_at=now
+            )
+            self.rescored += 1
+
+    def set_network_scores(self, network_scores: Dict[str, float]):
+        """Replace the propagated trust component (by account ID) and
+        rescore affected users"""
+        interner = self.state.interner
+        network_scores = {
+            interner.intern(user_id): score for user_id, score in network_scores.items()
+        }
+        changed = set(self.network_scores) | set(network_scores)
+        self.network_scores = network_scores
+        self.rescore(changed)
+
+    def network_scores_by_account(self) -> Dict[str, float]:
+        """Propagated trust component by account ID"""
+        interner = self.state.interner
+        return {interner.account_id(key): score for key, score in self.network_scores.items()}
+
+    def reset(self, network_scores: Optional[Dict[str, float]] = None):
+        """Rescore every user from scratch and judge poll eligibility again
+        after the state was replaced (account keys may now mean other
+        accounts)
+
+        Args:
+            network_scores: Propagated trust component to keep, by
+                account ID (see network_scores_by_account())
+        """
+        self.scores = {}
+        self.network_scores = {}
+        if network_scores:
+            self.set_network_scores(network_scores)
+        self.rescore(list(self.state.users))
+        self.state.tallies.recheck()
+
+    def set_weights(self, weights: Dict[str, float]):
+        """Change the component weights, rescore everyone and judge poll
+        eligibility again"""
+        self.weights.update(weights)
+        self.rescore(list(self.scores))
+        self.state.tallies.recheck()
+
+    def score_at(self, key: int, consensus_timestamp: int) -> float:
+        """Overall score of an account key as of a consensus timestamp (ns),
+        for poll eligibility (see score_as_of())"""
+        return score_as_of(self.state.history, key, consensus_timestamp, self.weights)
+
+    def score(self, user_id: str) -> ReputationScore:
+        """Current scores of a user (all zero for unknown users)"""
+        return self.scores.get(self.state.interner.key(user_id)) or ReputationScore()
+
+    def reputation(self, user_id: str) -> Dict[str, Any]:
+        """Reputation record of a user, as published to the reputation topic"""
+        score = self.score(user_id)
+        calculated_at = datetime.fromtimestamp(score.updated_at or time.time(), timezone.utc)
+        return {
+            "user_id": user_id,
+            "overall_score": round_score(score.overall_score),
+            "breakdown": {
+                "trust": {
+                    "score": score.trust_score,
+                    "weight": self.weights["trust"],
+                    "details": self.state.trust_data(user_id)
+                },
+                "badges": {
+                    "score": score.badge_score,
+                    "weight": self.weights["badges"],
+                    "details": self.state.badge_data(user_id)
+                },
+                "activity": {
+                    "score": score.activity_score,
+                    "weight": self.weights["activity"]
+                },
+                "network": {
+                    "score": round(score.network_score, 2),
+                    "weight": self.weights.get("network", 0.0)
+                }
+            },
+            "milestone": get_reputation_milestone(score.overall_score),
+            "calculated_at": calculated_at.isoformat()
+        }
+
+    def _on_event(self, event_type: str, keys: Iterable[int]):
+        self.rescore(keys)
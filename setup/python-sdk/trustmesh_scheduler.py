@@ -0,0 +1,134 @@
+"""
+TrustMesh Poll Scheduler
+========================
+
+Closes community polls at their deadlines. Every open poll's deadline sits
+in one min-heap (O(log n) to schedule) and a single background task sleeps
+until the earliest one, so thousands of concurrent polls cost no task or
+timer each. Scheduling an earlier deadline wakes the task; cancelled or
+rescheduled entries are skipped lazily when they reach the top.
+"""
+
+import asyncio
+import heapq
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+class PollScheduler:
+    """Min-heap of poll deadlines driven by one timer task"""
+
+    def __init__(
+        self,
+        on_close: Callable[[str], Optional[Awaitable[Any]]],
+        grace_seconds: float = 0.0
+    ):
+        """Initialize the scheduler
+
+        Args:
+            on_close: Called with the poll ID once its deadline has passed;
+                may be a coroutine function
+            grace_seconds: Extra wait after a deadline so votes cast just
+                before it can still reach consensus and be counted
+        """
+        self.on_close = on_close
+        self.grace_seconds = grace_seconds
+        # (deadline epoch seconds, poll_id); stale entries are skipped
+        self._heap: List[Tuple[float, str]] = []
+        self._deadlines: Dict[str, float] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.closed = 0
+
+    def schedule(self, poll_id: str, closes_at: float):
+        """Close a poll at a deadline (epoch seconds), replacing any earlier one"""
+        self._deadlines[poll_id] = closes_at
+        heapq.heappush(self._heap, (closes_at, poll_id))
+        if self._wakeup is not None and self._heap[0][1] == poll_id:
+            self._wakeup.set()
+
+    def cancel(self, poll_id: str):
+        """Forget a poll's deadline"""
+        self._deadlines.pop(poll_id, None)
+
+    def due(self, now: Optional[float] = None) -> List[str]:
+        """Remove and return the polls whose deadline (plus grace) has passed"""
+        now = time.time() if now is None else now
+        due = []
+        while self._heap and self._heap[0][0] + self.grace_seconds <= now:
+            closes_at, poll_id = heapq.heappop(self._heap)
+            if self._deadlines.get(poll_id) == closes_at:
+                del self._deadlines[poll_id]
+                due.append(poll_id)
+        return due
+
+    def next_deadline(self) -> Optional[float]:
+        """Earliest scheduled deadline, if any"""
+        while self._heap and self._deadlines.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    async def start(self):
+        """Start the timer task"""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        """Stop the timer task; scheduled deadlines are kept"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self._wakeup = None
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "scheduled": len(self._deadlines),
+            "closed": self.closed,
+            "next_deadline": self.next_deadline()
+        }
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            due = self.due()
+            if due:
+                pending = [closing for closing in map(self._close, due) if closing is not None]
+                if pending:
+                    await asyncio.gather(*pending)
+                continue
+
+            deadline = self.next_deadline()
+            timeout = None if deadline is None else max(deadline + self.grace_seconds - time.time(), 0.0)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _close(self, poll_id: str) -> Optional[Awaitable[None]]:
+        """Run on_close; returns what is left to await if it is async"""
+        try:
+            result = self.on_close(poll_id)
+        except Exception as e:
+            logger.error(f"❌ Error closing poll {poll_id}: {e}")
+            return None
+        if asyncio.iscoroutine(result) or isinstance(result, asyncio.Future):
+            return self._finish(poll_id, result)
+        self.closed += 1
+        return None
+
+    async def _finish(self, poll_id: str, closing: Awaitable[Any]):
+        try:
+            await closing
+            self.closed += 1
+        except Exception as e:
+            logger.error(f"❌ Error closing poll {poll_id}: {e}")
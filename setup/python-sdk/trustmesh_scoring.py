@@ -0,0 +1,169 @@
+"""
+TrustMesh Bulk Reputation Scoring
+=================================
+
+Vectorized reputation scoring for the whole community at once, e.g. the
+nightly rescore or a weight retune. Per-user scoring inputs live in
+ReputationFeatures, a columnar table of NumPy arrays (one row per user).
+score_features() applies the same component formulas, weights and
+milestone thresholds as the scalar functions in trustmesh_reputation with
+array operations. The scalar path stays the reference implementation.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from trustmesh_reputation import (
+    ACTIVITY_POINTS_PER_EVENT, MAX_ACTIVITY_SCORE, REPUTATION_WEIGHTS
+)
+
+# Scoring inputs, one column each
+FEATURE_COLUMNS = (
+    "tokens_received",
+    "average_trust_level",
+    "trst_backing",
+    "total_badges",
+    "rare_badges",
+    "legendary_badges",
+    "activity_events",
+    "network_score"
+)
+
+# Milestone levels, lowest first, and the scores that reach levels 1..3
+# (with the default weights the overall score tops out at 35, and at 27
+# before trust propagation has run)
+MILESTONE_LEVELS = ("NEW_MEMBER", "ACTIVE_MEMBER", "TRUSTED_MEMBER", "COMMUNITY_LEADER")
+MILESTONE_THRESHOLDS = (15.0, 25.0, 30.0)
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("Install numpy for bulk reputation scoring: pip install numpy")
+
+class ReputationFeatures:
+    """Columnar table of per-user scoring inputs"""
+
+    def __init__(self, capacity: int = 1024):
+        """Initialize an empty table
+
+        Args:
+            capacity: Initial row capacity; grows by doubling
+        """
+        _require_numpy()
+        self.user_ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.columns = {name: np.zeros(capacity, dtype=np.float64) for name in FEATURE_COLUMNS}
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    def row(self, user_id: str) -> int:
+        """Row index of a user, adding a zeroed row if needed"""
+        row = self.rows.get(user_id)
+        if row is None:
+            row = self.rows[user_id] = len(self.user_ids)
+            self.user_ids.append(user_id)
+            if row == len(self.columns["tokens_received"]):
+                self._grow()
+        return row
+
+    def update(
+        self,
+        user_id: str,
+        trust_data: Dict[str, Any],
+        badge_data: Dict[str, Any],
+        activity_events: int,
+        network_score: float = 0.0
+    ):
+        """Store a user's current scoring inputs"""
+        row = self.row(user_id)
+        columns = self.columns
+        columns["tokens_received"][row] = trust_data["tokens_received"]
+        columns["average_trust_level"][row] = trust_data["average_trust_level"]
+        columns["trst_backing"][row] = trust_data["trst_backing"]
+        columns["total_badges"][row] = badge_data["total_badges"]
+        columns["rare_badges"][row] = badge_data["rare_badges"]
+        columns["legendary_badges"][row] = badge_data["legendary_badges"]
+        columns["activity_events"][row] = activity_events
+        columns["network_score"][row] = network_score
+
+    def column(self, name: str):
+        """Filled part of a column"""
+        return self.columns[name][:len(self.user_ids)]
+
+    @classmethod
+    def from_columns(cls, user_ids: List[str], **columns: Iterable[float]) -> "ReputationFeatures":
+        """Build a table from whole columns (missing columns are zero)"""
+        features = cls(capacity=max(1, len(user_ids)))
+        features.user_ids = list(user_ids)
+        features.rows = {user_id: row for row, user_id in enumerate(features.user_ids)}
+        for name, values in columns.items():
+            if name not in features.columns:
+                raise ValueError(f"Unknown feature column: {name}")
+            features.columns[name][:len(user_ids)] = np.asarray(values, dtype=np.float64)
+        return features
+
+    def _grow(self):
+        for name, values in self.columns.items():
+            grown = np.zeros(len(values) * 2, dtype=np.float64)
+            grown[:len(values)] = values
+            self.columns[name] = grown
+
+def score_features(
+    features: ReputationFeatures,
+    weights: Optional[Dict[str, float]] = None
+) -> Dict[str, Any]:
+    """Score every user in a feature table
+
+    Args:
+        features: Scoring inputs
+        weights: Component weights (defaults to REPUTATION_WEIGHTS)
+
+    Returns:
+        Columnar result: "user_ids" plus arrays "trust_score",
+        "badge_score", "activity_score", "network_score", "overall_score"
+        (rounded with round_score() like the scalar path) and "milestone"
+        (index into MILESTONE_LEVELS, from the unrounded score)
+    """
+    _require_numpy()
+    weights = weights or REPUTATION_WEIGHTS
+    column = features.column
+
+    trust_score = np.minimum(
+        np.minimum(column("tokens_received") * 2, 30)
+        + column("average_trust_level") * 5
+        + np.minimum(column("trst_backing") / 10, 10),
+        40.0
+    )
+    badge_score = np.minimum(
+        column("total_badges") * 5
+        + column("rare_badges") * 10
+        + column("legendary_badges") * 20,
+        30.0
+    )
+    activity_score = np.minimum(column("activity_events") * ACTIVITY_POINTS_PER_EVENT, MAX_ACTIVITY_SCORE)
+
+    network_score = column("network_score")
+
+    overall = (
+        trust_score * weights["trust"]
+        + badge_score * weights["badges"]
+        + activity_score * weights["activity"]
+        + network_score * weights.get("network", 0.0)
+    )
+    milestone = np.searchsorted(np.asarray(MILESTONE_THRESHOLDS), overall, side="right")
+    # round_score() over the whole array
+    rounded = np.floor(overall * 10 + 0.5) / 10
+
+    return {
+        "user_ids": features.user_ids[:],
+        "trust_score": trust_score,
+        "badge_score": badge_score,
+        "activity_score": activity_score,
+        "network_score": network_score,
+        "overall_score": rounded,
+        "milestone": milestone.astype(np.int8)
+    }
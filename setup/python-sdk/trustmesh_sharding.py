@@ -0,0 +1,120 @@
+"""
+TrustMesh Topic Sharding
+========================
+
+Spreads a logical stream (trust_tokens, polls, ...) over several HCS topics
+to lift the per-topic throughput ceiling. Each event is routed by a stable
+hash of its key - the sender for trust tokens and their revocations, the
+recipient for badges, the poll ID for polls and votes - so every event
+about one key lands on the same shard and per-key consensus order is kept;
+readers simply follow every shard. Trust tokens go by sender because the
+circle of trust caps a sender's tokens: every reader then judges each
+against the sender's earlier ones in consensus order.
+
+Shard topics are named "<stream>.<n>" in the SDK's topic map, with shard 0
+also registered under the plain stream name. The shard list of a stream is
+published as a SHARD_REGISTRY message on its shard 0, so a reader that only
+knows the plain stream topic discovers the rest. Changing a stream's shard
+count re-routes keys: events about one key are only ordered within one
+registry generation.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+# Routing hash, recorded in the registry so every writer agrees
+SHARD_HASH = "blake2b-64"
+
+def shard_index(key: str, shard_count: int) -> int:
+    """Stable shard of a routing key, identical across processes"""
+    if shard_count <= 1:
+        return 0
+    digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % shard_count
+
+def shard_name(stream: str, index: int) -> str:
+    return f"{stream}.{index}"
+
+class ShardRegistry:
+    """Shard topics of each logical stream, over the SDK's topic map"""
+
+    def __init__(self, topics: Dict[str, str], counts: Optional[Dict[str, int]] = None):
+        """Initialize the registry
+
+        Args:
+            topics: Topic map, copied; the SDK and ingestion engine read
+                topics through the registry's copy, which SHARD_REGISTRY
+                messages add to
+            counts: Shard count per stream; inferred from "<stream>.<n>"
+                entries of the topic map when not given
+        """
+        self.topics = dict(topics)
+        self.counts: Dict[str, int] = dict(counts) if counts else self._infer_counts()
+
+    def rebind(self, topics: Dict[str, str]):
+        """Replace the topic map (copied) and infer the shard counts from it"""
+        self.topics = dict(topics)
+        self.counts = self._infer_counts()
+
+    def shard_count(self, stream: str) -> int:
+        return self.counts.get(stream, 1)
+
+    def topic_for(self, stream: str, key: str) -> str:
+        """Topic an event about key is routed to"""
+        count = self.shard_count(stream)
+        if count <= 1:
+            return self.topics[stream]
+        return self.topics[shard_name(stream, shard_index(key, count))]
+
+    def shard_topics(self, stream: str) -> List[str]:
+        """Topic IDs of a stream's shards, in shard order"""
+        count = self.shard_count(stream)
+        if count <= 1:
+            return [self.topics[stream]]
+        return [self.topics[shard_name(stream, index)] for index in range(count)]
+
+    def is_complete(self, stream: str) -> bool:
+        """Whether every shard of a stream has a topic"""
+        count = self.shard_count(stream)
+        return count > 1 and all(shard_name(stream, index) in self.topics for index in range(count))
+
+    def message(self, stream: str) -> Dict[str, Any]:
+        """SHARD_REGISTRY envelope describing a stream's shards"""
+        return {
+            "type": "SHARD_REGISTRY",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "data": {
+                "stream": stream,
+                "shard_count": self.shard_count(stream),
+                "topics": self.shard_topics(stream),
+                "hash": SHARD_HASH
+            },
+            "hcs_standard": "HCS-2"
+        }
+
+    def apply(self, data: Dict[str, Any]) -> List[str]:
+        """Adopt a published SHARD_REGISTRY
+
+        Returns:
+            Topic IDs not in the topic map before
+        """
+        if data.get("hash", SHARD_HASH) != SHARD_HASH:
+            raise ValueError(f"Unsupported shard hash: {data.get('hash')}")
+        stream, topic_ids = data["stream"], list(data["topics"])
+        known = set(self.topics.values())
+
+        self.counts[stream] = len(topic_ids)
+        for index, topic_id in enumerate(topic_ids):
+            self.topics[shard_name(stream, index)] = topic_id
+        if topic_ids:
+            self.topics[stream] = topic_ids[0]
+        return [topic_id for topic_id in topic_ids if topic_id not in known]
+
+    def _infer_counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for name in self.topics:
+            stream, _, index = name.rpartition(".")
+            if stream and index.isdigit():
+                counts[stream] = max(counts.get(stream, 1), int(index) + 1)
+        return counts
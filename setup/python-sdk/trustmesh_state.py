@@ -0,0 +1,541 @@
+"""
+TrustMesh State Projection
+==========================
+
+In-memory view of the network built from the events read back from the
+TrustMesh topics: the trust ledger and graph, live circle-of-trust counts,
+per-user connections and badges, plus community polls and their running
+tallies. The ingestion engine applies each event once, in consensus order
+per topic; every lookup afterwards is a dictionary access. Accounts are
+interned once into dense integer keys shared by every component; listeners
+are told the keys of the users each applied event touched.
+
+A trust token stops counting towards its recipient's reputation when its
+sender revokes it or its expires_at passes: the trust inputs (tokens
+received, trust level, TRST backing) and the score history leave it out
+from then on. Expiry is judged by consensus time, as of the latest event
+applied. The ledger keeps every gift: it is the HCS-20 record of what was
+transferred, and the balances published in later gifts count it. The graph
+only holds gifts that count, so trust never propagates through a revoked
+or expired token. A revocation only counts from the token's sender.
+
+The circle of trust is applied the same way: a gift whose sender already
+has circle_size gifts counting, as of its consensus time, never counts
+towards its recipient's reputation, takes a slot in the circle nor becomes
+a graph edge, though the ledger keeps it too.
+"""
+
+import heapq
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import logging
+
+from trustmesh_accounts import AccountInterner
+from trustmesh_circle import CIRCLE_OF_TRUST_SIZE, CircleOfTrust
+from trustmesh_graph import TrustGraph, event_edge, np
+from trustmesh_history import ScoreHistory
+from trustmesh_ledger import TrustLedger
+from trustmesh_models import epoch_seconds
+from trustmesh_tally import TallyEngine
+
+logger = logging.getLogger(__name__)
+
+# Trust level (1-5) credited per token, by trust type
+TRUST_TYPE_LEVELS = {
+    "personal": 3.0,
+    "professional": 4.0,
+    "community": 5.0
+}
+
+@dataclass
+class UserState:
+    """Everything the projection knows about one account"""
+    user_id: str
+    display_name: str = ""
+
+    # Trust tokens (counts and TRST totals live in the ledger), less the
+    # received ones that were revoked or expired
+    trust_level_total: float = 0.0
+    tokens_withdrawn: int = 0
+    trst_withdrawn: float = 0.0
+    # Account keys of the users this one gave tokens to or received from
+    connections: Set[int] = field(default_factory=set)
+
+    # Badges
+    badges: List[str] = field(default_factory=list)
+    badges_by_rarity: Dict[str, int] = field(default_factory=dict)
+    badge_categories: Set[str] = field(default_factory=set)
+
+    activity_events: int = 0
+    last_activity: str = ""
+
+@dataclass
+class TrustGift:
+    """What a confirmed trust token adds to its recipient's trust inputs"""
+    sender: int
+    recipient: int
+    amount: int
+    trust_level: float
+    trst_staked: float
+    # Consensus time (ns) it stops counting at, if it expires
+    expires_at: Optional[int] = None
+    # Taken out of the recipient's running totals (expired)
+    withdrawn: bool = False
+    # Trust type and epoch microseconds of its graph edge
+    trust_type: str = "personal"
+    given_at: int = 0
+
+@dataclass
+class PollState:
+    """A community poll (its votes are counted by the tally engine)"""
+    poll_id: str
+    title: str = ""
+    options: List[Dict[str, Any]] = field(default_factory=list)
+    timeline: Dict[str, str] = field(default_factory=dict)
+    eligibility: Dict[str, Any] = field(default_factory=dict)
+
+class TrustMeshState:
+    """Projection of the TrustMesh event streams"""
+
+    def __init__(self, circle_size: int = CIRCLE_OF_TRUST_SIZE, vote_policy: str = "latest"):
+        self.interner = AccountInterner()
+        self.ledger = TrustLedger(self.interner)
+        self.circle = CircleOfTrust(circle_size, self.interner)
+        self.tallies = TallyEngine(vote_policy, interner=self.interner)
+        # Reputation inputs by consensus time, for poll eligibility
+        self.history = ScoreHistory()
+        # Gifts by transaction ID until revoked, and when the expiring ones
+        # stop counting: (consensus time, transaction ID)
+        self.gifts: Dict[str, TrustGift] = {}
+        self._gift_expiries: List[Tuple[int, str]] = []
+        # Gifts still counting, by sender key (their circle of trust)
+        self._live_gifts: Dict[int, int] = {}
+        # When the sender's expired gifts stopped counting, by sender key.
+        # A reader ahead on another shard withdraws them before the
+        # sender's shard reaches that time, so they still fill the circle
+        # for the sender's tokens before it
+        self._expired: Dict[int, List[int]] = {}
+        # Sparse trust graph index (needs numpy)
+        self.graph: Optional[TrustGraph] = TrustGraph(interner=self.interner) if np is not None else None
+        # Users and published reputation records, by account key
+        self.users: Dict[int, UserState] = {}
+        self.polls: Dict[str, PollState] = {}
+        self.reputation: Dict[int, Dict[str, Any]] = {}
+        self.events_applied = 0
+        self._listeners: List[Callable[[str, Iterable[int]], None]] = []
+
+        self._handlers: Dict[str, Callable[[Dict[str, Any], str, int], Tuple[int, ...]]] = {
+            "PROFILE_CREATE": self._apply_profile,
+            "TRUST_TOKEN_GIVEN": self._apply_trust_token,
+            "TRUST_TOKEN_REVOKED": self._apply_trust_revoked,
+            "BADGE_ISSUED": self._apply_badge,
+            "REPUTATION_CALCULATED": self._apply_reputation,
+            "COMMUNITY_POLL_CREATED": self._apply_poll,
+            "POLL_VOTE_CAST": self._apply_vote,
+            "POLL_CLOSED": self._apply_poll_closed
+        }
+
+    def apply(self, event: Dict[str, Any], consensus_timestamp: Optional[int] = None) -> bool:
+        """Apply one event envelope
+
+        Args:
+            event: Decoded event envelope
+            consensus_timestamp: Consensus timestamp (ns) of the message
+                carrying the event; poll deadlines are checked against it,
+                never against the timestamp the event claims. Defaults to
+                now, for events applied before they are read back
+
+        Returns:
+            True if the event type is known and was applied
+
+        Raises:
+            ValueError, TypeError: Malformed event data (a malformed trust
+                token is rejected before anything changes)
+        """
+        event_type = event.get("type")
+        handler = self._handlers.get(event_type)
+        if handler is None:
+            return False
+        if consensus_timestamp is None:
+            consensus_timestamp = time.time_ns()
+        touched = handler(event.get("data") or {}, event.get("timestamp", ""), consensus_timestamp)
+        self.events_applied += 1
+        expired = self.expire_gifts(consensus_timestamp)
+        if expired:
+            touched = tuple(touched) + tuple(expired)
+        for key in touched:
+            # Ballots after this event may have been judged without it
+            self.tallies.recheck(key, consensus_timestamp)
+        for listener in self._listeners:
+            listener(event_type, touched)
+        return True
+
+    def add_listener(self, listener: Callable[[str, Iterable[int]], None]):
+        """Call listener(event_type, user_keys) after every applied event"""
+        self._listeners.append(listener)
+
+    def user(self, user_id: str) -> UserState:
+        """Get (or start) the state of an account"""
+        return self.user_by_key(self.interner.intern(user_id))
+
+    def user_by_key(self, key: int) -> UserState:
+        """Get (or start) the state of an account key"""
+        state = self.users.get(key)
+        if state is None:
+            state = self.users[key] = UserState(self.interner.account_id(key))
+        return state
+
+    def trust_balance(self, user_id: str) -> int:
+        """Trust tokens received by an account, including pending gifts"""
+        return self.ledger.balance(user_id)
+
+    def trust_data(self, user_id: str) -> Dict[str, Any]:
+        """Trust inputs of the reputation score (confirmed events only)"""
+        return self.trust_data_by_key(self.interner.key(user_id))
+
+    def trust_data_by_key(self, key: Optional[int]) -> Dict[str, Any]:
+        state = self.users.get(key) or UserState("")
+        account = self.ledger.accounts.get(key)
+        received = (account.received if account else 0) - state.tokens_withdrawn
+        backing = (account.trst_staked_received if account else 0.0) - state.trst_withdrawn
+        return {
+            "tokens_received": received,
+            "tokens_given": account.given if account else 0,
+            "average_trust_level": round(state.trust_level_total / received, 2) if received else 0.0,
+            "trst_backing": backing,
+            "connections": len(state.connections)
+        }
+
+    def badge_data(self, user_id: str) -> Dict[str, Any]:
+        """Badge inputs of the reputation score"""
+        return self.badge_data_by_key(self.interner.key(user_id))
+
+    def badge_data_by_key(self, key: Optional[int]) -> Dict[str, Any]:
+        state = self.users.get(key) or UserState("")
+        return {
+            "total_badges": len(state.badges),
+            "rare_badges": state.badges_by_rarity.get("rare", 0),
+            "legendary_badges": state.badges_by_rarity.get("legendary", 0),
+            "categories": sorted(state.badge_categories)
+        }
+
+    def activity(self, user_id: str) -> int:
+        """Events an account took part in"""
+        return self.activity_by_key(self.interner.key(user_id))
+
+    def activity_by_key(self, key: Optional[int]) -> int:
+        state = self.users.get(key)
+        return state.activity_events if state else 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """The whole projection as plain data, for trustmesh_snapshot
+        (everything keyed by account key, saved with the interner)
+
+        Some values are the live containers: pack the result before the
+        next event is applied.
+        """
+        return {
+            "events_applied": self.events_applied,
+            "accounts": self.interner.snapshot(),
+            "ledger": self.ledger.snapshot(),
+            "circle": self.circle.snapshot(),
+            "graph": self.graph.snapshot() if self.graph is not None else None,
+            "users": {
+                key: [
+                    state.display_name, state.trust_level_total, list(state.connections),
+                    state.badges, state.badges_by_rarity, list(state.badge_categories),
+                    state.activity_events, state.last_activity,
+                    state.tokens_withdrawn, state.trst_withdrawn
+                ]
+                for key, state in self.users.items()
+            },
+            "gifts": {
+                transaction_id: [
+                    gift.sender, gift.recipient, gift.amount, gift.trust_level, gift.trst_staked,
+                    gift.expires_at, gift.withdrawn, gift.trust_type, gift.given_at
+                ]
+                for transaction_id, gift in self.gifts.items()
+            },
+            "polls": {
+                poll_id: [poll.title, poll.options, poll.timeline, poll.eligibility]
+                for poll_id, poll in self.polls.items()
+            },
+            "tallies": self.tallies.snapshot(),
+            "history": self.history.snapshot(),
+            "reputation": self.reputation
+        }
+
+    def restore(self, snapshot: Dict[str, Any]):
+        """Replace the projection with a snapshot's, in place so components
+        holding the ledger, circle, graph or tallies keep working"""
+        self.events_applied = snapshot["events_applied"]
+        pending = self.ledger.pending_gifts()
+        self.interner.restore(snapshot["accounts"])
+        self.ledger.restore(snapshot["ledger"], pending)
+        self.circle.restore(snapshot["circle"])
+        if self.graph is not None and snapshot["graph"] is not None:
+            self.graph.restore(snapshot["graph"])
+        self.users = {}
+        for key, values in snapshot["users"].items():
+            (display_name, trust_level_total, connections, badges, badges_by_rarity,
+             badge_categories, activity_events, last_activity, tokens_withdrawn, trst_withdrawn) = values
+            self.users[key] = UserState(
+                self.interner.account_id(key), display_name, trust_level_total, tokens_withdrawn,
+                trst_withdrawn, set(connections), list(badges), dict(badges_by_rarity),
+                set(badge_categories), activity_events, last_activity
+            )
+        self.gifts, self._gift_expiries, self._live_gifts, self._expired = {}, [], {}, {}
+        for transaction_id, values in snapshot["gifts"].items():
+            self.add_gift(transaction_id, TrustGift(*values))
+        self.polls = {
+            poll_id: PollState(poll_id, *values) for poll_id, values in snapshot["polls"].items()
+        }
+        self.tallies.restore(snapshot["tallies"])
+        self.history.restore(snapshot["history"])
+        self.reputation = dict(snapshot["reputation"])
+
+    def compact_history(self, before: int) -> int:
+        """Fold the score history before a consensus timestamp (ns), held
+        back to the opening of the earliest open poll with a minimum trust
+        score; closed polls with kept ballots from before it are finalized
+
+        Args:
+            before: No ballot is read later with an earlier consensus
+                timestamp than this, e.g. the polls topics' ingestion
+                cursor
+
+        Returns:
+            Number of history entries folded away
+        """
+        horizon = self.tallies.horizon()
+        if horizon is not None:
+            before = min(before, horizon)
+        self.tallies.finalize(before)
+        return self.history.compact(before)
+
+    def poll(self, poll_id: str) -> Optional[PollState]:
+        return self.polls.get(poll_id)
+
+    def poll_results(self, poll_id: str) -> Optional[Dict[str, Any]]:
+        """Running results of a poll, if it is known"""
+        return self.tallies.results(poll_id)
+
+    def add_gift(self, transaction_id: str, gift: TrustGift):
+        """Keep a gift until it is revoked, to be withdrawn when it expires"""
+        self.gifts[transaction_id] = gift
+        if gift.withdrawn:
+            if gift.expires_at is not None:
+                self._expired.setdefault(gift.sender, []).append(gift.expires_at)
+            return
+        self._live_gifts[gift.sender] = self._live_gifts.get(gift.sender, 0) + 1
+        if gift.expires_at is not None:
+            heapq.heappush(self._gift_expiries, (gift.expires_at, transaction_id))
+
+    def live_gifts(self, key: int) -> int:
+        """Gifts of a sender's still counting, as of the latest event applied"""
+        return self._live_gifts.get(key, 0)
+
+    def live_gifts_at(self, key: int, consensus_timestamp: int) -> int:
+        """Gifts of a sender's counting at a consensus time (ns), whatever
+        other shards have been read up to
+
+        The sender's own events must arrive in consensus order (trust
+        tokens are sharded by sender), so expiries before this time are
+        forgotten.
+        """
+        expired = self._expired.get(key)
+        if expired:
+            expired[:] = [expires_at for expires_at in expired if expires_at > consensus_timestamp]
+            if not expired:
+                del self._expired[key]
+        return self.live_gifts(key) + len(self._expired.get(key, ()))
+
+    def expire_gifts(self, consensus_timestamp: int) -> List[int]:
+        """Withdraw the gifts expired by a consensus time (ns) from their
+        recipients' trust inputs
+
+        Returns:
+            Keys of the recipients
+        """
+        recipients = []
+        expiries = self._gift_expiries
+        while expiries and expiries[0][0] <= consensus_timestamp:
+            gift = self.gifts.get(heapq.heappop(expiries)[1])
+            if gift is not None and not gift.withdrawn:
+                self._withdraw(gift)
+                self._expired.setdefault(gift.sender, []).append(gift.expires_at)
+                recipients.append(gift.recipient)
+        return recipients
+
+    def _withdraw(self, gift: TrustGift):
+        gift.withdrawn = True
+        remaining = self._live_gifts[gift.sender] - 1
+        if remaining:
+            self._live_gifts[gift.sender] = remaining
+        else:
+            del self._live_gifts[gift.sender]
+        receiver = self.user_by_key(gift.recipient)
+        receiver.trust_level_total -= gift.trust_level
+        receiver.tokens_withdrawn += gift.amount
+        receiver.trst_withdrawn += gift.trst_staked
+        if self.graph is not None:
+            self.graph.remove_edge(
+                self.interner.account_id(gift.sender), receiver.user_id,
+                gift.trust_type, gift.trst_staked, gift.given_at
+            )
+
+    def _touch(self, key: int, timestamp: str, consensus_timestamp: int) -> UserState:
+        """Count an event as activity of an account key"""
+        self.history.add_activity(key, consensus_timestamp)
+        state = self.user_by_key(key)
+        state.activity_events += 1
+        state.last_activity = timestamp
+        return state
+
+    # Event handlers (each returns the users it touched)
+
+    def _apply_profile(self, data: Dict[str, Any], timestamp: str, consensus_timestamp: int):
+        key = self.interner.intern(data.get("profile_id", ""))
+        state = self._touch(key, timestamp, consensus_timestamp)
+        state.display_name = data.get("display_name", state.display_name)
+        return (key,)
+
+    def _apply_trust_token(self, data: Dict[str, Any], timestamp: str, consensus_timestamp: int):
+        # Reject a malformed token before any component has taken it in
+        for value in (data.get("timestamp") or timestamp, data.get("expires_at")):
+            if value:
+                datetime.fromisoformat(value)
+        if not isinstance(data.get("amount", 1), int) or not isinstance(data.get("trst_staked", 0.0), (int, float)):
+            raise ValueError("Trust token amount and stake must be numbers")
+        transaction_id = data.get("transaction_id", "")
+        if transaction_id and transaction_id in self.gifts:
+            # Delivered again (an outbox re-send or duplicate delivery the
+            # ingestion filter no longer remembers): it already counts
+            return ()
+
+        self.ledger.apply(data)
+        # Gifts expired by now have freed their slots in the sender's circle
+        expired = tuple(self.expire_gifts(consensus_timestamp))
+        sender, recipient = data.get("sender", ""), data.get("recipient", "")
+        expires_at = _nanoseconds(data.get("expires_at"))
+        sender_key, recipient_key = self.interner.intern(sender), self.interner.intern(recipient)
+
+        giver = self._touch(sender_key, timestamp, consensus_timestamp)
+        giver.connections.add(recipient_key)
+
+        amount = data.get("amount", 1)
+        staked = data.get("trst_staked", 0.0)
+        receiver = self.user_by_key(recipient_key)
+        receiver.connections.add(sender_key)
+        if self.live_gifts_at(sender_key, consensus_timestamp) >= self.circle.size:
+            # Past the sender's circle of trust: it never counts (and frees
+            # the slot this reader reserved for it, if it sent it)
+            self.circle.release(transaction_id)
+            receiver.tokens_withdrawn += amount
+            receiver.trst_withdrawn += staked
+            return (sender_key, recipient_key) + expired
+
+        self.circle.add(transaction_id, sender, data.get("expires_at"), recipient)
+        trust_level = TRUST_TYPE_LEVELS.get(data.get("trust_type"), 3.0) * amount
+        receiver.trust_level_total += trust_level
+        edge = event_edge(data, timestamp)
+        if self.graph is not None:
+            self.graph.add_edge(*edge)
+        gift = TrustGift(
+            sender_key, recipient_key, amount, trust_level, staked, expires_at,
+            trust_type=edge[2], given_at=edge[4]
+        )
+        self.add_gift(transaction_id, gift)
+        self.history.add_received(recipient_key, consensus_timestamp, amount, trust_level, staked)
+        if expires_at is not None:
+            # A token that reached consensus already expired never counts
+            self.history.add_received(
+                recipient_key, max(expires_at, consensus_timestamp), -amount, -trust_level, -staked
+            )
+        return (sender_key, recipient_key) + expired
+
+    def _apply_trust_revoked(self, data: Dict[str, Any], timestamp: str, consensus_timestamp: int):
+        transaction_id = data.get("transaction_id", "")
+        gift = self.gifts.get(transaction_id)
+        if gift is None:
+            # Unknown or already revoked
+            return ()
+        if self.interner.key(data.get("sender", "")) != gift.sender:
+            raise ValueError(f"Trust token {transaction_id} can only be revoked by its sender")
+        if gift.expires_at is not None and gift.expires_at <= consensus_timestamp:
+            # Already stopped counting
+            return ()
+
+        del self.gifts[transaction_id]
+        self.circle.release(transaction_id)
+        if not gift.withdrawn:
+            self._withdraw(gift)
+        elif gift.expires_at in self._expired.get(gift.sender, ()):
+            # Withdrawn early by a reader ahead on another shard
+            self._expired[gift.sender].remove(gift.expires_at)
+        self.history.add_received(
+            gift.recipient, consensus_timestamp, -gift.amount, -gift.trust_level, -gift.trst_staked
+        )
+        if gift.expires_at is not None:
+            # Cancels the one recorded for its expiry
+            self.history.add_received(
+                gift.recipient, gift.expires_at, gift.amount, gift.trust_level, gift.trst_staked
+            )
+        return (gift.recipient,)
+
+    def _apply_badge(self, data: Dict[str, Any], timestamp: str, consensus_timestamp: int):
+        key = self.interner.intern(data.get("recipient", ""))
+        state = self.user_by_key(key)
+        state.badges.append(data.get("hashinal_id", ""))
+        rarity = data.get("rarity", "common")
+        self.history.add_badge(key, consensus_timestamp, rarity)
+        state.badges_by_rarity[rarity] = state.badges_by_rarity.get(rarity, 0) + 1
+        if data.get("category"):
+            state.badge_categories.add(data["category"])
+
+        issuer = data.get("issued_by")
+        if not issuer:
+            return (key,)
+        issuer_key = self.interner.intern(issuer)
+        self._touch(issuer_key, timestamp, consensus_timestamp)
+        return (key, issuer_key)
+
+    def _apply_reputation(self, data: Dict[str, Any], timestamp: str, consensus_timestamp: int):
+        self.reputation[self.interner.intern(data.get("user_id", ""))] = data
+        return ()
+
+    def _apply_poll(self, data: Dict[str, Any], timestamp: str, consensus_timestamp: int):
+        poll_id = data.get("poll_id", "")
+        self.polls[poll_id] = PollState(
+            poll_id=poll_id,
+            title=data.get("title", ""),
+            options=data.get("options", []),
+            timeline=data.get("timeline", {}),
+            eligibility=data.get("eligibility") or {}
+        )
+        self.tallies.open(data, consensus_timestamp)
+        return ()
+
+    def _apply_vote(self, data: Dict[str, Any], timestamp: str, consensus_timestamp: int):
+        poll = self.polls.get(data.get("poll_id", ""))
+        if poll is None:
+            logger.warning(f"⚠️  Vote {data.get('vote_id')} for unknown poll {data.get('poll_id')}")
+            return ()
+
+        self.tallies.cast(data, consensus_timestamp)
+        voter = self.interner.intern(data.get("voter", ""))
+        self._touch(voter, timestamp, consensus_timestamp)
+        return (voter,)
+
+    def _apply_poll_closed(self, data: Dict[str, Any], timestamp: str, consensus_timestamp: int):
+        self.tallies.close(data.get("poll_id", ""), consensus_timestamp)
+        return ()
+
+def _nanoseconds(timestamp: Optional[str]) -> Optional[int]:
+    """ISO-8601 timestamp to epoch nanoseconds at its microsecond precision,
+    like the tally's deadlines (None if missing)"""
+    seconds = epoch_seconds(timestamp)
+    return None if seconds is None else round(seconds * 1_000_000) * 1000
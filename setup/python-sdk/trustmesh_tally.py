@@ -0,0 +1,382 @@
+"""
+TrustMesh Poll Tallies
+======================
+
+Streaming vote counting for community polls (HCS-8/HCS-9). Every
+POLL_VOTE_CAST event is folded into its poll's running totals as it is
+applied: one ballot per voter per poll (the latest or the first one,
+depending on the policy), weighted by the vote's vote_weight, and only
+from voters meeting the poll's minimum_trust_score. Ballots that reached
+consensus after the poll's voting_closes, or after a POLL_CLOSED message
+for it, are refused, which freezes the totals. The consensus timestamp
+decides, not the timestamp a vote claims, so a backdated late ballot is
+refused too.
+
+Eligibility is the voter's score from the events that reached consensus
+before the ballot (see trustmesh_history), never the score a vote
+reports. Topics are read independently, so one of those events may be
+read after the ballot: the ballots of polls with a minimum are kept, and
+a voter's are judged again whenever their history changes before one of
+them. Every reader of the topics thus arrives at the same totals.
+
+Results are read straight from the totals, so a poll with tens of
+thousands of voters never has to be replayed. Ballots are keyed by the
+voter's AccountInterner key.
+"""
+
+import time
+from bisect import insort
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from trustmesh_accounts import AccountInterner
+from trustmesh_models import epoch_seconds
+
+# Which ballot counts when a voter votes again in the same poll
+VOTE_POLICIES = ("latest", "first")
+
+class PollTally:
+    """Running totals of one poll"""
+
+    def __init__(
+        self,
+        poll_id: str,
+        option_ids: Iterable[str],
+        minimum_trust_score: float = 0.0,
+        closes_at: Optional[float] = None,
+        opened_at: Optional[int] = None
+    ):
+        self.poll_id = poll_id
+        self.minimum_trust_score = minimum_trust_score
+        # Deadline in epoch seconds
+        self.closes_at = closes_at
+        # Consensus timestamp (ns) of the COMMUNITY_POLL_CREATED event
+        self.opened_at = opened_at
+        # Closed here (at the deadline) or by a POLL_CLOSED message, and
+        # the consensus timestamp (ns) of that message
+        self.closed = False
+        self.closed_at: Optional[int] = None
+        # Closed and no longer judged again (see TallyEngine.finalize())
+        self.final = False
+        self.totals: Dict[str, float] = {option_id: 0.0 for option_id in option_ids}
+        self.counts: Dict[str, int] = {option_id: 0 for option_id in self.totals}
+        # voter key -> (option_id, weight) of the ballot that counts
+        self.ballots: Dict[int, Tuple[str, float]] = {}
+        self.rejected = {"ineligible": 0, "duplicate": 0, "unknown_option": 0, "closed": 0}
+        # With a minimum trust score: every ballot in time by voter key,
+        # (consensus timestamp, option_id, weight) in consensus order, and
+        # the (ineligible, duplicate) rejections they currently account for
+        self.candidates: Dict[int, List[Tuple[int, str, float]]] = {}
+        self.verdicts: Dict[int, Tuple[int, int]] = {}
+
+    def add(self, voter: int, option_id: str, weight: float):
+        """Count a ballot, replacing the voter's previous one"""
+        previous = self.ballots.get(voter)
+        if previous is not None:
+            self.totals[previous[0]] -= previous[1]
+            self.counts[previous[0]] -= 1
+        self.ballots[voter] = (option_id, weight)
+        self.totals[option_id] += weight
+        self.counts[option_id] += 1
+
+    def remove(self, voter: int):
+        """Stop counting a voter's ballot"""
+        previous = self.ballots.pop(voter, None)
+        if previous is not None:
+            self.totals[previous[0]] -= previous[1]
+            self.counts[previous[0]] -= 1
+
+    def results(self) -> Dict[str, Any]:
+        """Current totals per option plus the leading option"""
+        leader = max(self.totals, key=self.totals.get) if self.ballots else None
+        return {
+            "poll_id": self.poll_id,
+            "totals": dict(self.totals),
+            "counts": dict(self.counts),
+            "voters": len(self.ballots),
+            "leader": leader,
+            "rejected": dict(self.rejected),
+            "closed": self.closed
+        }
+
+class TallyEngine:
+    """Folds vote events into per-poll tallies"""
+
+    def __init__(
+        self,
+        policy: str = "latest",
+        trust_score: Optional[Callable[[int, int], float]] = None,
+        interner: Optional[AccountInterner] = None
+    ):
+        """Initialize the engine
+
+        Args:
+            policy: "latest" (a new ballot replaces the voter's previous
+                one) or "first" (later ballots are ignored)
+            trust_score: Score of a voter (account key) from the events
+                before a consensus timestamp (ns), checked against the
+                poll's minimum_trust_score; until one is set, no ballot
+                meets a minimum (call recheck() after setting it)
+            interner: Account keys shared with the rest of the state (a
+                private one by default)
+        """
+        if policy not in VOTE_POLICIES:
+            raise ValueError(f"Unknown vote policy: {policy}")
+        self.policy = policy
+        self.trust_score = trust_score
+        self.interner = interner if interner is not None else AccountInterner()
+        self.polls: Dict[str, PollTally] = {}
+        self.votes_counted = 0
+        # Voter key -> polls with a minimum trust score they voted in
+        self._gated: Dict[int, Set[str]] = {}
+        # Called with every newly opened tally, e.g. to schedule its closing
+        self.on_open: Optional[Callable[[PollTally], None]] = None
+
+    def open(self, poll_data: Dict[str, Any], consensus_timestamp: Optional[int] = None) -> PollTally:
+        """Start the tally of a COMMUNITY_POLL_CREATED event's poll
+
+        Args:
+            poll_data: The event's data
+            consensus_timestamp: Consensus timestamp (ns) of the event
+        """
+        eligibility = poll_data.get("eligibility") or {}
+        timeline = poll_data.get("timeline") or {}
+        tally = PollTally(
+            poll_data.get("poll_id", ""),
+            [option["option_id"] for option in poll_data.get("options", [])],
+            minimum_trust_score=eligibility.get("minimum_trust_score", 0.0),
+            closes_at=epoch_seconds(timeline.get("voting_closes")),
+            opened_at=consensus_timestamp
+        )
+        self.polls[tally.poll_id] = tally
+        if self.on_open is not None:
+            self.on_open(tally)
+        return tally
+
+    def close(self, poll_id: str, consensus_timestamp: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Mark a poll closed
+
+        Ballots that reached consensus before the deadline still count if
+        they are read later; only a POLL_CLOSED message, given with its
+        consensus timestamp, also refuses ballots after it.
+
+        Args:
+            poll_id: Poll to close
+            consensus_timestamp: Consensus timestamp (ns) of the POLL_CLOSED
+                message, if closed by one
+
+        Returns:
+            Results so far, or None if the poll is unknown
+        """
+        tally = self.polls.get(poll_id)
+        if tally is None:
+            return None
+        tally.closed = True
+        if consensus_timestamp is not None and (
+            tally.closed_at is None or consensus_timestamp < tally.closed_at
+        ):
+            tally.closed_at = consensus_timestamp
+        return tally.results()
+
+    def cast(self, vote_data: Dict[str, Any], consensus_timestamp: int) -> bool:
+        """Count a POLL_VOTE_CAST event's ballot
+
+        Args:
+            vote_data: The event's data
+            consensus_timestamp: Consensus timestamp (ns) of the vote
+
+        Returns:
+            True if the ballot now counts
+        """
+        tally = self.polls.get(vote_data.get("poll_id", ""))
+        if tally is None:
+            return False
+
+        if (tally.final or _after(consensus_timestamp, tally.closes_at)
+                or (tally.closed_at is not None and consensus_timestamp > tally.closed_at)):
+            tally.rejected["closed"] += 1
+            return False
+
+        voter = vote_data.get("voter", "")
+        option_id = vote_data.get("selected_option", "")
+        if option_id not in tally.totals:
+            tally.rejected["unknown_option"] += 1
+            return False
+        voter_key = self.interner.intern(voter)
+        weight = max(float(vote_data.get("vote_weight", 1.0)), 0.0)
+        if tally.minimum_trust_score > 0:
+            ballot = (consensus_timestamp, option_id, weight)
+            insort(tally.candidates.setdefault(voter_key, []), ballot)
+            self._gated.setdefault(voter_key, set()).add(tally.poll_id)
+            if self._judge(tally, voter_key) != ballot:
+                return False
+        elif self.policy == "first" and voter_key in tally.ballots:
+            tally.rejected["duplicate"] += 1
+            return False
+        else:
+            tally.add(voter_key, option_id, weight)
+        self.votes_counted += 1
+        return True
+
+    def eligible(self, tally: PollTally, voter: str, consensus_timestamp: Optional[int] = None) -> bool:
+        """Whether a voter meets a poll's minimum trust score
+
+        Args:
+            tally: The poll
+            voter: Voter's account ID
+            consensus_timestamp: Time (ns) to judge the score at (now by
+                default)
+        """
+        if tally.minimum_trust_score <= 0:
+            return True
+        if consensus_timestamp is None:
+            consensus_timestamp = time.time_ns()
+        return self._meets(tally, self.interner.key(voter), consensus_timestamp)
+
+    def recheck(self, voter: Optional[int] = None, since: Optional[int] = None):
+        """Judge kept ballots again after score inputs changed
+
+        Args:
+            voter: Account key whose history changed (everyone by default)
+            since: Consensus timestamp (ns) of the change; only ballots
+                after it can be affected
+        """
+        if voter is None:
+            gated = list(self._gated.items())
+        elif voter in self._gated:
+            gated = [(voter, self._gated[voter])]
+        else:
+            return
+        for key, poll_ids in gated:
+            for poll_id in poll_ids:
+                tally = self.polls.get(poll_id)
+                candidates = tally.candidates.get(key) if tally else None
+                if candidates and (since is None or candidates[-1][0] > since):
+                    self._judge(tally, key)
+
+    def horizon(self) -> Optional[int]:
+        """Consensus timestamp (ns) the polls still open with a minimum
+        trust score opened at, the earliest of them; their ballots are
+        judged at or after it (None without such polls)"""
+        opened = [
+            tally.opened_at or 0 for tally in self.polls.values()
+            if tally.minimum_trust_score > 0 and not tally.closed
+        ]
+        return min(opened) if opened else None
+
+    def finalize(self, before: int) -> int:
+        """Stop judging again the kept ballots of closed polls that hold
+        one from before a consensus timestamp (ns), e.g. because the score
+        history before it was compacted; their totals become final and
+        ballots read later are refused
+
+        Returns:
+            Number of polls finalized
+        """
+        finalized = 0
+        for tally in self.polls.values():
+            if not tally.closed or not any(
+                ballots[0][0] < before for ballots in tally.candidates.values()
+            ):
+                continue
+            for voter in tally.candidates:
+                poll_ids = self._gated.get(voter)
+                if poll_ids is not None:
+                    poll_ids.discard(tally.poll_id)
+                    if not poll_ids:
+                        del self._gated[voter]
+            tally.candidates = {}
+            tally.final = True
+            finalized += 1
+        return finalized
+
+    def _meets(self, tally: PollTally, voter: Optional[int], consensus_timestamp: int) -> bool:
+        if self.trust_score is None or voter is None:
+            return False
+        return self.trust_score(voter, consensus_timestamp) >= tally.minimum_trust_score
+
+    def _judge(self, tally: PollTally, voter: int) -> Optional[Tuple[int, str, float]]:
+        """Count the ballot of a voter's kept ones that the policy and
+        eligibility pick, updating the rejection counts
+
+        Returns:
+            The ballot that counts, if any
+        """
+        counted, ineligible, duplicate = None, 0, 0
+        for ballot in tally.candidates[voter]:
+            if counted is not None and self.policy == "first":
+                duplicate += 1
+            elif self._meets(tally, voter, ballot[0]):
+                counted = ballot
+            else:
+                ineligible += 1
+
+        previous = tally.verdicts.get(voter, (0, 0))
+        tally.rejected["ineligible"] += ineligible - previous[0]
+        tally.rejected["duplicate"] += duplicate - previous[1]
+        tally.verdicts[voter] = (ineligible, duplicate)
+        if counted is None:
+            tally.remove(voter)
+        elif tally.ballots.get(voter) != counted[1:]:
+            tally.add(voter, counted[1], counted[2])
+        return counted
+
+    def results(self, poll_id: str) -> Optional[Dict[str, Any]]:
+        """Current results of a poll, if it is known"""
+        tally = self.polls.get(poll_id)
+        return tally.results() if tally else None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Every poll's running totals as plain data (ballots by voter key)"""
+        return {
+            "votes_counted": self.votes_counted,
+            "polls": {
+                poll_id: [
+                    tally.minimum_trust_score, tally.closes_at, tally.closed, tally.closed_at,
+                    tally.totals, tally.counts,
+                    {voter: list(ballot) for voter, ballot in tally.ballots.items()},
+                    tally.rejected,
+                    {
+                        voter: [list(ballot) for ballot in ballots]
+                        for voter, ballots in tally.candidates.items()
+                    },
+                    {voter: list(verdict) for voter, verdict in tally.verdicts.items()},
+                    tally.opened_at, tally.final
+                ]
+                for poll_id, tally in self.polls.items()
+            }
+        }
+
+    def restore(self, snapshot: Dict[str, Any]):
+        """Replace the tallies with a snapshot's; open polls go through
+        on_open again"""
+        self.votes_counted = snapshot["votes_counted"]
+        self.polls = {}
+        self._gated = {}
+        for poll_id, values in snapshot["polls"].items():
+            (minimum_trust_score, closes_at, closed, closed_at, totals, counts,
+             ballots, rejected, candidates, verdicts, opened_at, final) = values
+            tally = PollTally(poll_id, totals, minimum_trust_score, closes_at, opened_at)
+            tally.closed, tally.closed_at, tally.final = closed, closed_at, final
+            tally.totals, tally.counts, tally.rejected = dict(totals), dict(counts), dict(rejected)
+            tally.ballots = {voter: tuple(ballot) for voter, ballot in ballots.items()}
+            tally.candidates = {
+                voter: [tuple(ballot) for ballot in ballots] for voter, ballots in candidates.items()
+            }
+            tally.verdicts = {voter: tuple(verdict) for voter, verdict in verdicts.items()}
+            for voter in tally.candidates:
+                self._gated.setdefault(voter, set()).add(poll_id)
+            self.polls[poll_id] = tally
+            if self.on_open is not None:
+                self.on_open(tally)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "polls": len(self.polls),
+            "policy": self.policy,
+            "votes_counted": self.votes_counted
+        }
+
+def _after(consensus_timestamp: int, deadline: Optional[float]) -> bool:
+    """Whether a consensus timestamp (ns) is past a deadline (epoch seconds,
+    compared at the microsecond precision of ISO-8601 timestamps)"""
+    return deadline is not None and consensus_timestamp > round(deadline * 1_000_000) * 1000
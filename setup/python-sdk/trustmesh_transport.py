@@ -0,0 +1,435 @@
+"""
+TrustMesh HCS Transports
+========================
+
+The SDK talks to the consensus service through an HCSTransport:
+
+    HederaTransport     Hedera network via hedera-sdk-python for writes and
+                        the mirror node REST API for reads
+    InMemoryTransport   In-process fake with per-topic logs, consensus
+                        timestamps, sequence numbers and subscriptions, for
+                        tests, benchmarks and offline demos
+
+Consensus timestamps are integer nanoseconds since the epoch throughout.
+"""
+
+import asyncio
+import base64
+import itertools
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+# Install with: pip install hedera-sdk-python httpx
+try:
+    from hedera import (
+        Client, AccountId, PrivateKey, TopicId,
+        TopicCreateTransaction, TopicMessageSubmitTransaction
+    )
+except ImportError:
+    print("⚠️  Install hedera-sdk-python: pip install hedera-sdk-python")
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+import logging
+
+from trustmesh_clients import ClientPool, PooledClient
+from trustmesh_ratelimit import AdaptiveRateLimiter, is_throttle_error
+
+logger = logging.getLogger(__name__)
+
+MIRROR_NODE_URLS = {
+    "mainnet": "https://mainnet-public.mirrornode.hedera.com",
+    "testnet": "https://testnet.mirrornode.hedera.com",
+}
+
+# Messages per mirror node page (the API maximum)
+MIRROR_PAGE_SIZE = 100
+
+@dataclass
+class TopicMessage:
+    """A message as ordered by consensus"""
+    topic_id: str
+    sequence_number: int
+    consensus_timestamp: int
+    contents: bytes
+    payer_account_id: str = ""
+
+def format_timestamp(timestamp_ns: int) -> str:
+    """Format nanoseconds as a mirror node "seconds.nanos" timestamp"""
+    return f"{timestamp_ns // 1_000_000_000}.{timestamp_ns % 1_000_000_000:09d}"
+
+def parse_timestamp(timestamp: str) -> int:
+    """Parse a mirror node "seconds.nanos" timestamp into nanoseconds"""
+    seconds, _, nanos = timestamp.partition(".")
+    return int(seconds) * 1_000_000_000 + int(nanos.ljust(9, "0")[:9] or 0)
+
+class HCSTransport(ABC):
+    """Interface between the SDK and a consensus service"""
+
+    operator_account: str = ""
+
+    @abstractmethod
+    async def create_topic(self, memo: str) -> str:
+        """Create a topic and return its ID"""
+
+    @abstractmethod
+    async def submit(self, topic_id: str, payload: bytes) -> asyncio.Future:
+        """Send one message payload
+
+        Returns:
+            Future resolving to the consensus receipt
+        """
+
+    @abstractmethod
+    def subscribe(self, topic_id: str, start_after: int = 0) -> AsyncIterator[TopicMessage]:
+        """Iterate a topic's messages in consensus order, then follow it live
+
+        Args:
+            topic_id: Topic to read
+            start_after: Only messages with a later consensus timestamp
+        """
+
+    @abstractmethod
+    def history(self, topic_id: str, start_after: int = 0) -> AsyncIterator[TopicMessage]:
+        """Iterate a topic's messages in consensus order up to the newest
+        one, then stop
+
+        Args:
+            topic_id: Topic to read
+            start_after: Only messages with a later consensus timestamp
+        """
+
+    def stats(self) -> Dict[str, Any]:
+        """Transport state, for monitoring"""
+        return {}
+
+class HederaTransport(HCSTransport):
+    """Hedera network transport with pooled operators and rate limiting"""
+
+    def __init__(
+        self,
+        account_id: str,
+        private_key: str,
+        network: str = "testnet",
+        operators: Optional[List[Tuple[str, str]]] = None,
+        node_account_ids: Optional[List[str]] = None,
+        client_selection: str = "least_loaded",
+        rate_limit: Optional[float] = 50.0,
+        max_throttle_retries: int = 5,
+        mirror_node_url: Optional[str] = None,
+        poll_interval_seconds: float = 1.0
+    ):
+        """Initialize the transport
+
+        Args:
+            account_id: Primary operator account ID; its key administers
+                and signs for every topic
+            private_key: Primary operator private key
+            network: "testnet" or "mainnet"
+            operators: Extra (account_id, private_key) payer accounts
+            node_account_ids: Network nodes to spread submissions across
+            client_selection: "least_loaded" or "round_robin"
+            rate_limit: Starting rate per topic and operator, messages/second
+            max_throttle_retries: Retries of a throttled submission
+            mirror_node_url: Mirror node base URL for subscriptions
+            poll_interval_seconds: Mirror node polling interval once caught up
+        """
+        self.operator_account = account_id
+        self.account_id = AccountId.fromString(account_id)
+        self.private_key = PrivateKey.fromString(private_key)
+        self.client = self._build_client(network, self.account_id, self.private_key)
+
+        # Submission clients: this account plus any extra operators, each
+        # preferring a different node when nodes are configured
+        nodes = [AccountId.fromString(node) for node in node_account_ids or []]
+        pooled = [PooledClient(self.client, account_id, self._rotate(nodes, 0))]
+        for index, (operator_id, operator_key) in enumerate(operators or [], start=1):
+            client = self._build_client(
+                network, AccountId.fromString(operator_id), PrivateKey.fromString(operator_key)
+            )
+            pooled.append(PooledClient(client, operator_id, self._rotate(nodes, index)))
+        self.client_pool = ClientPool(pooled, strategy=client_selection)
+
+        self.rate_limiter: Optional[AdaptiveRateLimiter] = None
+        if rate_limit:
+            self.rate_limiter = AdaptiveRateLimiter(initial_rate=rate_limit)
+        self.max_throttle_retries = max_throttle_retries
+
+        self.mirror_node_url = mirror_node_url or MIRROR_NODE_URLS.get(network, MIRROR_NODE_URLS["testnet"])
+        self.poll_interval_seconds = poll_interval_seconds
+        self._topic_ids: Dict[str, Any] = {}
+
+    @staticmethod
+    def _build_client(network: str, account_id, private_key):
+        """Create a Hedera client for the network with an operator set"""
+        if network == "mainnet":
+            client = Client.forMainnet()
+        else:
+            client = Client.forTestnet()
+        client.setOperator(account_id, private_key)
+        return client
+
+    @staticmethod
+    def _rotate(items: List[Any], offset: int) -> Optional[List[Any]]:
+        """Rotate a list so different clients prefer different entries"""
+        if not items:
+            return None
+        offset %= len(items)
+        return items[offset:] + items[:offset]
+
+    async def create_topic(self, memo: str) -> str:
+        transaction = (TopicCreateTransaction()
+                     .setTopicMemo(memo)
+                     .setAdminKey(self.private_key.getPublicKey())
+                     .setSubmitKey(self.private_key.getPublicKey()))
+
+        response = await transaction.executeAsync(self.client)
+        receipt = await response.getReceiptAsync(self.client)
+        return receipt.topicId.toString()
+
+    async def submit(self, topic_id: str, payload: bytes) -> asyncio.Future:
+        """Send one message payload through a pooled client
+
+        Throttled (BUSY) submissions are retried after the rate limiter's
+        backoff, up to max_throttle_retries times.
+        """
+        topic = self._topic_ids.get(topic_id)
+        if topic is None:
+            topic = self._topic_ids[topic_id] = TopicId.fromString(topic_id)
+
+        attempt = 0
+        while True:
+            # The client only counts as in flight once the limiter lets
+            # its submission go, so waiting does not skew least-loaded
+            entry = self.client_pool.select()
+            limiter_keys = (("topic", topic_id), ("operator", entry.account_id))
+            if self.rate_limiter:
+                await self.rate_limiter.acquire(*limiter_keys)
+            self.client_pool.claim(entry)
+            response = error = None
+            try:
+                transaction = self._build_submit_transaction(topic, payload, entry)
+                response = await transaction.executeAsync(entry.client)
+            except Exception as e:
+                error = e
+            finally:
+                # Throttles are the network pushing back and cancellations
+                # say nothing of the client, so only real failures count
+                if error is not None and not is_throttle_error(error):
+                    self.client_pool.release(entry, error)
+                elif response is None:
+                    self.client_pool.abandon(entry)
+            if error is None:
+                break
+            if (self.rate_limiter and is_throttle_error(error)
+                    and attempt < self.max_throttle_retries):
+                attempt += 1
+                await asyncio.sleep(self.rate_limiter.on_throttle(*limiter_keys))
+                continue
+            raise error
+
+        if self.rate_limiter:
+            self.rate_limiter.on_success(*limiter_keys)
+        return asyncio.ensure_future(self._await_receipt(response, entry))
+
+    def _build_submit_transaction(self, topic, payload: bytes, entry: PooledClient):
+        """Build a message submission paid for by a pooled client"""
+        transaction = (TopicMessageSubmitTransaction()
+                      .setTopicId(topic)
+                      .setMessage(payload))
+        if entry.node_account_ids:
+            transaction.setNodeAccountIds(entry.node_account_ids)
+        if entry.client is not self.client:
+            # Topics are created with this account's key as submit key
+            transaction = transaction.freezeWith(entry.client).sign(self.private_key)
+        return transaction
+
+    async def _await_receipt(self, response, entry: PooledClient):
+        """Wait for a submission's receipt, then release its client"""
+        receipt = error = None
+        try:
+            receipt = await response.getReceiptAsync(entry.client)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            if receipt is None and error is None:
+                self.client_pool.abandon(entry)
+            else:
+                self.client_pool.release(entry, error)
+        return receipt
+
+    async def subscribe(self, topic_id: str, start_after: int = 0) -> AsyncIterator[TopicMessage]:
+        """Page through a topic on the mirror node, then poll for new messages"""
+        if httpx is None:
+            raise ImportError("Install httpx to read topics from the mirror node: pip install httpx")
+
+        cursor = start_after
+        async with httpx.AsyncClient(base_url=self.mirror_node_url, timeout=30.0) as http:
+            while True:
+                messages = await self._fetch_page(http, topic_id, cursor)
+                for message in messages:
+                    cursor = message.consensus_timestamp
+                    yield message
+
+                if len(messages) < MIRROR_PAGE_SIZE:
+                    await asyncio.sleep(self.poll_interval_seconds)
+
+    async def history(self, topic_id: str, start_after: int = 0) -> AsyncIterator[TopicMessage]:
+        """Page through a topic on the mirror node until the newest message"""
+        if httpx is None:
+            raise ImportError("Install httpx to read topics from the mirror node: pip install httpx")
+
+        cursor = start_after
+        async with httpx.AsyncClient(base_url=self.mirror_node_url, timeout=30.0) as http:
+            while True:
+                messages = await self._fetch_page(http, topic_id, cursor)
+                for message in messages:
+                    cursor = message.consensus_timestamp
+                    yield message
+
+                if len(messages) < MIRROR_PAGE_SIZE:
+                    return
+
+    async def _fetch_page(self, http, topic_id: str, cursor: int) -> List[TopicMessage]:
+        """Messages of a topic after a consensus timestamp, one mirror node page"""
+        response = await http.get(
+            f"/api/v1/topics/{topic_id}/messages",
+            params={
+                "timestamp": f"gt:{format_timestamp(cursor)}",
+                "limit": MIRROR_PAGE_SIZE,
+                "order": "asc"
+            }
+        )
+        response.raise_for_status()
+        return [
+            TopicMessage(
+                topic_id=topic_id,
+                sequence_number=item["sequence_number"],
+                consensus_timestamp=parse_timestamp(item["consensus_timestamp"]),
+                contents=base64.b64decode(item["message"]),
+                payer_account_id=item.get("payer_account_id", "")
+            )
+            for item in response.json().get("messages", [])
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "clients": self.client_pool.stats(),
+            "rate_limits": self.rate_limiter.stats() if self.rate_limiter else {}
+        }
+
+class InMemoryReceipt:
+    """Receipt returned by InMemoryTransport, named like Hedera's"""
+
+    def __init__(self, message: TopicMessage):
+        self.status = "SUCCESS"
+        self.topicId = message.topic_id
+        self.topicSequenceNumber = message.sequence_number
+        self.consensusTimestamp = message.consensus_timestamp
+
+class InMemoryTransport(HCSTransport):
+    """In-process fake of the consensus service"""
+
+    def __init__(
+        self,
+        operator_account: str = "0.0.1001",
+        consensus_latency_seconds: float = 0.0,
+        auto_create_topics: bool = True,
+        first_topic_number: int = 5000
+    ):
+        """Initialize the fake
+
+        Args:
+            operator_account: Account reported as payer of every message
+            consensus_latency_seconds: Delay between submission and consensus
+            auto_create_topics: Accept submissions to unknown topic IDs
+                instead of failing with INVALID_TOPIC_ID
+            first_topic_number: Number of the first topic created
+        """
+        self.operator_account = operator_account
+        self.consensus_latency_seconds = consensus_latency_seconds
+        self.auto_create_topics = auto_create_topics
+
+        self.memos: Dict[str, str] = {}
+        self.logs: Dict[str, List[TopicMessage]] = {}
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+        self._topic_numbers = itertools.count(first_topic_number)
+        self._last_timestamp = 0
+        self.submitted = 0
+
+    async def create_topic(self, memo: str) -> str:
+        topic_id = f"0.0.{next(self._topic_numbers)}"
+        self.memos[topic_id] = memo
+        self.logs[topic_id] = []
+        return topic_id
+
+    async def submit(self, topic_id: str, payload: bytes) -> asyncio.Future:
+        if topic_id not in self.logs:
+            if not self.auto_create_topics:
+                raise ValueError(f"INVALID_TOPIC_ID: {topic_id}")
+            self.logs[topic_id] = []
+
+        self.submitted += 1
+        loop = asyncio.get_running_loop()
+        receipt_future = loop.create_future()
+        if self.consensus_latency_seconds:
+            loop.call_later(
+                self.consensus_latency_seconds, self._reach_consensus,
+                topic_id, bytes(payload), receipt_future
+            )
+        else:
+            self._reach_consensus(topic_id, bytes(payload), receipt_future)
+        return receipt_future
+
+    def _reach_consensus(self, topic_id: str, payload: bytes, receipt_future: asyncio.Future):
+        """Order a message: assign its timestamp and sequence number"""
+        timestamp = max(time.time_ns(), self._last_timestamp + 1)
+        self._last_timestamp = timestamp
+
+        log = self.logs[topic_id]
+        message = TopicMessage(
+            topic_id=topic_id,
+            sequence_number=len(log) + 1,
+            consensus_timestamp=timestamp,
+            contents=payload,
+            payer_account_id=self.operator_account
+        )
+        log.append(message)
+        for queue in self._subscribers.get(topic_id, []):
+            queue.put_nowait(message)
+        if not receipt_future.done():
+            receipt_future.set_result(InMemoryReceipt(message))
+
+    async def subscribe(self, topic_id: str, start_after: int = 0) -> AsyncIterator[TopicMessage]:
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(topic_id, []).append(queue)
+        try:
+            cursor = start_after
+            for message in list(self.logs.get(topic_id, [])):
+                if message.consensus_timestamp > cursor:
+                    cursor = message.consensus_timestamp
+                    yield message
+            while True:
+                message = await queue.get()
+                if message.consensus_timestamp > cursor:
+                    cursor = message.consensus_timestamp
+                    yield message
+        finally:
+            self._subscribers[topic_id].remove(queue)
+
+    async def history(self, topic_id: str, start_after: int = 0) -> AsyncIterator[TopicMessage]:
+        for message in list(self.logs.get(topic_id, [])):
+            if message.consensus_timestamp > start_after:
+                yield message
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "submitted": self.submitted,
+            "topics": {topic_id: len(log) for topic_id, log in self.logs.items()}
+        }
@@ -29,6 +29,15 @@ try:
 except ImportError:
     print("⚠️  TrustMesh SDK not found. Installing dependencies...")
 
+# Environment variable holding each TrustMesh topic ID
+TOPIC_ENV_VARS = {
+    "profiles": "TRUSTMESH_PROFILES_TOPIC",
+    "trust_tokens": "TRUSTMESH_TRUST_TOKENS_TOPIC",
+    "badges": "TRUSTMESH_BADGES_TOPIC",
+    "reputation": "TRUSTMESH_REPUTATION_TOPIC",
+    "polls": "TRUSTMESH_POLLS_TOPIC"
+}
+
 def run_command(command, description):
     """Run shell command with nice output"""
     print(f"🔧 {description}...")
@@ -123,8 +132,18 @@ async def create_hcs_topics():
             network=os.getenv("HEDERA_NETWORK", "testnet")
         )
         
+        # Only create topics that are not configured yet, so a rerun after a
+        # partial failure resumes where the previous run stopped
+        missing = [
+            name for name, env_var in TOPIC_ENV_VARS.items()
+            if not os.getenv(env_var) or "TOPIC_ID" in os.getenv(env_var, "")
+        ]
+        if not missing:
+            print("✅ All HCS topics already configured")
+            return True
+        
         print("🔗 Connecting to Hedera network...")
-        topics = await sdk.create_topics()
+        topics = await sdk.create_topics(names=missing)
         
         print("\n✅ HCS Topics Created:")
         for name, topic_id in topics.items():
@@ -134,6 +153,13 @@ async def create_hcs_topics():
         print("\n📝 Updating .env file with topic IDs...")
         update_env_file(topics)
         
+        if sdk.failed_topics:
+            print("\n❌ Some topics could not be created:")
+            for name, error in sdk.failed_topics.items():
+                print(f"   {name.upper()}: {error}")
+            print("💡 Run 'python setup.py --create-topics' again to create only these")
+            return False
+        
         return True
         
     except Exception as e:
@@ -154,18 +180,10 @@ def update_env_file(topics):
         lines = f.readlines()
     
     # Update topic IDs
-    topic_mapping = {
-        "profiles": "TRUSTMESH_PROFILES_TOPIC",
-        "trust_tokens": "TRUSTMESH_TRUST_TOKENS_TOPIC",
-        "badges": "TRUSTMESH_BADGES_TOPIC",
-        "reputation": "TRUSTMESH_REPUTATION_TOPIC",
-        "polls": "TRUSTMESH_POLLS_TOPIC"
-    }
-    
     updated_lines = []
     for line in lines:
         updated = False
-        for topic_name, env_var in topic_mapping.items():
+        for topic_name, env_var in TOPIC_ENV_VARS.items():
             if line.startswith(f"{env_var}=") and topic_name in topics:
                 updated_lines.append(f"{env_var}={topics[topic_name]}\n")
                 updated = True